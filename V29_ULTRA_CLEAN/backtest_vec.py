@@ -0,0 +1,210 @@
+import argparse
+import itertools
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+# Backtest vettoriale (regole v32/v33/WF) su una serie di segnali, per un'intera griglia
+# di parametri in un colpo solo: ogni combinazione è una riga di array (G, T), niente loop
+# per riga né un run per combinazione.
+#
+#   vol          = std rolling(vol_window) di ret_1d (righe senza finestra completa scartate)
+#   signal_eff   = signal del giorno prima (si entra alla riga dopo il segnale)
+#   raw_trade_ret= signal_eff * future_return_5d
+#   sl / tp      = vol * vol_k_sl / sl * rr_ratio, ritorno clippato a [-sl, tp]
+#   effective_ret= clipped - 2 * (commission + slippage) sui trade, 0 fuori
+#   equity       = cumprod(1 + effective_ret * risk_per_trade)
+
+PARAMS = ["vol_window", "vol_k_sl", "rr_ratio", "risk_per_trade", "commission", "slippage"]
+STATS = ["total_return", "max_dd", "win_rate", "sharpe"]
+EQUITY_COLS = [
+    "date", "close", "future_return_5d", "signal", "ret_1d", "vol", "signal_eff", "raw_trade_ret",
+    "sl", "tp", "clipped_ret", "effective_ret", "strategy_return", "equity",
+]
+DEFAULT_GRID = {
+    "vol_window": [10, 20, 40],
+    "vol_k_sl": [0.5, 1.0, 1.5],
+    "rr_ratio": [1.5, 2.0, 3.0],
+    "risk_per_trade": [0.01, 0.02, 0.03],
+    "commission": [0.0005],
+    "slippage": [0.002],
+}
+
+
+def make_grid(**axes):
+    """Prodotto cartesiano degli assi -> DataFrame con una riga per combinazione (colonne PARAMS)."""
+    axes = {k: list(np.atleast_1d(axes.get(k, DEFAULT_GRID[k]))) for k in PARAMS}
+    return pd.DataFrame(list(itertools.product(*axes.values())), columns=PARAMS)
+
+
+def rolling_std(x, windows):
+    """
+    (W, T): std campionaria (ddof=1) sulle ultime w righe per ogni w, NaN finché la finestra
+    non è completa o contiene NaN (come pandas rolling(w).std()). Somme cumulative, O(W*T).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    w = np.asarray(windows, dtype=np.int64)[:, None]
+    T = len(x)
+    nan = np.isnan(x)
+    # centrata sulla media: le differenze di somme cumulative perdono meno cifre
+    xc = np.where(nan, 0.0, x - (np.nanmean(x) if (~nan).any() else 0.0))
+    s = np.concatenate([[0.0], np.cumsum(xc)])
+    ss = np.concatenate([[0.0], np.cumsum(xc * xc)])
+    cn = np.concatenate([[0], np.cumsum(nan)])
+    end = np.arange(1, T + 1)[None, :]
+    start = np.maximum(end - w, 0)
+    sw = s[end] - s[start]
+    ssw = ss[end] - ss[start]
+    var = (ssw - sw * sw / w) / (w - 1)
+    ok = (end >= w) & (cn[end] - cn[start] == 0)
+    return np.where(ok, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+
+def run_grid(signal, future_ret, ret_1d, grid, start=0, end=None):
+    """
+    Backtest di tutte le righe di `grid` (DataFrame/dict con colonne PARAMS) sulle righe
+    [start, end) delle serie. La vol usa anche la storia prima di `start`.
+    Ritorna un dict di array (G, T') per le colonne di equity + `valid` (righe con vol) e `stats`.
+    """
+    g = {k: np.asarray(grid[k], dtype=np.float64)[:, None] for k in PARAMS}
+    windows, widx = np.unique(g["vol_window"][:, 0].astype(np.int64), return_inverse=True)
+    sl_ = slice(start, end)
+
+    vol = rolling_std(ret_1d, windows)[:, sl_][widx]                # (G, T)
+    sig = np.nan_to_num(np.asarray(signal, dtype=np.float64)[sl_])
+    fr = np.asarray(future_ret, dtype=np.float64)[sl_]
+    valid = ~np.isnan(vol)
+
+    # entrata alla riga dopo il segnale; la prima riga con vol (o dopo un buco) parte flat
+    prev = np.concatenate([[0.0], sig[:-1]])[None, :]
+    first = valid & ~np.concatenate([np.zeros((len(vol), 1), bool), valid[:, :-1]], axis=1)
+    signal_eff = np.where(valid & ~first, prev, 0.0)
+
+    raw = signal_eff * fr[None, :]
+    sl = vol * g["vol_k_sl"]
+    tp = sl * g["rr_ratio"]
+    clipped = np.where(valid, np.clip(raw, -sl, tp), 0.0)
+    cost = 2.0 * (g["commission"] + g["slippage"])
+    in_trade = signal_eff != 0
+    eff = np.where(in_trade, clipped - cost, 0.0)
+    strat = eff * g["risk_per_trade"]
+    equity = np.cumprod(1.0 + strat, axis=1)
+
+    out = {
+        "signal": np.broadcast_to(sig, vol.shape),
+        "future_return_5d": np.broadcast_to(fr, vol.shape),
+        "vol": vol,
+        "signal_eff": signal_eff,
+        "raw_trade_ret": raw,
+        "sl": sl,
+        "tp": tp,
+        "clipped_ret": clipped,
+        "effective_ret": eff,
+        "strategy_return": strat,
+        "equity": equity,
+        "valid": valid,
+    }
+    out["stats"] = _stats(strat, equity, eff, in_trade, valid)
+    return out
+
+
+def _stats(strat, equity, eff, in_trade, valid):
+    n = valid.sum(axis=1)
+    r = np.where(valid, strat, 0.0)
+    mean = r.sum(axis=1) / np.maximum(n, 1)
+    var = (np.where(valid, strat - mean[:, None], 0.0) ** 2).sum(axis=1) / np.maximum(n - 1, 1)
+    sd = np.sqrt(var)
+    # prima dell'inizio l'equity vale 1: il cummax parte da lì come nel run troncato
+    dd = (equity / np.maximum.accumulate(equity, axis=1) - 1.0).min(axis=1) * 100
+    n_tr = in_trade.sum(axis=1)
+    wins = (in_trade & (eff > 0)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "total_return": equity[:, -1] - 1.0,
+            "max_dd": dd,
+            "win_rate": np.where(n_tr > 0, wins / np.maximum(n_tr, 1) * 100, np.nan),
+            "sharpe": np.where(sd > 0, mean / sd * np.sqrt(252), np.nan),
+        }
+
+
+def stats_frame(grid, res):
+    """Stesse colonne di backtest_v33_grid_results.csv / walkforward_stats.csv."""
+    out = pd.DataFrame(grid, columns=PARAMS).reset_index(drop=True)
+    out["vol_window"] = out["vol_window"].astype(int)
+    for k in STATS:
+        out[k] = res["stats"][k]
+    return out
+
+
+def equity_frame(df, res, i, start=0, end=None):
+    """Equity della combinazione i (solo righe con vol), colonne di backtest_v33_best_equity.csv."""
+    part = df.iloc[start:end].reset_index(drop=True)
+    out = pd.DataFrame({
+        "date": part["date"].values,
+        "close": part["close"].values,
+        "ret_1d": part["ret_1d"].values,
+        "signal": res["signal"][i].astype(int),
+    })
+    for k in EQUITY_COLS:
+        if k not in out:
+            out[k] = res[k][i]
+    return out.loc[res["valid"][i], EQUITY_COLS].reset_index(drop=True)
+
+
+# ---------------- CLI ----------------
+def _axis(s, cast=float):
+    return [cast(v) for v in s.split(",")]
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="[BT VEC] %(message)s")
+    ap = argparse.ArgumentParser(description="Backtest vettoriale di una griglia di parametri")
+    ap.add_argument("--signals", default="signals_v31_A/signals_v31_A_signals.csv", help="CSV date,signal")
+    ap.add_argument("--data", default="../V38_QUANT_ELITE/data/dataset_v38.csv",
+                    help="CSV con date, close, future_return_5d, return_1d")
+    ap.add_argument("--vol-window", default="10,20,40")
+    ap.add_argument("--vol-k-sl", default="0.5,1.0,1.5")
+    ap.add_argument("--rr-ratio", default="1.5,2.0,3.0")
+    ap.add_argument("--risk-per-trade", default="0.01,0.02,0.03")
+    ap.add_argument("--commission", default="0.0005")
+    ap.add_argument("--slippage", default="0.002")
+    ap.add_argument("--out-dir", default="backtest_vec")
+    args = ap.parse_args()
+
+    sig = pd.read_csv(args.signals)
+    data = pd.read_csv(args.data)
+    sig.columns = [c.strip().lower() for c in sig.columns]
+    data.columns = [c.strip().lower() for c in data.columns]
+    df = sig[["date", "signal"]].merge(data[["date", "close", "future_return_5d", "return_1d"]], on="date")
+    df = df.sort_values("date").reset_index(drop=True).rename(columns={"return_1d": "ret_1d"})
+    logging.info(f"📂 {len(df)} righe ({df['date'].iloc[0]} → {df['date'].iloc[-1]})")
+
+    grid = make_grid(
+        vol_window=_axis(args.vol_window, int),
+        vol_k_sl=_axis(args.vol_k_sl),
+        rr_ratio=_axis(args.rr_ratio),
+        risk_per_trade=_axis(args.risk_per_trade),
+        commission=_axis(args.commission),
+        slippage=_axis(args.slippage),
+    )
+    res = run_grid(df["signal"].values, df["future_return_5d"].values, df["ret_1d"].values, grid)
+    stats = stats_frame(grid, res)
+    order = stats["sharpe"].sort_values(ascending=False, kind="stable").index
+    best = int(order[0])
+    logging.info(f"⚡ {len(grid)} combinazioni × {len(df)} righe")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    stats.loc[order].to_csv(os.path.join(args.out_dir, "grid_results.csv"), index=False)
+    equity_frame(df, res, best).to_csv(os.path.join(args.out_dir, "best_equity.csv"), index=False)
+    b = stats.loc[best]
+    logging.info(
+        f"🏆 Best: vol_window={int(b.vol_window)} k_sl={b.vol_k_sl} rr={b.rr_ratio} risk={b.risk_per_trade} "
+        f"→ ret {b.total_return * 100:+.2f}% dd {b.max_dd:.2f}% sharpe {b.sharpe:.2f}"
+    )
+    logging.info(f"✅ Salvati grid_results.csv / best_equity.csv in {args.out_dir}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+import argparse
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+# Store colonnare versionato per la pipeline V29/V30/V38 (sostituisce la catena di CSV).
+#
+# <root>/manifest.json                      -> dataset, versioni, schema, lineage
+# <root>/<dataset>/g<generazione>/<col>.bin -> una colonna = array raw little-endian (np.memmap)
+#
+# - append-only: una versione = prefisso di N righe dei file della sua generazione,
+#   quindi le versioni vecchie restano leggibili dopo ogni append settimanale
+# - write() con dati/schema nuovi apre una nuova generazione (la vecchia resta su disco)
+# - colonne "ereditate": un dataset derivato (es. signals_v38 da dataset_v38) salva solo
+#   le colonne nuove o cambiate, le altre puntano al dataset base (zero copie)
+# - lettura per colonna, zero-copy (np.memmap read-only)
+#
+# Esempi:
+#   python colstore.py import dataset_v38 ../V38_QUANT_ELITE/data/dataset_v38.csv
+#   python colstore.py import signals_v38 ../V38_QUANT_ELITE/signals_v38.csv --base dataset_v38
+#   python colstore.py import backtest_v38 ../V38_QUANT_ELITE/backtest_v38.csv --base signals_v38
+#   python colstore.py append dataset_v38 eia_settimana.csv      # solo le date nuove
+#   python colstore.py info
+#   python colstore.py export dataset_v30 dataset_v30.csv
+
+FORMAT = 1
+MANIFEST = "manifest.json"
+DEFAULT_ROOT = "colstore"
+INDEX = "date"
+
+
+def _dtype_ok(dt):
+    return dt.kind in "fiubM"
+
+
+def _col_file(col):
+    return col.replace(os.sep, "_") + ".bin"
+
+
+def _same(a, b):
+    if a.dtype != b.dtype or a.shape != b.shape:
+        return False
+    if a.dtype.kind in "fM":
+        return bool(np.array_equal(a, b, equal_nan=True))
+    return bool(np.array_equal(a, b))
+
+
+class ColumnStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self._path = os.path.join(root, MANIFEST)
+        self._manifest = self._load()
+
+    # ---------------- manifest ----------------
+    def _load(self):
+        if not os.path.exists(self._path):
+            return {"format": FORMAT, "datasets": {}}
+        with open(self._path, "r", encoding="utf-8") as f:
+            m = json.load(f)
+        if m.get("format") != FORMAT:
+            raise ValueError(f"{self._path}: formato store {m.get('format')}, atteso {FORMAT}")
+        return m
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=2)
+        os.replace(tmp, self._path)
+
+    def has(self, name):
+        return name in self._manifest["datasets"]
+
+    def datasets(self):
+        return sorted(self._manifest["datasets"])
+
+    def versions(self, name):
+        return list(self._ds(name)["versions"])
+
+    def info(self, name, version=None):
+        """Metadati di una versione (default: l'ultima): rows, columns {nome: dtype}, parents, inherits."""
+        vs = self._ds(name)["versions"]
+        if version is None:
+            return vs[-1]
+        for v in vs:
+            if v["version"] == version:
+                return v
+        raise KeyError(f"{name}: versione {version} inesistente")
+
+    def columns(self, name, version=None):
+        return list(self.info(name, version)["columns"])
+
+    def ref(self, name, version=None):
+        """'dataset@vN' per i log e per la lineage."""
+        return f"{name}@v{self.info(name, version)['version']}"
+
+    def _ds(self, name):
+        try:
+            return self._manifest["datasets"][name]
+        except KeyError:
+            raise KeyError(f"dataset '{name}' non presente in {self.root}") from None
+
+    def _gen_dir(self, name, gen):
+        return os.path.join(self.root, name, f"g{gen}")
+
+    # ---------------- read ----------------
+    def read(self, name, columns=None, version=None):
+        """{colonna: array read-only} della versione; legge solo le colonne richieste."""
+        v = self.info(name, version)
+        cols = list(v["columns"]) if columns is None else list(columns)
+        out = {}
+        for c in cols:
+            if c not in v["columns"]:
+                raise KeyError(f"{self.ref(name, version)}: colonna '{c}' inesistente")
+            inh = v.get("inherits", {}).get(c)
+            if inh is not None:
+                out[c] = self.read(inh["dataset"], [c], inh["version"])[c][: v["rows"]]
+                continue
+            dt = np.dtype(v["columns"][c])
+            n = v["rows"]
+            if n == 0:
+                out[c] = np.empty(0, dtype=dt)
+                continue
+            path = os.path.join(self._gen_dir(name, v["generation"]), _col_file(c))
+            out[c] = np.memmap(path, dtype=dt, mode="r", shape=(n,))
+        return out
+
+    def read_frame(self, name, columns=None, version=None):
+        """DataFrame pandas (l'indice data sempre incluso come colonna)."""
+        import pandas as pd
+
+        idx = self._ds(name)["index"]
+        if columns is not None and idx not in columns:
+            columns = [idx] + list(columns)
+        return pd.DataFrame(self.read(name, columns, version), copy=False)
+
+    # ---------------- write ----------------
+    def write(self, name, data, parents=(), base=None, source="", note=""):
+        """
+        Nuova generazione del dataset con tutte le righe di `data` ({colonna: array}).
+        base="dataset" -> le colonne identiche a quelle della sua ultima versione non vengono riscritte.
+        Ritorna il numero di versione.
+        """
+        data = self._check(data)
+        n = len(data[INDEX])
+        if n > 1 and not (np.diff(data[INDEX].astype("int64")) > 0).all():
+            raise ValueError(f"{name}: indice '{INDEX}' non strettamente crescente")
+
+        inherits = {}
+        if base is not None:
+            bv = self.info(base)
+            if bv["rows"] >= n:
+                for c, arr in data.items():
+                    if c in bv["columns"] and _same(np.asarray(self.read(base, [c])[c][:n]), arr):
+                        inherits[c] = self._inherit_ref(base, c, bv["version"])
+            parents = list(parents) + [self.ref(base)]
+
+        ds = self._manifest["datasets"].get(name)
+        gen = 0 if ds is None else ds["versions"][-1]["generation"] + 1
+        gdir = self._gen_dir(name, gen)
+        os.makedirs(gdir, exist_ok=True)
+        for c, arr in data.items():
+            if c not in inherits:
+                with open(os.path.join(gdir, _col_file(c)), "wb") as f:
+                    f.write(np.ascontiguousarray(arr).tobytes())
+
+        if ds is None:
+            ds = self._manifest["datasets"][name] = {"index": INDEX, "versions": []}
+        version = len(ds["versions"]) + 1
+        ds["versions"].append({
+            "version": version,
+            "generation": gen,
+            "rows": n,
+            "columns": {c: arr.dtype.str for c, arr in data.items()},
+            "inherits": inherits,
+            "parents": list(parents),
+            "source": source,
+            "note": note,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+        self._save()
+        logging.info(f"💾 {name}@v{version}: {n} righe, {len(data)} colonne ({len(inherits)} ereditate)")
+        return version
+
+    def append(self, name, data, source="", note=""):
+        """
+        Aggiunge in coda le righe con data > ultima data (le altre vengono ignorate: import idempotente).
+        Stesso schema obbligatorio. Ritorna la nuova versione (o quella attuale se non c'è nulla di nuovo).
+        """
+        data = self._check(data)
+        last = self.info(name)
+        if set(data) != set(last["columns"]):
+            missing = sorted(set(last["columns"]) - set(data))
+            extra = sorted(set(data) - set(last["columns"]))
+            raise ValueError(f"{name}: schema diverso (mancano {missing}, in più {extra}) → usa write()")
+
+        n0 = last["rows"]
+        if n0:
+            last_date = self.read(name, [INDEX])[INDEX][-1]
+            keep = data[INDEX] > last_date
+            data = {c: arr[keep] for c, arr in data.items()}
+        n_new = len(data[INDEX])
+        if n_new == 0:
+            logging.info(f"{name}: nessuna riga nuova")
+            return last["version"]
+        if n_new > 1 and not (np.diff(data[INDEX].astype("int64")) > 0).all():
+            raise ValueError(f"{name}: indice '{INDEX}' non strettamente crescente")
+
+        n = n0 + n_new
+        gdir = self._gen_dir(name, last["generation"])
+        inherits = dict(last.get("inherits", {}))
+        for c, dts in last["columns"].items():
+            arr = data[c].astype(np.dtype(dts), copy=False)
+            inh = inherits.get(c)
+            if inh is not None:
+                # resta ereditata solo se il base ha già le stesse righe nuove
+                bv = self.info(inh["dataset"])
+                if bv["rows"] >= n and c in bv["columns"]:
+                    tail = np.asarray(self.read(inh["dataset"], [c])[c][n0:n])
+                    if _same(tail, arr):
+                        inherits[c] = self._inherit_ref(inh["dataset"], c, bv["version"])
+                        continue
+                # materializza: prefisso dal base + righe nuove
+                prefix = np.asarray(self.read(name, [c])[c])
+                with open(os.path.join(gdir, _col_file(c)), "wb") as f:
+                    f.write(np.ascontiguousarray(prefix).tobytes())
+                del inherits[c]
+            path = os.path.join(gdir, _col_file(c))
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                # un append interrotto può aver lasciato byte oltre l'ultima versione
+                f.truncate(n0 * arr.dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(arr).tobytes())
+
+        ds = self._ds(name)
+        version = len(ds["versions"]) + 1
+        ds["versions"].append({
+            **last,
+            "version": version,
+            "rows": n,
+            "inherits": inherits,
+            "parents": [self.ref(name)],
+            "source": source,
+            "note": note,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        })
+        self._save()
+        logging.info(f"➕ {name}@v{version}: +{n_new} righe (totale {n})")
+        return version
+
+    def write_frame(self, name, df, **kw):
+        return self.write(name, frame_to_columns(df), **kw)
+
+    def append_frame(self, name, df, **kw):
+        return self.append(name, frame_to_columns(df), **kw)
+
+    def _inherit_ref(self, base, col, version):
+        # punta sempre al dataset che possiede fisicamente la colonna
+        inh = self.info(base, version).get("inherits", {}).get(col)
+        return dict(inh) if inh is not None else {"dataset": base, "version": version}
+
+    def _check(self, data):
+        if INDEX not in data:
+            raise ValueError(f"colonna indice '{INDEX}' mancante")
+        out = {}
+        n = None
+        for c, arr in data.items():
+            arr = np.asarray(arr)
+            if c == INDEX:
+                arr = arr.astype("datetime64[D]")
+            if arr.ndim != 1 or not _dtype_ok(arr.dtype):
+                raise ValueError(f"colonna '{c}': tipo {arr.dtype} non supportato (solo numeriche/bool/date 1D)")
+            if n is None:
+                n = len(arr)
+            elif len(arr) != n:
+                raise ValueError(f"colonna '{c}': {len(arr)} righe invece di {n}")
+            out[c] = arr.astype(arr.dtype.newbyteorder("<"), copy=False)
+        return out
+
+
+# ---------------- pandas / CSV ----------------
+def frame_to_columns(df):
+    """DataFrame -> colonne tipizzate: nomi normalizzati, data in datetime64[D], il resto numerico."""
+    import pandas as pd
+
+    df = df.copy()
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    if INDEX not in df.columns:
+        for alt in ("data", "timestamp"):
+            if alt in df.columns:
+                df = df.rename(columns={alt: INDEX})
+                break
+    out = {INDEX: pd.to_datetime(df[INDEX]).values.astype("datetime64[D]")}
+    for c in df.columns:
+        if c == INDEX:
+            continue
+        s = df[c]
+        if s.dtype == object:
+            s = pd.to_numeric(s, errors="raise")
+        out[c] = s.to_numpy()
+    return out
+
+
+def read_columns(name, columns=None, store_root=DEFAULT_ROOT, csv_path=None):
+    """Store se il dataset c'è, altrimenti fallback CSV (stessa normalizzazione). Ritorna (df, ref)."""
+    import pandas as pd
+
+    if os.path.exists(os.path.join(store_root, MANIFEST)):
+        store = ColumnStore(store_root)
+        if store.has(name):
+            return store.read_frame(name, columns), store.ref(name)
+    if csv_path is None or not os.path.exists(csv_path):
+        raise FileNotFoundError(f"dataset '{name}' non trovato né in {store_root} né come CSV ({csv_path})")
+    df = pd.read_csv(csv_path)
+    df.columns = [c.strip().lower() for c in df.columns]
+    if columns is not None:
+        df = df[[c for c in df.columns if c in set(columns) | {INDEX}]]
+    return df, csv_path
+
+
+# ---------------- CLI ----------------
+def main():
+    logging.basicConfig(level=logging.INFO, format="[COLSTORE] %(message)s")
+    ap = argparse.ArgumentParser(description="Store colonnare versionato dei dataset EIA")
+    ap.add_argument("--root", default=DEFAULT_ROOT)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("import", help="CSV -> nuova generazione del dataset")
+    p.add_argument("name")
+    p.add_argument("csv")
+    p.add_argument("--base", help="dataset base: le colonne identiche non vengono duplicate")
+    p.add_argument("--note", default="")
+
+    p = sub.add_parser("append", help="aggiunge le righe nuove (data > ultima) di un CSV")
+    p.add_argument("name")
+    p.add_argument("csv")
+    p.add_argument("--note", default="")
+
+    p = sub.add_parser("info", help="dataset / versioni / lineage")
+    p.add_argument("name", nargs="?")
+
+    p = sub.add_parser("export", help="versione -> CSV")
+    p.add_argument("name")
+    p.add_argument("csv")
+    p.add_argument("--version", type=int)
+    p.add_argument("--columns", help="lista separata da virgole")
+
+    args = ap.parse_args()
+    store = ColumnStore(args.root)
+
+    if args.cmd in ("import", "append"):
+        import pandas as pd
+
+        df = pd.read_csv(args.csv)
+        if args.cmd == "import":
+            store.write_frame(args.name, df, base=args.base, source=args.csv, note=args.note)
+        else:
+            store.append_frame(args.name, df, source=args.csv, note=args.note)
+    elif args.cmd == "info":
+        names = [args.name] if args.name else store.datasets()
+        for name in names:
+            for v in store.versions(name):
+                logging.info(
+                    f"{name}@v{v['version']} g{v['generation']} rows={v['rows']} cols={len(v['columns'])} "
+                    f"inherited={len(v.get('inherits', {}))} parents={v['parents']} {v['created']} {v['note']}"
+                )
+    elif args.cmd == "export":
+        cols = args.columns.split(",") if args.columns else None
+        store.read_frame(args.name, cols, args.version).to_csv(args.csv, index=False)
+        logging.info(f"📁 {store.ref(args.name, args.version)} → {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Cache content-addressed delle trasformazioni della pipeline (normalizzazione colonne,
+# label shift(-5), ffill/bfill, pulizia inf...).
+#
+# chiave = sha256(stage + hash dei dati in input + parametri + hash del codice della funzione):
+# se input, parametri e codice non cambiano lo stage non viene rieseguito. Ogni risultato salva anche l'hash del proprio
+# output, così lo stage successivo ha la sua chiave senza ri-hashare i dati.
+#
+# <root>/index.json          -> chiave: stage, bytes, hash output, ultimo uso
+# <root>/<kk>/<chiave>.pkl   -> DataFrame risultato
+#
+# Eviction LRU: oltre max_bytes si cancellano i risultati usati meno di recente.
+#
+# Esempi:
+#   python feature_cache.py info
+#   python feature_cache.py clear [--stage v30_labels]
+
+FORMAT = 1
+INDEX_FILE = "index.json"
+DEFAULT_ROOT = "feature_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def data_hash(df):
+    """Hash del contenuto di un DataFrame (valori, indice, nomi e dtype delle colonne)."""
+    h = hashlib.sha256()
+    h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def file_hash(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for b in iter(lambda: f.read(chunk), b""):
+            h.update(b)
+    return h.hexdigest()
+
+
+def code_hash(fn):
+    """Hash del bytecode di fn (co_code, costanti, nomi usati, funzioni annidate comprese)."""
+    code = getattr(fn, "__code__", None)
+    if code is None:
+        fn = getattr(fn, "func", fn)  # functools.partial
+        code = getattr(fn, "__code__", None)
+    if code is None:
+        return f"{type(fn).__module__}.{getattr(fn, '__qualname__', type(fn).__qualname__)}"
+    h = hashlib.sha256()
+
+    def walk(co):
+        h.update(co.co_code)
+        h.update(repr(co.co_names).encode())
+        for c in co.co_consts:
+            if hasattr(c, "co_code"):
+                walk(c)
+            elif isinstance(c, frozenset):
+                # `x in {"a", "b"}`: l'ordine del repr cambia tra processi (hash randomization)
+                h.update(repr(sorted(map(repr, c))).encode())
+            else:
+                h.update(repr(c).encode())
+
+    walk(code)
+    return h.hexdigest()
+
+
+def _jsonable(v):
+    if isinstance(v, (list, tuple)):
+        return [_jsonable(x) for x in v]
+    if isinstance(v, dict):
+        return {str(k): _jsonable(x) for k, x in sorted(v.items())}
+    if isinstance(v, np.generic):
+        return v.item()
+    return v
+
+
+class FeatureCache:
+    def __init__(self, root=DEFAULT_ROOT, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self._path = os.path.join(root, INDEX_FILE)
+        self._index = self._load()
+        self.hits = 0
+        self.misses = 0
+
+    # ---------------- index ----------------
+    def _load(self):
+        if not os.path.exists(self._path):
+            return {"format": FORMAT, "entries": {}}
+        with open(self._path, "r", encoding="utf-8") as f:
+            idx = json.load(f)
+        if idx.get("format") != FORMAT:
+            raise ValueError(f"feature_cache: formato {idx.get('format')} non supportato (atteso {FORMAT})")
+        return idx
+
+    def _save(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self._path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=1)
+        os.replace(tmp, self._path)
+
+    def _file(self, key):
+        return os.path.join(self.root, key[:2], key + ".pkl")
+
+    @property
+    def entries(self):
+        return self._index["entries"]
+
+    def total_bytes(self):
+        return sum(e["bytes"] for e in self.entries.values())
+
+    # ---------------- chiavi ----------------
+    @staticmethod
+    def key(stage, input_hash, params=None, code=""):
+        payload = json.dumps([stage, input_hash, _jsonable(params or {}), code], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    # ---------------- get / put ----------------
+    def get(self, key):
+        """(DataFrame, hash output) o None. Un file sparito (cancellato a mano) conta come miss."""
+        e = self.entries.get(key)
+        if e is None:
+            return None
+        path = self._file(key)
+        if not os.path.exists(path):
+            del self.entries[key]
+            self._save()
+            return None
+        e["last_used"] = time.time()
+        self._save()
+        return pd.read_pickle(path), e["out_hash"]
+
+    def put(self, key, df, stage="", out_hash=None):
+        out_hash = out_hash or data_hash(df)
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        df.to_pickle(tmp)
+        os.replace(tmp, path)
+        now = time.time()
+        self.entries[key] = {
+            "stage": stage,
+            "bytes": os.path.getsize(path),
+            "rows": len(df),
+            "out_hash": out_hash,
+            "created": now,
+            "last_used": now,
+        }
+        self._evict(keep=key)
+        self._save()
+        return out_hash
+
+    def _evict(self, keep=None):
+        total = self.total_bytes()
+        for k in sorted(self.entries, key=lambda k: self.entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if k == keep:
+                continue
+            total -= self.entries[k]["bytes"]
+            self._drop(k)
+
+    def _drop(self, key):
+        self.entries.pop(key, None)
+        try:
+            os.remove(self._file(key))
+        except OSError:
+            pass
+
+    def clear(self, stage=None):
+        keys = [k for k, e in self.entries.items() if stage is None or e["stage"] == stage]
+        for k in keys:
+            self._drop(k)
+        self._save()
+        return len(keys)
+
+    # ---------------- stage ----------------
+    def run(self, stage, fn, df, input_hash=None, **params):
+        """
+        fn(df, **params) memoizzata. input_hash: hash già noto dell'input (output di uno stage
+        precedente, ref dello store, hash del file sorgente); se manca si calcola dai dati.
+        Cambiare il corpo di fn cambia la chiave (code_hash), quindi lo stage viene ricalcolato.
+        Ritorna (risultato, hash del risultato) da passare allo stage successivo.
+        """
+        if input_hash is None:
+            input_hash = data_hash(df)
+        key = self.key(stage, input_hash, params, code_hash(fn))
+        hit = self.get(key)
+        if hit is not None:
+            self.hits += 1
+            logging.info(f"♻️  {stage}: cache hit ({key[:12]})")
+            return hit
+        self.misses += 1
+        t0 = time.perf_counter()
+        out = fn(df, **params)
+        out_hash = self.put(key, out, stage=stage)
+        logging.info(f"🧮 {stage}: calcolato in {time.perf_counter() - t0:.2f}s → cache ({key[:12]})")
+        return out, out_hash
+
+
+# ---------------- CLI ----------------
+def main():
+    logging.basicConfig(level=logging.INFO, format="[CACHE] %(message)s")
+    ap = argparse.ArgumentParser(description="Cache delle trasformazioni feature/label")
+    ap.add_argument("--root", default=DEFAULT_ROOT)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("info")
+    p = sub.add_parser("clear")
+    p.add_argument("--stage")
+    args = ap.parse_args()
+
+    cache = FeatureCache(args.root)
+    if args.cmd == "clear":
+        n = cache.clear(args.stage)
+        logging.info(f"🗑️  {n} risultati rimossi")
+        return
+    by_stage = {}
+    for e in cache.entries.values():
+        s = by_stage.setdefault(e["stage"], [0, 0])
+        s[0] += 1
+        s[1] += e["bytes"]
+    for stage, (n, b) in sorted(by_stage.items()):
+        logging.info(f"{stage:<24} {n:>4} risultati  {b / 1e6:8.2f} MB")
+    logging.info(f"Totale: {len(cache.entries)} risultati, {cache.total_bytes() / 1e6:.2f} / {cache.max_bytes / 1e6:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
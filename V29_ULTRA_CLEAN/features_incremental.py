@@ -0,0 +1,344 @@
+import argparse
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+
+# Feature EIA incrementali: una release nuova -> solo le feature della riga nuova,
+# con le stesse definizioni dei dataset batch (layout "v38" = dataset_v38, "master" = MASTER_results):
+#
+# - *_actual / *_forecast / close / atr_pct passati così come sono
+# - crude_surprise = actual - forecast; gasoline/distillates/cushing_surprise = 0 come nel batch
+# - surprise_pct = (actual - forecast) / forecast * pct_scale solo per le serie del layout
+#   (v38: crude + gasoline, x100; master: solo crude, frazione), le altre = 0
+# - eia_score = 0.4 crude + 0.2 gasoline + 0.2 distillates (pct calcolati, come dataset_v38)
+# - return_1d/2d/3d = close.pct_change(k) (frazioni), roll_vol_10/20 = std dei return_1d
+# - return_5d "as of" = close / close di 5 righe fa - 1 (nel batch è il forward return
+#   riempito in coda con ffill): le 4 righe precedenti lo ricevono in backfill, la riga di
+#   5 release fa riceve il valore definitivo + future_return_5d / target
+# - z rolling di ogni surprise_pct (non azzerato) contro le ultime `window` release (riga
+#   corrente esclusa, niente look-ahead): somme correnti, O(1) per release
+# - eia_z_score = -(somma pesata degli z): scorte sotto le attese = rialzista = score > 0
+#
+# Le prime max(VOL_WINDOWS) righe sono warm-up: nel batch usano close precedenti al file.
+# `check` riesegue lo storico riga per riga e lo confronta con le colonne batch.
+#
+# Lo stato (finestre + close + pending) è un JSON salvato in modo atomico dopo ogni update,
+# così alla release il calcolo parte già caldo.
+
+STATE_VERSION = 2
+SERIES = {
+    # nome feature: (colonna actual, colonna forecast)
+    "crude": ("crude_actual", "crude_forecast"),
+    "gasoline": ("gas_actual", "gas_forecast"),
+    "distillates": ("dist_actual", "dist_forecast"),
+    "cushing": ("cushing_actual", "cushing_forecast"),
+}
+LAYOUTS = {
+    # serie con surprise / surprise_pct calcolati (le altre valgono 0), scala dei pct
+    "v38": {"surprise": ("crude",), "surprise_pct": ("crude", "gasoline"), "pct_scale": 100.0},
+    "master": {"surprise": ("crude",), "surprise_pct": ("crude",), "pct_scale": 1.0},
+}
+PASSTHROUGH = ["crude_actual", "crude_forecast", "gas_actual", "gas_forecast",
+               "dist_actual", "dist_forecast", "close", "atr_pct"]
+EIA_SCORE_WEIGHTS = {"crude": 0.4, "gasoline": 0.2, "distillates": 0.2}
+DEFAULT_WEIGHTS = {"crude": 1.0, "gasoline": 0.5, "distillates": 0.5, "cushing": 0.25}
+RETURN_LAGS = (1, 2, 3)
+VOL_WINDOWS = (10, 20)
+HORIZON = 5
+
+
+class RollingZ:
+    """Media/std delle ultime n osservazioni con somme correnti."""
+
+    def __init__(self, window, values=()):
+        self.window = int(window)
+        self.values = deque(maxlen=self.window)
+        self.s = 0.0
+        self.ss = 0.0
+        for v in values:
+            self.push(v)
+
+    def push(self, x):
+        if len(self.values) == self.window:
+            old = self.values[0]
+            self.s -= old
+            self.ss -= old * old
+        self.values.append(x)
+        self.s += x
+        self.ss += x * x
+
+    def std(self):
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        mean = self.s / n
+        var = (self.ss - n * mean * mean) / (n - 1)
+        return math.sqrt(var) if var > 1e-12 * max(self.ss / n, 1e-300) else 0.0
+
+    def z(self, x, min_obs=3):
+        n = len(self.values)
+        sd = self.std()
+        if n < min_obs or sd == 0.0:
+            return 0.0
+        return (x - self.s / n) / sd
+
+
+class FeatureState:
+    def __init__(self, window=20, layout="v38", weights=None):
+        if layout not in LAYOUTS:
+            raise ValueError(f"layout '{layout}' sconosciuto (disponibili: {', '.join(LAYOUTS)})")
+        self.window = int(window)
+        self.layout = layout
+        self.pct_scale = LAYOUTS[layout]["pct_scale"]
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
+        self.last_date = None
+        self.z = {k: RollingZ(self.window) for k in SERIES}
+        self.rets = {w: RollingZ(w) for w in VOL_WINDOWS}
+        # (date, close) delle ultime HORIZON release: return_k e forward return
+        self.pending = deque(maxlen=HORIZON)
+
+    # ---------------- update ----------------
+    def update(self, row):
+        """
+        row: dict della release (date, *_actual, *_forecast, close, atr_pct opzionale).
+        Ritorna (features della riga nuova, backfill {date: {colonna: valore}} o {}).
+        Le feature non calcolabili (storico corto, close mancante) valgono None.
+        """
+        date = str(row["date"])[:10]
+        if self.last_date is not None and date <= self.last_date:
+            raise ValueError(f"release {date} già processata (ultima: {self.last_date})")
+
+        out = {"date": date}
+        for c in PASSTHROUGH:
+            out[c] = _num(row.get(c))
+        lay = LAYOUTS[self.layout]
+        score = 0.0
+        zscore = 0.0
+        for name, (a_col, f_col) in SERIES.items():
+            a, f = _num(row.get(a_col)), _num(row.get(f_col))
+            if a is None or f is None:
+                surprise, pct = 0.0, 0.0
+            else:
+                surprise = a - f
+                pct = surprise / f * self.pct_scale if f else 0.0
+            rz = self.z[name]
+            z = rz.z(pct)
+            rz.push(pct)
+            out[f"{name}_surprise"] = surprise if name in lay["surprise"] else 0.0
+            out[f"{name}_surprise_pct"] = pct if name in lay["surprise_pct"] else 0.0
+            out[f"{name}_surprise_z"] = z
+            score += EIA_SCORE_WEIGHTS.get(name, 0.0) * pct
+            zscore -= self.weights.get(name, 0.0) * z
+        out["eia_score"] = score
+        out["eia_z_score"] = zscore
+
+        close = out["close"]
+        backfill = {}
+        for k in RETURN_LAGS:
+            out[f"return_{k}d"] = None
+        for w in VOL_WINDOWS:
+            out[f"roll_vol_{w}"] = None
+        out["return_5d"] = None
+        if close is not None:
+            n = len(self.pending)
+            for k in RETURN_LAGS:
+                if n >= k:
+                    out[f"return_{k}d"] = close / self.pending[-k][1] - 1.0
+            r1 = out["return_1d"]
+            if r1 is not None:
+                for w, rv in self.rets.items():
+                    rv.push(r1)
+                    if len(rv.values) == w:
+                        out[f"roll_vol_{w}"] = rv.std()
+            if n == HORIZON:
+                d0, c0 = self.pending[0]
+                fr = close / c0 - 1.0
+                out["return_5d"] = fr
+                backfill[d0] = {"return_5d": fr, "future_return_5d": fr, "target": int(fr > 0)}
+                for d, _ in list(self.pending)[1:]:
+                    backfill[d] = {"return_5d": fr}
+            self.pending.append((date, close))
+
+        self.last_date = date
+        return out, backfill
+
+    # ---------------- persistenza ----------------
+    def to_dict(self):
+        return {
+            "version": STATE_VERSION,
+            "window": self.window,
+            "layout": self.layout,
+            "weights": self.weights,
+            "last_date": self.last_date,
+            "z": {k: list(rz.values) for k, rz in self.z.items()},
+            "rets": {str(w): list(rv.values) for w, rv in self.rets.items()},
+            "pending": [list(p) for p in self.pending],
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        if d.get("version") != STATE_VERSION:
+            raise ValueError(f"stato feature versione {d.get('version')}, attesa {STATE_VERSION}")
+        st = cls(d["window"], d["layout"], d["weights"])
+        st.last_date = d["last_date"]
+        # somme ricalcolate dai valori: niente drift accumulato tra un run e l'altro
+        st.z = {k: RollingZ(st.window, d["z"].get(k, ())) for k in SERIES}
+        st.rets = {w: RollingZ(w, d["rets"].get(str(w), ())) for w in VOL_WINDOWS}
+        st.pending = deque((tuple(p) for p in d["pending"]), maxlen=HORIZON)
+        return st
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def _num(v):
+    if v is None or v == "":
+        return None
+    try:
+        x = float(v)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(x) else x
+
+
+def bootstrap(rows, window=20, layout="v38", weights=None):
+    """Storico completo -> stato pronto per la prossima release (una passata, O(righe))."""
+    st = FeatureState(window, layout, weights)
+    for r in rows:
+        st.update(r)
+    return st
+
+
+def replay(rows, window=20, layout="v38"):
+    """Storico riga per riga come alla release, backfill applicati: lista di feature per riga."""
+    st = FeatureState(window, layout)
+    out = []
+    pos = {}
+    for r in rows:
+        feats, backfill = st.update(r)
+        for d, cols in backfill.items():
+            out[pos[d]].update(cols)
+        pos[feats["date"]] = len(out)
+        out.append(feats)
+    return out
+
+
+def check(csv_path, layout="v38", rtol=1e-9, atol=1e-12):
+    """
+    Confronta replay() con le colonne del CSV batch (dopo il warm-up).
+    Ritorna {colonna: righe diverse}; vuoto = stesse feature.
+    """
+    import pandas as pd
+    df = pd.read_csv(csv_path)
+    df.columns = [c.strip().lower() for c in df.columns]
+    rows = df.to_dict("records")
+    feats = replay(rows, layout=layout)
+    warm = max(VOL_WINDOWS)
+    n = len(rows)
+    cols = [c for c in feats[-1] if c in df.columns and c != "date"]
+    cols += [c for c in ("future_return_5d", "target") if c in df.columns]
+    bad = {}
+    for c in cols:
+        # future_return_5d / target delle ultime HORIZON righe non sono ancora noti alla release
+        end = n - HORIZON if c in ("future_return_5d", "target") else n
+        diff = []
+        for i in range(warm, end):
+            a, b = feats[i].get(c), df[c].iloc[i]
+            if a is None or not math.isclose(float(a), float(b), rel_tol=rtol, abs_tol=atol):
+                diff.append(i)
+        if diff:
+            bad[c] = diff
+    return bad
+
+
+def _history_rows(args):
+    if args.csv:
+        import csv
+        with open(args.csv, newline="", encoding="utf-8") as f:
+            rows = [{k.strip().lower(): v for k, v in r.items()} for r in csv.DictReader(f)]
+        return rows, args.csv
+    from colstore import ColumnStore, DEFAULT_ROOT
+    store = ColumnStore(args.root or DEFAULT_ROOT)
+    need = ["close", "atr_pct"] + [c for pair in SERIES.values() for c in pair]
+    cols = [c for c in need if c in store.columns(args.dataset)]
+    data = store.read(args.dataset, ["date"] + cols)
+    n = len(data["date"])
+    rows = [{c: (str(data[c][i]) if c == "date" else float(data[c][i])) for c in data} for i in range(n)]
+    return rows, store.ref(args.dataset)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="[FEAT] %(message)s")
+    ap = argparse.ArgumentParser(description="Feature EIA incrementali (una release alla volta)")
+    ap.add_argument("--state", default="features_state.json")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("init", help="costruisce lo stato dallo storico (store colonnare o CSV)")
+    p.add_argument("--dataset", default="dataset_v38")
+    p.add_argument("--root")
+    p.add_argument("--csv")
+    p.add_argument("--window", type=int, default=20)
+    p.add_argument("--layout", choices=sorted(LAYOUTS), default="v38")
+
+    p = sub.add_parser("check", help="replay di un CSV batch riga per riga e confronto delle colonne")
+    p.add_argument("csv", nargs="?", default=os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "V38_QUANT_ELITE", "data", "dataset_v38.csv"))
+    p.add_argument("--layout", choices=sorted(LAYOUTS), default="v38")
+    p.add_argument("--atol", type=float, default=1e-12, help="tolleranza assoluta (MASTER_results ha 6 decimali)")
+
+    p = sub.add_parser("update", help="nuova release: JSON {date, crude_actual, ...} da file o stringa")
+    p.add_argument("row")
+    p.add_argument("--out", help="append della riga a un JSON-lines")
+
+    args = ap.parse_args()
+
+    if args.cmd == "init":
+        rows, src = _history_rows(args)
+        st = bootstrap(rows, args.window, args.layout)
+        st.save(args.state)
+        logging.info(f"✅ Stato da {src}: {len(rows)} release, ultima {st.last_date} → {args.state}")
+        return
+
+    if args.cmd == "check":
+        bad = check(args.csv, args.layout, atol=args.atol)
+        if bad:
+            for c, idx in bad.items():
+                logging.error(f"❌ {c}: {len(idx)} righe diverse (prima: {idx[0]})")
+            raise SystemExit(1)
+        logging.info(f"✅ {args.csv}: feature incrementali = colonne batch (dopo {max(VOL_WINDOWS)} righe di warm-up)")
+        return
+
+    t0 = time.perf_counter()
+    st = FeatureState.load(args.state)
+    row = json.load(open(args.row)) if os.path.exists(args.row) else json.loads(args.row)
+    try:
+        feats, backfill = st.update(row)
+    except ValueError as e:
+        logging.error(f"❌ {e}")
+        return
+    st.save(args.state)
+    ms = (time.perf_counter() - t0) * 1000.0
+    logging.info(f"⚡ {feats['date']}: eia_score={feats['eia_score']:+.3f} ({ms:.2f} ms)")
+    for d, b in backfill.items():
+        if "future_return_5d" in b:
+            logging.info(f"↩️  backfill {d}: future_return_5d={b['future_return_5d']:+.4f} target={b['target']}")
+    if args.out:
+        with open(args.out, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"features": feats, "backfill": backfill}) + "\n")
+    print(json.dumps(feats))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@
 import pandas as pd
 import os
 
+from colstore import ColumnStore, DEFAULT_ROOT
+from feature_cache import FeatureCache, file_hash
+
 import logging
 logging.basicConfig(level=logging.INFO, format="[V30 PREP] %(message)s")
 
@@ -13,48 +16,63 @@ def trova_colonna_date(df):
             return cols_norm[p]
     raise Exception("❌ ERRORE: nessuna colonna data trovata nel dataset!")
 
-def main():
-    # Base: dataset_v29 già creato dalla pipeline V29
-    src_path = "data_v29/dataset_v29.csv"
-    out_dir = "data_v30"
-    os.makedirs(out_dir, exist_ok=True)
-    out_raw = os.path.join(out_dir, "data_v30_raw.csv")
-    out_final = os.path.join(out_dir, "dataset_v30.csv")
-
-    if not os.path.exists(src_path):
-        logging.error(f"File sorgente mancante: {src_path} → esegui prima V29.")
-        return
-
-    logging.info(f"Carico dataset base: {src_path}")
-    df = pd.read_csv(src_path)
-
+def etichetta(df, horizon=5):
+    df = df.copy()
     # Normalizza nomi colonne
     df.columns = [c.strip().lower() for c in df.columns]
 
-    col_date = trova_colonna_date(df)
+    trova_colonna_date(df)
     if "close" not in df.columns:
         raise Exception("❌ ERRORE: nel dataset_v29 non esiste la colonna 'close' richiesta per v30.")
 
-    # NO LEAKAGE: futuro rendimento 5 giorni
+    # NO LEAKAGE: futuro rendimento a `horizon` giorni
     # Rendimento tra prezzo di oggi e prezzo tra 5 giorni
-    df["future_return_5d"] = (df["close"].shift(-5) / df["close"] - 1.0)
+    df["future_return_5d"] = (df["close"].shift(-horizon) / df["close"] - 1.0)
 
     # Target binario: long se rendimento futuro > 0
     df["target"] = (df["future_return_5d"] > 0).astype(int)
+    return df
 
-    # Salva grezzo (prima del dropna) per analisi
-    df.to_csv(out_raw, index=False)
-    logging.info(f"📁 File grezzo salvato → {out_raw}")
-
+def pulisci(df):
     # Pulisci NaN (ffill + bfill)
     df_final = df.copy()
     df_final = df_final.fillna(method="ffill").fillna(method="bfill")
 
     # Elimina prime / ultime righe dove future_return_5d non è definito
-    df_final = df_final.dropna(subset=["future_return_5d", "target"])
+    return df_final.dropna(subset=["future_return_5d", "target"])
+
+def main():
+    # Base: dataset_v29 già creato dalla pipeline V29 (store colonnare, fallback CSV)
+    src_path = "data_v29/dataset_v29.csv"
+    store = ColumnStore(DEFAULT_ROOT)
+
+    # ref della sorgente: versione nello store, o path + hash del contenuto per il CSV
+    if store.has("dataset_v29"):
+        src_ref = store.ref("dataset_v29")
+    elif os.path.exists(src_path):
+        src_ref = f"{src_path}#{file_hash(src_path)[:16]}"
+    else:
+        logging.error(f"Sorgente mancante: dataset_v29 non è nello store né in {src_path} → esegui prima V29.")
+        return
+
+    # rigenera solo se la sorgente è cambiata (lineage)
+    if store.has("dataset_v30") and store.has("data_v30_raw") and store.info("data_v30_raw")["parents"] == [src_ref]:
+        logging.info(f"dataset_v30 già aggiornato su {src_ref} → niente da fare")
+        return
+    logging.info(f"Carico dataset base: {src_ref}")
+    df = store.read_frame("dataset_v29") if store.has("dataset_v29") else pd.read_csv(src_path)
+
+    # Label e pulizia memoizzate sull'hash dei dati sorgente: stessi dati → niente ricalcolo
+    cache = FeatureCache()
+    df, h_raw = cache.run("v30_labels", etichetta, df, horizon=5)
+
+    # Salva grezzo (prima del dropna) per analisi
+    store.write_frame("data_v30_raw", df, parents=[src_ref], note="prepare_dataset_v30")
+
+    df_final, _ = cache.run("v30_clean", pulisci, df, input_hash=h_raw)
 
-    df_final.to_csv(out_final, index=False)
-    logging.info(f"✅ Dataset finale creato → {out_final}")
+    store.write_frame("dataset_v30", df_final, base="data_v30_raw", note="ffill/bfill + dropna")
+    logging.info(f"✅ Dataset finale creato → {store.ref('dataset_v30')} (export CSV: colstore.py export dataset_v30 ...)")
     logging.info(f"📊 Righe finali: {len(df_final)}")
 
 if __name__ == "__main__":
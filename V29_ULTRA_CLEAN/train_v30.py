@@ -6,9 +6,13 @@ from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, roc_auc_score
 import joblib
+import json
 import os
 import logging
 
+from colstore import ColumnStore, DEFAULT_ROOT, read_columns
+from feature_cache import FeatureCache
+
 logging.basicConfig(level=logging.INFO, format="[V30 TRAIN] %(message)s")
 
 def trova_colonna_date(df):
@@ -19,30 +23,44 @@ def trova_colonna_date(df):
             return cols_norm[p]
     raise Exception("❌ ERRORE: nessuna colonna data trovata nei dati!")
 
+def prepara_xy(df, features):
+    X = df[features].copy()
+
+    # Gestione NaN
+    X = X.replace([np.inf, -np.inf], np.nan)
+    X = X.fillna(method="ffill").fillna(method="bfill")
+    X["target"] = df["target"].astype(int)
+    return X
+
 def main():
     data_path = "data_v30/dataset_v30.csv"
-    if not os.path.exists(data_path):
+    store = ColumnStore(DEFAULT_ROOT)
+
+    # Features = tutte tranne data, target e future_return_5d
+    # (dallo store si leggono solo le colonne che servono; CSV come fallback)
+    if store.has("dataset_v30"):
+        all_cols = store.columns("dataset_v30")
+    elif os.path.exists(data_path):
+        all_cols = [c.strip().lower() for c in pd.read_csv(data_path, nrows=0).columns]
+    else:
         logging.error("❌ dataset_v30 mancante → esegui prima prepare_dataset_v30.py")
         return
 
-    df = pd.read_csv(data_path)
-    df.columns = [c.strip().lower() for c in df.columns]
+    col_date = trova_colonna_date(pd.DataFrame(columns=all_cols))
 
-    col_date = trova_colonna_date(df)
-
-    if "target" not in df.columns:
+    if "target" not in all_cols:
         raise Exception("❌ ERRORE: nel dataset_v30 non esiste la colonna 'target'!")
 
-    # Features = tutte tranne data, target e future_return_5d
     drop_cols = [col_date, "target", "future_return_5d", "target_return_1d"]
-    features = [c for c in df.columns if c not in drop_cols and not c.startswith("unnamed")]
+    features = [c for c in all_cols if c not in drop_cols and not c.startswith("unnamed")]
 
-    X = df[features].copy()
-    y = df["target"].astype(int)
+    df, ref = read_columns("dataset_v30", [col_date] + features + ["target"], csv_path=data_path)
+    logging.info(f"📂 Dataset: {ref} ({len(df)} righe, {len(features)} features)")
 
-    # Gestione NaN
-    X = X.replace([np.inf, -np.inf], np.nan)
-    X = X.fillna(method="ffill").fillna(method="bfill")
+    # stesso dataset + stesse feature → X/y dalla cache
+    Xy, _ = FeatureCache().run("v30_xy", prepara_xy, df, features=features)
+    X = Xy[features]
+    y = Xy["target"]
 
     # Train/Test split temporale (no shuffle)
     X_train, X_test, y_train, y_test = train_test_split(
@@ -50,6 +68,8 @@ def main():
     )
 
     logging.info(f"✅ Train size: {len(X_train)}  |  Test size: {len(X_test)}")
+    date_str = lambda i: str(df[col_date].iloc[i])[:10]
+    train_start, train_end = date_str(0), date_str(len(X_train) - 1)
 
     models = {}
 
@@ -106,6 +126,22 @@ def main():
     joblib.dump(rf, os.path.join(out_dir, "model_rf.pkl"))
     joblib.dump(xgb, os.path.join(out_dir, "model_xgb.pkl"))
     joblib.dump(lr, os.path.join(out_dir, "model_lr.pkl"))
+
+    # Metadati accanto a ogni .pkl (letti da model_registry.py add in eia_trader)
+    for name, preds in (("rf", preds_rf), ("xgb", preds_xgb), ("lr", preds_lr)):
+        try:
+            auc_m = float(roc_auc_score(y_test, preds))
+        except Exception:
+            auc_m = float("nan")
+        meta = {
+            "features": features,
+            "train_start": train_start,
+            "train_end": train_end,
+            "dataset": ref,
+            "metrics": {"auc": auc_m, "ensemble_auc": float(auc), "ensemble_accuracy": float(acc)},
+        }
+        with open(os.path.join(out_dir, f"model_{name}.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1)
     logging.info(f"💾 Modelli salvati in {out_dir}/")
 
 if __name__ == "__main__":
@@ -0,0 +1,228 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from backtest_vec import equity_frame, run_grid, stats_frame
+from colstore import ColumnStore, DEFAULT_ROOT, read_columns
+
+# Walk-forward V30: fold sull'indice delle date (expanding o rolling), RF / GB / LR allenati
+# per fold in un process pool, backtest della finestra di test con gli stessi parametri di
+# WF_results (SL = vol * k, TP = SL * rr, costi andata+ritorno, rischio fisso per trade).
+#
+# Ogni modello fittato finisce in cache_dir/<modello>_<hash>.pkl, hash di (modello, iperparametri,
+# feature, dati di train del fold): al rerun i fold invariati non vengono riallenati,
+# e aggiungere righe nuove riallena solo i fold che le contengono.
+
+MODELS = {
+    # nome: (classe sklearn, iperparametri) — gli stessi di train_v30.py
+    "rf": ("sklearn.ensemble.RandomForestClassifier",
+           {"n_estimators": 300, "max_depth": 6, "min_samples_leaf": 3, "random_state": 42}),
+    "xgb": ("sklearn.ensemble.GradientBoostingClassifier", {"random_state": 42}),
+    "lr": ("sklearn.linear_model.LogisticRegression", {"max_iter": 2000}),
+}
+BT_PARAMS = {
+    "vol_window": 20,
+    "vol_k_sl": 1.0,
+    "rr_ratio": 2.0,
+    "risk_per_trade": 0.02,
+    "commission": 0.0005,
+    "slippage": 0.002,
+}
+HORIZON = 5
+DROP_COLS = ["date", "target", "future_return_5d", "target_return_1d"]
+
+
+# ---------------- fold ----------------
+def make_folds(n, n_folds=8, test_size=55, step=None, mode="expanding", train_size=None, gap=HORIZON, min_train=52):
+    """
+    Lista di (train_start, train_end, test_start, test_end) su posizioni di riga (end esclusi).
+    Le finestre di test finiscono all'ultima riga e vanno indietro di `step` (default test_size:
+    finestre disgiunte). `gap` righe tra train e test: il target guarda HORIZON righe avanti.
+    Senza `step`, se n_folds finestre disgiunte non entrano nelle righe il passo viene ridotto
+    (finestre di test sovrapposte); se non entra neanche così è un errore.
+    """
+    if mode not in ("expanding", "rolling"):
+        raise ValueError(f"mode {mode!r}: attesi expanding / rolling")
+    # righe disponibili per le finestre di test: il primo fold ha bisogno di min_train + gap prima
+    avail = n - gap - min_train
+    if test_size > avail:
+        raise ValueError(f"test_size {test_size} troppo grande: con {n} righe ne restano {max(avail, 0)} per il test")
+    if step is None:
+        step = test_size
+        if n_folds > 1 and (n_folds - 1) * step + test_size > avail:
+            step = (avail - test_size) // (n_folds - 1)
+            if step < 1:
+                raise ValueError(f"{n_folds} fold da {test_size} righe non entrano in {n} righe")
+            logging.warning(f"⚠️ {n_folds} fold da {test_size} righe non entrano in {n} righe: "
+                            f"passo ridotto a {step} (finestre di test sovrapposte)")
+    folds = []
+    for k in range(n_folds):
+        te_end = n - (n_folds - 1 - k) * step
+        te_start = te_end - test_size
+        tr_end = te_start - gap
+        tr_start = 0 if mode == "expanding" else max(0, tr_end - (train_size or min_train))
+        if te_start < 0 or tr_end - tr_start < min_train:
+            continue
+        folds.append((tr_start, tr_end, te_start, te_end))
+    if len(folds) < n_folds:
+        logging.warning(f"⚠️ solo {len(folds)}/{n_folds} fold validi con {n} righe e passo {step}")
+    return folds
+
+
+def fold_xy(X, a, b, c, d):
+    """
+    Train [a, b) e test [c, d) del fold con i NaN riempiti senza look-ahead: ffill dalla storia
+    del fold, bfill solo dentro il train, 0 per quello che resta.
+    """
+    w = X.iloc[a:d].ffill()
+    tr = w.iloc[: b - a].bfill().fillna(0.0)
+    te = w.iloc[c - a:].fillna(0.0)
+    return tr.to_numpy(dtype=np.float64), te.to_numpy(dtype=np.float64)
+
+
+# ---------------- cache ----------------
+def model_key(name, cls, params, features, X, y):
+    import sklearn
+    h = hashlib.sha256()
+    h.update(json.dumps([name, cls, params, features, sklearn.__version__], sort_keys=True).encode())
+    h.update(np.ascontiguousarray(X, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(y, dtype=np.int64).tobytes())
+    return h.hexdigest()[:24]
+
+
+def _fit(cls, params, X, y, features, path):
+    """Worker del pool: fit + dump atomico in cache. Un solo thread per modello (il parallelismo è il pool)."""
+    import importlib
+    import joblib
+    mod, _, cname = cls.rpartition(".")
+    est = getattr(importlib.import_module(mod), cname)
+    p = dict(params)
+    if "n_jobs" in est().get_params():
+        p["n_jobs"] = 1
+    m = est(**p)
+    m.fit(pd.DataFrame(X, columns=features), y)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(m, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+# ---------------- main ----------------
+def load_dataset(data_path):
+    store = ColumnStore(DEFAULT_ROOT)
+    if store.has("dataset_v30"):
+        all_cols = store.columns("dataset_v30")
+    elif os.path.exists(data_path):
+        all_cols = [c.strip().lower() for c in pd.read_csv(data_path, nrows=0).columns]
+    else:
+        return None, None, None
+    features = [c for c in all_cols if c not in DROP_COLS and not c.startswith("unnamed")]
+    need = ["date"] + features + ["target", "future_return_5d"]
+    need += [c for c in ("close", "return_1d") if c not in need]
+    df, ref = read_columns("dataset_v30", need, csv_path=data_path)
+    df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+    df = df.sort_values("date").reset_index(drop=True)
+    return df, features, ref
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="[WF] %(message)s")
+    ap = argparse.ArgumentParser(description="Walk-forward V30 (fold expanding/rolling, modelli in parallelo)")
+    ap.add_argument("--data", default="data_v30/dataset_v30.csv")
+    ap.add_argument("--mode", choices=["expanding", "rolling"], default="expanding")
+    ap.add_argument("--n-folds", type=int, default=8)
+    ap.add_argument("--test-size", type=int, default=55, help="righe per finestra di test")
+    ap.add_argument("--step", type=int, help="passo tra finestre (default = test-size, ridotto se i fold non entrano)")
+    ap.add_argument("--train-size", type=int, help="righe di train in modalità rolling")
+    ap.add_argument("--gap", type=int, default=HORIZON)
+    ap.add_argument("--models", default="rf,xgb,lr")
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--cache-dir", default="wf_cache")
+    ap.add_argument("--out-dir", default="WF_results")
+    args = ap.parse_args()
+
+    df, features, ref = load_dataset(args.data)
+    if df is None:
+        logging.error("❌ dataset_v30 mancante → esegui prima prepare_dataset_v30.py")
+        return
+    names = [m.strip() for m in args.models.split(",") if m.strip()]
+    for m in names:
+        if m not in MODELS:
+            raise SystemExit(f"❌ modello sconosciuto: {m} (disponibili: {', '.join(MODELS)})")
+
+    # NaN riempiti per fold (fold_xy): un ffill/bfill sull'intera serie porterebbe valori futuri nel train
+    X = df[features].replace([np.inf, -np.inf], np.nan)
+    y = df["target"].astype(int).to_numpy()
+    df["ret_1d"] = df["return_1d"]
+
+    try:
+        folds = make_folds(len(df), args.n_folds, args.test_size, args.step, args.mode, args.train_size, args.gap)
+    except ValueError as e:
+        logging.error(f"❌ {e}")
+        return
+    if not folds:
+        logging.error(f"❌ nessun fold valido con {len(df)} righe")
+        return
+    logging.info(f"📂 Dataset: {ref} ({len(df)} righe, {len(features)} features) → {len(folds)} fold {args.mode}")
+
+    # ---------- fit (solo quello che manca in cache) ----------
+    os.makedirs(args.cache_dir, exist_ok=True)
+    paths = {}
+    test_x = {}
+    todo = []
+    for i, (a, b, c, d) in enumerate(folds):
+        Xtr, test_x[i] = fold_xy(X, a, b, c, d)
+        for m in names:
+            cls, params = MODELS[m]
+            key = model_key(m, cls, params, features, Xtr, y[a:b])
+            path = os.path.join(args.cache_dir, f"{m}_{key}.pkl")
+            paths[(i, m)] = path
+            if not os.path.exists(path):
+                todo.append((cls, params, Xtr, y[a:b], features, path))
+    logging.info(f"💾 Cache: {len(paths) - len(todo)}/{len(paths)} modelli già fittati, {len(todo)} da allenare")
+    if todo:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futs = [pool.submit(_fit, *t) for t in todo]
+            for n, f in enumerate(as_completed(futs), 1):
+                f.result()
+                logging.info(f"🌲 {n}/{len(todo)} modelli allenati")
+
+    # ---------- predict + backtest per fase ----------
+    import joblib
+    grid = pd.DataFrame([BT_PARAMS])
+    fr = df["future_return_5d"].to_numpy()
+    ret = df["ret_1d"].to_numpy()
+    signal = np.zeros(len(df))
+    equities, stats = [], []
+    for i, (a, b, c, d) in enumerate(folds):
+        Xt = pd.DataFrame(test_x[i], columns=features)
+        probs = [joblib.load(paths[(i, m)]).predict_proba(Xt)[:, 1] for m in names]
+        signal[c:d] = np.mean(probs, axis=0) > 0.5
+        # vol sull'intera serie: la prima riga di ogni fase ha già la sua finestra
+        res = run_grid(signal, fr, ret, grid, start=c, end=d)
+        eq = equity_frame(df, res, 0, start=c, end=d)
+        eq["phase"] = i + 1
+        sf = stats_frame(grid, res)
+        st = sf.iloc[0]
+        equities.append(eq)
+        stats.append(sf)
+        logging.info(
+            f"📈 Fase {i + 1}: train {df['date'].iloc[a]}→{df['date'].iloc[b - 1]} | "
+            f"test {df['date'].iloc[c]}→{df['date'].iloc[d - 1]} | "
+            f"ret {st.total_return * 100:+.2f}% dd {st.max_dd:.2f}% sharpe {st.sharpe:.2f}"
+        )
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    pd.concat(equities, ignore_index=True).to_csv(os.path.join(args.out_dir, "walkforward_equity.csv"), index=False)
+    pd.concat(stats, ignore_index=True).to_csv(os.path.join(args.out_dir, "walkforward_stats.csv"), index=False)
+    logging.info(f"✅ Salvati walkforward_equity.csv / walkforward_stats.csv in {args.out_dir}/")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+import argparse
+
+from bench.cases import build_cases
+from bench.harness import HEADER, run_cases, save, load, compare
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Hot-path benchmarks on synthetic FakeMarketFeed quotes (fixed SimClock)")
+    ap.add_argument("--config", default="config.yaml")
+    ap.add_argument("--cases", default=None, help="comma-separated substrings of case names (default: all)")
+    ap.add_argument("--n", type=int, default=None, help="calls per case (default: per-case n)")
+    ap.add_argument("--save", default=None, help="write results as a JSON baseline")
+    ap.add_argument("--compare", default=None, help="baseline JSON to compare against; exit 1 on regressions")
+    ap.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown vs baseline")
+    ap.add_argument("--floor-us", type=float, default=1.0, help="p50 differences below this never count as regressions")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per case; the one with the median p50 is kept")
+    ap.add_argument("--list", action="store_true")
+    args = ap.parse_args()
+
+    cases, env = build_cases(args.config)
+    try:
+        if args.cases:
+            keys = [k.strip() for k in args.cases.split(",") if k.strip()]
+            cases = [c for c in cases if any(k in c.name for k in keys)]
+        if args.list:
+            for c in cases:
+                print(f"  {c.name:<28} n={c.n:<7} {c.note}")
+            return
+
+        print(HEADER)
+        results = run_cases(cases, n=args.n, repeat=args.repeat)
+
+        if args.save:
+            save(args.save, results)
+            print(f"Baseline saved: {args.save}")
+        if args.compare:
+            print(f"\nvs {args.compare} (p50 threshold +{args.threshold:.0%} and +{args.floor_us:g} us):")
+            bad = compare(results, load(args.compare), threshold=args.threshold, floor_us=args.floor_us)
+            if bad:
+                raise SystemExit(f"{len(bad)} regression(s): {', '.join(bad)}")
+            print("No regressions.")
+    finally:
+        env.tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
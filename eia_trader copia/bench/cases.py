@@ -0,0 +1,231 @@
+from __future__ import annotations
+import json
+import tempfile
+from pathlib import Path
+from typing import Any
+
+from bench.harness import Case, SkipCase
+from data.fake_market import FakeMarketFeed
+from engine.bus import SharedBus, Quote, DEFAULT_CONTROLS
+from engine.clock import SimClock
+from engine.config import Config, load_config
+from engine.engine import TradingEngine
+from engine.execution import PaperBroker
+from engine.strategy import label_from_score
+
+# Reproducible inputs: FakeMarketFeed under a SimClock starting at T0, one quote every DT
+# seconds, plus a fixed price impulse so the armed cases walk the gates and take trades.
+
+T0 = 1_700_000_000.0
+DT = 0.25
+
+
+def synthetic_quotes(cfg: Config, n: int, impulse_every: int = 2000, impulse_len: int = 100) -> list[Quote]:
+    clk = SimClock(T0)
+    feed = FakeMarketFeed(cfg, clock=clk)
+    tick = cfg.engine.tick_size
+    out = []
+    for i in range(n):
+        clk.advance(DT)
+        q = feed.next_quote()
+        k = i % impulse_every if impulse_every else impulse_len
+        if k < impulse_len:
+            bump = round(2 * tick * k, 6)
+            q = Quote(q.ts, round(q.last + bump, 6), round(q.bid + bump, 6), round(q.ask + bump, 6), q.spread_ticks)
+        out.append(q)
+    return out
+
+
+class _Env:
+    """Config with logs in a temp dir and no journal (the bench measures the engine, not the disk)."""
+
+    def __init__(self, config_path: str):
+        self.tmp = tempfile.TemporaryDirectory(prefix="eia_bench_")
+        self.base = load_config(config_path).override({
+            "engine.log_path": str(Path(self.tmp.name) / "engine.log"),
+            "engine.journal_path": None,
+        })
+        self.config_path = config_path
+
+    def cfg(self, **overrides: Any) -> Config:
+        return self.base.override(overrides) if overrides else self.base
+
+
+def _engine(cfg: Config, controls: dict[str, Any]) -> tuple[TradingEngine, SharedBus, SimClock]:
+    clk = SimClock(T0)
+    bus = SharedBus()
+    eng = TradingEngine(cfg, bus, clock=clk)
+    ctl = dict(DEFAULT_CONTROLS)
+    ctl.update(controls)
+    bus.set_controls(ctl)
+    return eng, bus, clk
+
+
+def _tick_case(env: _Env, controls: dict[str, Any], **overrides: Any):
+    def setup(calls: int):
+        cfg = env.cfg(**overrides)
+        quotes = synthetic_quotes(cfg, calls)
+        eng, bus, clk = _engine(cfg, controls)
+        it = iter(quotes)
+
+        def step():
+            q = next(it)
+            clk.set(q.ts)
+            bus.set_quote(q)
+            eng.tick()
+
+        return step, eng.close
+    return setup
+
+
+# trade never exits on its own: the in-trade case stays in the management branch
+_HOLD = {
+    "fail_fast_sec": 1e9, "no_follow_sec": 1e9, "trail_min_ticks": 10_000,
+    "trail_min_ticks_tight": 10_000, "hold_max_min": 1e6, "breakeven_after_ticks": 10_000,
+}
+
+
+def _in_trade(env: _Env):
+    def setup(calls: int):
+        cfg = env.cfg(**_HOLD)
+        quotes = synthetic_quotes(cfg, calls + 1, impulse_every=0)
+        eng, bus, clk = _engine(cfg, {"arm": True, "score": 2.5, "event_active": True})
+        clk.set(quotes[0].ts)
+        eng.broker.enter("LONG", 1, quotes[0])
+        it = iter(quotes[1:])
+
+        def step():
+            q = next(it)
+            clk.set(q.ts)
+            bus.set_quote(q)
+            eng.tick()
+
+        return step, eng.close
+    return setup
+
+
+def _publish_snapshot(env: _Env):
+    def setup(calls: int):
+        cfg = env.cfg()
+        eng, bus, clk = _engine(cfg, {"arm": True})
+        q = synthetic_quotes(cfg, 1)[0]
+        clk.set(q.ts)
+        eng.broker.enter("LONG", 1, q)
+
+        def step():
+            eng._publish_snapshot(q, "SIGNIF", 1.5, True, True, False, False)
+
+        return step, eng.close
+    return setup
+
+
+def _mark_unrealized(env: _Env):
+    def setup(calls: int):
+        cfg = env.cfg()
+        clk = SimClock(T0)
+        broker = PaperBroker(cfg.engine.tick_size, clock=clk)
+        quotes = synthetic_quotes(cfg, 1024, impulse_every=0)
+        broker.enter("LONG", 1, quotes[0])
+        state = {"i": 0}
+
+        def step():
+            i = state["i"] = (state["i"] + 1) & 1023
+            broker.mark_unrealized(quotes[i])
+
+        return step
+    return setup
+
+
+def _label(env: _Env):
+    def setup(calls: int):
+        ev = env.cfg().event
+        scores = [(-3.0 + 6.0 * i / 255) for i in range(256)]
+        state = {"i": 0}
+
+        def step():
+            i = state["i"] = (state["i"] + 1) & 255
+            label_from_score(scores[i], ev.neutral_z, ev.signif_z, ev.shock_z)
+
+        return step
+    return setup
+
+
+def _ui_bridge(env: _Env):
+    """json fallback: engine writes ui_snapshot.json + reads ui_state.json once per loop."""
+    def setup(calls: int):
+        from engine import ui_bridge
+
+        cfg = env.cfg()
+        eng, bus, clk = _engine(cfg, {"arm": True})
+        q = synthetic_quotes(cfg, 1)[0]
+        clk.set(q.ts)
+        eng._publish_snapshot(q, "SIGNIF", 1.5, True, True, False, False)
+        snap = bus.get_snapshot()
+
+        d = Path(env.tmp.name)
+        old = ui_bridge.STATE_FILE, ui_bridge.SNAP_FILE
+        ui_bridge.STATE_FILE, ui_bridge.SNAP_FILE = d / "ui_state.json", d / "ui_snapshot.json"
+        ui_bridge.STATE_FILE.write_text(json.dumps({**DEFAULT_CONTROLS, "arm": True, "score": 2.5}), encoding="utf-8")
+
+        def step():
+            ui_bridge.write_snapshot(snap)
+            ui_bridge.read_controls(DEFAULT_CONTROLS)
+
+        def cleanup():
+            ui_bridge.STATE_FILE, ui_bridge.SNAP_FILE = old
+            eng.close()
+
+        return step, cleanup
+    return setup
+
+
+def _scoring_models(env: _Env) -> dict[str, str]:
+    base = Path(env.config_path).resolve().parent
+    models = dict(env.cfg().section("scoring").get("models") or {})
+    paths = {k: str((base / p).resolve()) for k, p in models.items() if str(p).endswith(".pkl")}
+    missing = [p for p in paths.values() if not Path(p).exists()]
+    if not paths or missing:
+        raise SkipCase(f"model files not found ({', '.join(missing) or 'scoring.models empty'})")
+    return paths
+
+
+def _features(scorer, seed: int = 0) -> dict[str, float]:
+    import random
+    rng = random.Random(seed)
+    return {c: rng.gauss(0.0, 1.0) for c in scorer.features}
+
+
+def _predict(env: _Env, compiled: bool):
+    def setup(calls: int):
+        try:
+            from engine.scoring import EnsembleScorer
+            scorer = EnsembleScorer.load(_scoring_models(env))
+        except ImportError as e:
+            raise SkipCase(f"missing dependency: {e.name}")
+        if compiled:
+            from engine.tree_kernel import compile_model
+            scorer = EnsembleScorer({k: compile_model(m) for k, m in scorer.models.items()})
+        feats = _features(scorer)
+
+        def step():
+            scorer.predict(feats)
+
+        return step
+    return setup
+
+
+def build_cases(config_path: str = "config.yaml") -> tuple[list[Case], _Env]:
+    env = _Env(config_path)
+    armed = {"arm": True, "score": 2.5, "event_active": True}
+    cases = [
+        Case("engine.tick idle", _tick_case(env, {"arm": False}), note="ARM off: first gate"),
+        Case("engine.tick armed", _tick_case(env, armed), note="event on: range, gates, entries, exits"),
+        Case("engine.tick in_trade", _in_trade(env), note="position open, management branch"),
+        Case("engine._publish_snapshot", _publish_snapshot(env)),
+        Case("broker.mark_unrealized", _mark_unrealized(env), n=50_000),
+        Case("label_from_score", _label(env), n=50_000),
+        Case("ui_bridge json round-trip", _ui_bridge(env), n=2_000, note="write_snapshot + read_controls"),
+        Case("scoring.predict sklearn", _predict(env, compiled=False), n=500, note="scoring.models .pkl"),
+        Case("scoring.predict kernel", _predict(env, compiled=True), n=5_000, note="same models, TreeKernel"),
+    ]
+    return cases, env
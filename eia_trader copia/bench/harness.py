@@ -0,0 +1,208 @@
+from __future__ import annotations
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable
+
+# Timing + allocation harness: each case is a zero-arg callable timed one call at a time
+# (perf_counter_ns, GC off) so we get the latency distribution, not only the mean.
+# Allocations come from a separate, shorter pass under tracemalloc (it slows calls ~10x).
+
+FORMAT = 1
+
+
+@dataclass
+class BenchResult:
+    name: str
+    n: int
+    mean_us: float
+    p50_us: float
+    p90_us: float
+    p99_us: float
+    max_us: float
+    ops_per_sec: float
+    alloc_bytes: float = 0.0     # peak bytes allocated inside one call (transient + kept)
+    retained_bytes: float = 0.0  # bytes still allocated after the call (leak / growth per call)
+    note: str = ""
+
+
+WARMUP = 200
+ALLOC_N = 1000
+LEAK_B = 16.0  # kept bytes per call that count as growth (tracemalloc noise is ~1 B)
+
+
+@dataclass
+class Case:
+    name: str
+    # setup(calls) -> fn, or (fn, cleanup); fresh state per case, `calls` = every fn() it will see
+    setup: Callable[[int], Any]
+    n: int = 20_000
+    note: str = ""
+
+
+def _pct(sorted_ns: list[int], p: float) -> float:
+    i = min(len(sorted_ns) - 1, max(0, int(round(p / 100.0 * (len(sorted_ns) - 1)))))
+    return sorted_ns[i] / 1000.0
+
+
+def measure(name: str, fn: Callable[[], Any], n: int, warmup: int = WARMUP, alloc_n: int = ALLOC_N, note: str = "") -> BenchResult:
+    for _ in range(warmup):
+        fn()
+
+    clock = time.perf_counter_ns
+    times = [0] * n
+    gc_was = gc.isenabled()
+    gc.disable()
+    try:
+        t_start = clock()
+        for i in range(n):
+            t0 = clock()
+            fn()
+            times[i] = clock() - t0
+        wall = (clock() - t_start) / 1e9
+    finally:
+        if gc_was:
+            gc.enable()
+    times.sort()
+
+    alloc, kept = _allocations(fn, min(alloc_n, n))
+    return BenchResult(
+        name=name,
+        n=n,
+        mean_us=sum(times) / n / 1000.0,
+        p50_us=_pct(times, 50),
+        p90_us=_pct(times, 90),
+        p99_us=_pct(times, 99),
+        max_us=times[-1] / 1000.0,
+        ops_per_sec=n / wall if wall > 0 else 0.0,
+        alloc_bytes=alloc,
+        retained_bytes=kept,
+        note=note,
+    )
+
+
+def _allocations(fn: Callable[[], Any], n: int) -> tuple[float, float]:
+    if n <= 0:
+        return 0.0, 0.0
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        peak_sum = 0
+        cur0 = tracemalloc.get_traced_memory()[0]
+        for _ in range(n):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            fn()
+            peak_sum += tracemalloc.get_traced_memory()[1] - before
+        kept = tracemalloc.get_traced_memory()[0] - cur0
+    finally:
+        if started:
+            tracemalloc.stop()
+    return peak_sum / n, kept / n
+
+
+def run_cases(cases: list[Case], n: int | None = None, repeat: int = 1, log=print) -> list[BenchResult]:
+    """`repeat` > 1: fresh setup + measure per run, the run with the median p50 is kept."""
+    out = []
+    for c in cases:
+        calls = n or c.n
+        runs = []
+        try:
+            for _ in range(max(1, repeat)):
+                runs.append(_run_once(c, calls))
+        except SkipCase as e:
+            log(f"  {c.name:<28} skipped: {e}")
+            continue
+        runs.sort(key=lambda r: r.p50_us)
+        r = runs[(len(runs) - 1) // 2]
+        out.append(r)
+        log(format_row(r))
+    return out
+
+
+def _run_once(c: Case, calls: int) -> BenchResult:
+    fn = c.setup(WARMUP + calls + min(ALLOC_N, calls))
+    cleanup = None
+    if isinstance(fn, tuple):
+        fn, cleanup = fn
+    try:
+        return measure(c.name, fn, calls, note=c.note)
+    finally:
+        if cleanup is not None:
+            cleanup()
+
+
+class SkipCase(Exception):
+    """Raised by a case setup when its inputs are not available here (e.g. no sklearn)."""
+
+
+# ---------------- report / baselines ----------------
+HEADER = f"  {'case':<28} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} {'max us':>9} {'ops/s':>11} {'alloc B':>9} {'kept B':>7}"
+
+
+def format_row(r: BenchResult) -> str:
+    return (f"  {r.name:<28} {r.p50_us:9.2f} {r.p90_us:9.2f} {r.p99_us:9.2f} {r.max_us:9.1f} "
+            f"{r.ops_per_sec:11,.0f} {r.alloc_bytes:9.0f} {r.retained_bytes:7.1f}")
+
+
+def env_info() -> dict[str, Any]:
+    info = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    try:
+        import numpy
+        info["numpy"] = numpy.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def save(path: str | Path, results: list[BenchResult]):
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    doc = {"format": FORMAT, "env": env_info(), "results": {r.name: asdict(r) for r in results}}
+    p.write_text(json.dumps(doc, indent=1), encoding="utf-8")
+
+
+def load(path: str | Path) -> dict[str, Any]:
+    doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    if doc.get("format") != FORMAT:
+        raise ValueError(f"bench: baseline format {doc.get('format')} (expected {FORMAT})")
+    return doc
+
+
+def compare(results: list[BenchResult], baseline: dict[str, Any], threshold: float = 0.25,
+            floor_us: float = 1.0, log=print) -> list[str]:
+    """
+    Ratios vs the baseline; a case regresses when p50 is more than `threshold` slower and
+    also more than `floor_us` slower in absolute terms, or it now keeps more than LEAK_B
+    bytes per call where it kept none. p99 is reported, not gated: one run's tail is mostly scheduler noise.
+    Returns the regressed case names.
+    """
+    base = baseline["results"]
+    log(f"  {'case':<28} {'p50':>14} {'p99':>14} {'ops/s':>9} {'alloc B':>14}")
+    bad = []
+    for r in results:
+        b = base.get(r.name)
+        if b is None:
+            log(f"  {r.name:<28} (new case, no baseline)")
+            continue
+        r50 = r.p50_us / b["p50_us"] if b["p50_us"] else 1.0
+        rops = r.ops_per_sec / b["ops_per_sec"] if b["ops_per_sec"] else 1.0
+        leak = r.retained_bytes > LEAK_B and b.get("retained_bytes", 0.0) <= LEAK_B
+        slow = r50 > 1 + threshold and r.p50_us - b["p50_us"] > floor_us
+        flag = slow or leak
+        if flag:
+            bad.append(r.name)
+        log(f"  {r.name:<28} {b['p50_us']:6.2f}->{r.p50_us:6.2f} {b['p99_us']:6.2f}->{r.p99_us:6.2f} "
+            f"{rops:8.2f}x {b.get('alloc_bytes', 0):6.0f}->{r.alloc_bytes:6.0f}  {'REGRESSION' if flag else ''}")
+    return bad
@@ -0,0 +1,64 @@
+from __future__ import annotations
+import argparse
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from engine.tree_kernel import TreeKernel, compile_model, sample_inputs
+
+
+def _best_ms(fn, X, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Compile trained sklearn models (.pkl) into flat .npz kernels")
+    ap.add_argument("models", nargs="+", help="joblib .pkl files (RF / GradientBoosting / LogisticRegression)")
+    ap.add_argument("--out-dir", default="models_compiled")
+    ap.add_argument("--bench", action="store_true", help="compare with predict_proba at batch 1 / 100 / 10k")
+    ap.add_argument("--tol", type=float, default=1e-9)
+    args = ap.parse_args()
+
+    import joblib
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for p in args.models:
+        m = joblib.load(p)
+        k = compile_model(m)
+        out = out_dir / (Path(p).stem + ".npz")
+        k.save(out, source=p, sklearn_type=type(m).__name__)
+        k = TreeKernel.load(out)
+        print(f"{p} -> {out}  kind={k.kind} trees={k.n_trees} nodes={0 if k.feature is None else len(k.feature)} depth={k.depth}")
+
+        # same numbers as sklearn (float32 split semantics included)
+        X = sample_inputs(k, 10_000)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            ref = m.predict_proba(X)[:, 1]
+            err = float(np.abs(k.predict_proba1(X) - ref).max())
+            status = "OK" if err <= args.tol else "MISMATCH"
+            print(f"  max |p - sklearn| = {err:.2e}  {status}")
+            if status != "OK":
+                raise SystemExit(1)
+
+            if args.bench:
+                if hasattr(m, "n_jobs"):
+                    m.n_jobs = 1
+                for n in (1, 100, 10_000):
+                    Xb = X[:n]
+                    rep = 50 if n < 10_000 else 5
+                    t_sk = _best_ms(m.predict_proba, Xb, rep)
+                    t_k = _best_ms(k.predict_proba, Xb, rep)
+                    print(f"  batch {n:>6}: sklearn {t_sk:9.3f} ms   kernel {t_k:9.3f} ms   x{t_sk / t_k:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+from __future__ import annotations
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+
+from data.recorder import COLUMNS, NAMES, is_recording, iter_chunks
+from data.replay_feed import load_quotes_csv
+
+# Release windows over a multi-year tick archive, without reading the archive into RAM.
+#
+# TickArchive: a directory of flat little-endian column files (ts.f8, last.f8, bid.f8, ask.f8,
+#   spread_ticks.i4), rows sorted by ts, opened as np.memmap. Row i of every column is at byte
+#   i * itemsize, so a window is a pair of row offsets. meta.json keeps, per source file, how many
+#   of its rows are committed: adding a file again appends only what is new in it.
+# EventIndex: for each release (EIA dataset `date` + 10:30 New York), the [start, stop) rows of
+#   the window, found with one searchsorted on the ts column. gather() turns every window into
+#   one (events x max_len) array with a single fancy-index read, so only the pages of the windows
+#   are touched.
+
+FORMAT = 2
+META = "meta.json"
+RELEASE_AT = "10:30"
+RELEASE_TZ = "America/New_York"
+
+
+# ---------------- release times ----------------
+def load_release_dates(path: str | Path, column: str = "date") -> list[str]:
+    """Release dates (YYYY-MM-DD) from the EIA dataset (MASTER_results.csv, dataset_v29.csv, ...)."""
+    with Path(path).open("r", encoding="utf-8", newline="") as f:
+        rows = csv.DictReader(f)
+        if column not in (rows.fieldnames or []):
+            raise ValueError(f"event_index: {path} has no '{column}' column")
+        return [r[column][:10] for r in rows if r[column]]
+
+
+def release_times(dates: Iterable[str], at: str = RELEASE_AT, tz: str = RELEASE_TZ) -> np.ndarray:
+    """Epoch seconds of `at` (local time in `tz`, DST included) on each date."""
+    from zoneinfo import ZoneInfo
+
+    zone = ZoneInfo(tz)
+    hh, mm = (int(x) for x in at.split(":"))
+    out = []
+    for d in dates:
+        y, m, dd = (int(x) for x in str(d)[:10].split("-"))
+        out.append(datetime(y, m, dd, hh, mm, tzinfo=zone).timestamp())
+    return np.asarray(out, dtype=np.float64)
+
+
+# ---------------- archive ----------------
+class TickArchive:
+    """Append-only, time-sorted column files; meta.json holds the committed row count."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.meta = self._read_meta()
+        self._cols: dict[str, np.memmap] = {}
+
+    def _read_meta(self) -> dict[str, Any]:
+        p = self.root / META
+        if not p.exists():
+            return {"format": FORMAT, "rows": 0, "ts_first": None, "ts_last": None,
+                    "columns": {name: dt for name, _, dt in COLUMNS}, "sources": {}}
+        m = json.loads(p.read_text(encoding="utf-8"))
+        if m.get("format") != FORMAT:
+            raise ValueError(f"event_index: archive format {m.get('format')} (expected {FORMAT})")
+        return m
+
+    def _write_meta(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / (META + ".tmp")
+        tmp.write_text(json.dumps(self.meta, indent=1), encoding="utf-8")
+        os.replace(tmp, self.root / META)
+
+    def __len__(self) -> int:
+        return int(self.meta["rows"])
+
+    def _file(self, name: str) -> Path:
+        dt = np.dtype(self.meta["columns"][name])
+        return self.root / f"{name}.{dt.kind}{dt.itemsize}"
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only memmap of the committed rows (bytes appended after the last commit are ignored)."""
+        m = self._cols.get(name)
+        if m is None or len(m) != len(self):
+            if len(self) == 0:
+                return np.empty(0, dtype=self.meta["columns"][name])
+            m = np.memmap(self._file(name), dtype=self.meta["columns"][name], mode="r", shape=(len(self),))
+            self._cols[name] = m
+        return m
+
+    # ---------------- build ----------------
+    def append(self, cols: dict[str, np.ndarray], source: str = "") -> int:
+        """
+        Append one batch (sorted here); rows sharing the archive's last ts are kept. A batch that
+        starts before the last ts raises ValueError. `source` counts the rows toward that file
+        (see add_file). Returns the rows written.
+        """
+        ts = np.asarray(cols["ts"], dtype=np.float64)
+        order = np.argsort(ts, kind="stable")
+        if len(order) == 0:
+            return 0
+        last = self.meta["ts_last"]
+        if last is not None and ts[order[0]] < last:
+            raise ValueError(f"event_index: {source or 'batch'} starts at {ts[order[0]]:.3f}, "
+                             f"before the archive's last tick {last:.3f} (add files in time order)")
+        n0 = len(self)
+        self.root.mkdir(parents=True, exist_ok=True)
+        for name in NAMES:
+            f = self._file(name)
+            a = np.asarray(cols[name], dtype=self.meta["columns"][name])[order]
+            with f.open("r+b" if f.exists() else "wb") as fh:
+                # truncate anything past the committed rows (a crashed append) before writing
+                fh.truncate(n0 * a.itemsize)
+                fh.seek(n0 * a.itemsize)
+                fh.write(a.tobytes())
+        self.meta["rows"] = n0 + len(order)
+        if self.meta["ts_first"] is None:
+            self.meta["ts_first"] = float(ts[order[0]])
+        self.meta["ts_last"] = float(ts[order[-1]])
+        if source:
+            self.meta["sources"][source] = self.meta["sources"].get(source, 0) + len(order)
+        self._write_meta()
+        return len(order)
+
+    def add_file(self, path: str | Path) -> int:
+        """
+        A quote recording (chunk by chunk, never whole in memory) or a ts,last,bid,ask,spread_ticks CSV.
+        Rows of this file already committed are skipped, so re-adding it (or a recording that has
+        grown since) appends only the new rows.
+        """
+        p = Path(path)
+        src = str(p.resolve())
+        done = int(self.meta["sources"].get(src, 0))
+        if is_recording(p):
+            chunks = iter_chunks(p)
+        else:
+            qs = load_quotes_csv(p)
+            chunks = [{name: np.array([getattr(q, name) for q in qs]) for name in NAMES}] if qs else []
+        n = seen = 0
+        for c in chunks:
+            k = len(c["ts"])
+            lo = min(k, max(0, done - seen))
+            seen += k
+            if lo < k:
+                n += self.append({name: np.asarray(c[name])[lo:] for name in NAMES}, source=src)
+        return n
+
+
+# ---------------- event index ----------------
+class EventIndex:
+    """Row range of every release window in a TickArchive (byte offset = row * itemsize)."""
+
+    def __init__(self, release_ts: np.ndarray, starts: np.ndarray, stops: np.ndarray,
+                 before: float, after: float, labels: list[str] | None = None):
+        self.release_ts = np.asarray(release_ts, dtype=np.float64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.stops = np.asarray(stops, dtype=np.int64)
+        self.before = float(before)
+        self.after = float(after)
+        self.labels = list(labels) if labels is not None else [str(t) for t in self.release_ts]
+
+    @classmethod
+    def build(cls, archive: TickArchive, release_ts: np.ndarray, before: float = 60.0, after: float = 600.0,
+              labels: list[str] | None = None) -> "EventIndex":
+        ts = archive.column("ts")
+        rel = np.asarray(release_ts, dtype=np.float64)
+        starts = np.searchsorted(ts, rel - before, side="left")
+        stops = np.searchsorted(ts, rel + after, side="right")
+        return cls(rel, starts, stops, before, after, labels)
+
+    def __len__(self) -> int:
+        return len(self.release_ts)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return self.stops - self.starts
+
+    def byte_offsets(self, itemsize: int = 8) -> tuple[np.ndarray, np.ndarray]:
+        """[start, stop) byte offsets of each window in a column file of this itemsize."""
+        return self.starts * itemsize, self.stops * itemsize
+
+    def covered(self) -> np.ndarray:
+        """Releases with at least one tick in the window."""
+        return self.lengths > 0
+
+    # ---------------- persistence ----------------
+    def save(self, path: str | Path):
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(p, release_ts=self.release_ts, starts=self.starts, stops=self.stops,
+                 window=np.array([self.before, self.after]), labels=np.array(self.labels))
+
+    @classmethod
+    def load(cls, path: str | Path) -> "EventIndex":
+        z = np.load(path)
+        before, after = (float(x) for x in z["window"])
+        return cls(z["release_ts"], z["starts"], z["stops"], before, after, [str(x) for x in z["labels"]])
+
+    # ---------------- gather ----------------
+    def gather(self, archive: TickArchive, columns: Iterable[str] = NAMES, max_len: int | None = None,
+               fill: float = np.nan) -> dict[str, np.ndarray]:
+        """
+        Padded (events x L) arrays, one per column, plus `t_rel` (ts - release) and `mask`.
+        L = longest window (or max_len: windows are cut at the end). Integer columns pad with 0.
+        """
+        n = np.minimum(self.lengths, max_len) if max_len is not None else self.lengths
+        width = int(n.max()) if len(n) else 0
+        j = np.arange(width, dtype=np.int64)
+        mask = j[None, :] < n[:, None]
+        rows = np.where(mask, self.starts[:, None] + j[None, :], 0)
+        out: dict[str, np.ndarray] = {"mask": mask, "lengths": n}
+        for name in columns:
+            col = archive.column(name)
+            vals = np.asarray(col[rows]) if len(col) else np.zeros(rows.shape, dtype=col.dtype)
+            vals[~mask] = fill if vals.dtype.kind == "f" else 0
+            out[name] = vals
+        if "ts" in out:
+            out["t_rel"] = np.where(mask, out["ts"] - self.release_ts[:, None], np.nan)
+        return out
+
+    def gather_ragged(self, archive: TickArchive, columns: Iterable[str] = NAMES) -> tuple[dict[str, np.ndarray], np.ndarray]:
+        """Concatenated windows + offsets (events+1): window e is values[offsets[e]:offsets[e+1]]."""
+        n = self.lengths
+        offsets = np.zeros(len(n) + 1, dtype=np.int64)
+        np.cumsum(n, out=offsets[1:])
+        rows = np.repeat(self.starts - offsets[:-1], n) + np.arange(offsets[-1], dtype=np.int64)
+        out = {name: np.asarray(archive.column(name)[rows]) for name in columns}
+        if "ts" in out:
+            out["t_rel"] = out["ts"] - np.repeat(self.release_ts, n)
+        return out, offsets
+
+
+# ---------------- CLI ----------------
+def main():
+    ap = argparse.ArgumentParser(description="Tick archive + release-window index")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("add", help="append recordings / tick CSVs to an archive")
+    p.add_argument("archive")
+    p.add_argument("files", nargs="+")
+
+    p = sub.add_parser("index", help="window row offsets for every release in the EIA dataset")
+    p.add_argument("archive")
+    p.add_argument("--dates", default="../V29_ULTRA_CLEAN/MASTER_results.csv")
+    p.add_argument("--column", default="date")
+    p.add_argument("--at", default=RELEASE_AT, help="release time, local to --tz")
+    p.add_argument("--tz", default=RELEASE_TZ)
+    p.add_argument("--before", type=float, default=60.0)
+    p.add_argument("--after", type=float, default=600.0)
+    p.add_argument("--out", default=None, help="default: <archive>/events_<before>_<after>.npz")
+    args = ap.parse_args()
+
+    arc = TickArchive(args.archive)
+    if args.cmd == "add":
+        for f in sorted(args.files):
+            t0 = time.perf_counter()
+            try:
+                n = arc.add_file(f)
+            except ValueError as e:
+                raise SystemExit(str(e))
+            print(f"{f}: +{n} rows ({time.perf_counter() - t0:.1f}s)")
+        print(f"{args.archive}: {len(arc)} rows")
+        return
+
+    dates = load_release_dates(args.dates, args.column)
+    t0 = time.perf_counter()
+    ev = EventIndex.build(arc, release_times(dates, args.at, args.tz), args.before, args.after, labels=dates)
+    ms = (time.perf_counter() - t0) * 1000
+    out = args.out or str(Path(args.archive) / f"events_{args.before:g}_{args.after:g}.npz")
+    ev.save(out)
+    cov = ev.covered()
+    print(f"{len(ev)} releases, {int(cov.sum())} with ticks, {int(ev.lengths.sum())} rows in windows "
+          f"(longest {int(ev.lengths.max()) if len(ev) else 0}) -> {out} ({ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,30 @@
 from __future__ import annotations
-import time
 import math
+from decimal import Decimal
 from engine.bus import Quote
+from engine.clock import Clock, WALL_CLOCK
+from engine.config import Config
 
 
 class FakeMarketFeed:
     """Deterministic-ish fake quotes for wiring/testing."""
 
-    def __init__(self, cfg: dict):
-        self.tick = float(cfg["engine"]["tick_size"])
-        self.t0 = time.time()
-        self.last = 75.00
+    def __init__(self, cfg: Config, clock: Clock | None = None, base_price: float = 75.0):
+        self.clock = clock or WALL_CLOCK
+        self.tick = cfg.engine.tick_size
+        self.t0 = self.clock.time()
+        self.base = float(base_price)
+        self.last = self.base
+        # price decimals implied by the tick (0.01 -> 2, 0.0001 -> 4)
+        self._dec = max(0, -Decimal(str(self.tick)).normalize().as_tuple().exponent)
 
     def next_quote(self) -> Quote:
-        t = time.time() - self.t0
-        # smooth drift + wiggle
-        self.last = 75.0 + 0.25 * math.sin(t / 7.0) + 0.10 * math.sin(t / 1.5)
-        bid = round(self.last - 0.01, 2)
-        ask = round(self.last + 0.01, 2)
+        now = self.clock.time()
+        t = now - self.t0
+        # smooth drift + wiggle (amplitudes scale with the price level)
+        k = self.base / 75.0
+        self.last = self.base + k * (0.25 * math.sin(t / 7.0) + 0.10 * math.sin(t / 1.5))
+        bid = round(self.last - self.tick, self._dec)
+        ask = round(self.last + self.tick, self._dec)
         spread_ticks = int(round((ask - bid) / self.tick))
-        return Quote(ts=time.time(), last=round(self.last, 2), bid=bid, ask=ask, spread_ticks=spread_ticks)
+        return Quote(ts=now, last=round(self.last, self._dec), bid=bid, ask=ask, spread_ticks=spread_ticks)
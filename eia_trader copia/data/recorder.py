@@ -0,0 +1,380 @@
+from __future__ import annotations
+import argparse
+import mmap
+import queue
+import struct
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from engine.bus import SharedBus, Quote
+
+# Quote recorder: one file per session (local day, strftime path), compressed column chunks.
+#
+# <file>      16-byte header, then chunks: CHUNK header + one zlib stream per column.
+#             Columns are fixed-width little-endian (ts/last/bid/ask f8, spread_ticks i4),
+#             byte-shuffled before compression (byte k of every value together: ~3x smaller).
+# <file>.idx  one INDEX record per chunk (ts range, offset, rows): np.memmap + searchsorted
+#             picks the chunks of a window, only those are decompressed.
+#
+# The bus listener only appends to in-memory arrays; compression and disk writes happen on a
+# writer thread (RecorderSink, one per process can serve every symbol), so a release burst
+# never waits on zlib.
+
+MAGIC = b"EIAQ"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")    # magic, version, n columns, t0 (epoch ms, informational)
+CHUNK = struct.Struct("<4sIdd5I")   # b"CHNK", rows, ts first, ts last, compressed bytes per column
+INDEX = struct.Struct("<ddQI")      # ts first, ts last, chunk offset, rows
+CHUNK_MAGIC = b"CHNK"
+COLUMNS = (("ts", "d", "<f8"), ("last", "d", "<f8"), ("bid", "d", "<f8"), ("ask", "d", "<f8"), ("spread_ticks", "i", "<i4"))
+NAMES = tuple(c[0] for c in COLUMNS)
+
+
+def _shuffle(raw: bytes, width: int) -> bytes:
+    return b"".join(raw[i::width] for i in range(width))
+
+
+def _next_midnight(ts: float) -> float:
+    d = datetime.fromtimestamp(ts).date() + timedelta(days=1)
+    return datetime(d.year, d.month, d.day).timestamp()
+
+
+class RecorderSink:
+    """
+    Writer thread for one or more QuoteRecorders: compresses chunks and appends them to their
+    session file. Files stay open until their recorder rolls past them or closes.
+    After a write error (disk full, permissions) the sink is `failed`: the error is logged and
+    every later chunk is dropped instead of piling up in the queue.
+    """
+
+    def __init__(self, level: int = 6, log=None):
+        self.level = int(level)
+        self.log = log  # Logger-like (.error); None -> print
+        self.failed: str | None = None
+        self.dropped = 0  # chunks not written since the failure
+        self._jobs: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="quote-recorder", daemon=True)
+        self._writer.start()
+        self._closed = False
+
+    def put(self, path: Path, cols: list[array]):
+        if self.failed is not None:
+            self.dropped += 1
+            return
+        self._jobs.put((path, cols))
+
+    def release(self, path: Path):
+        """Close `path` once the chunks queued before this call are written."""
+        self._jobs.put((path, None))
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._jobs.put(None)
+        self._writer.join()
+
+    def _write_loop(self):
+        files: dict[Path, tuple[Any, Any]] = {}
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            path, cols = job
+            if cols is None:
+                fi = files.pop(path, None)
+                if fi is not None:
+                    fi[0].close()
+                    fi[1].close()
+                continue
+            if self.failed is not None:
+                self.dropped += 1  # queued before the failure
+                continue
+            try:
+                self._write_chunk(files, path, cols)
+            except (OSError, ValueError) as e:
+                self._fail(f"{path}: {e!r}")
+        for f, idx in files.values():
+            try:
+                f.close()
+                idx.close()
+            except OSError:
+                pass
+
+    def _write_chunk(self, files: dict[Path, tuple[Any, Any]], path: Path, cols: list[array]):
+        fi = files.get(path)
+        if fi is None:
+            fi = files[path] = _open_session(path)
+        f, idx = fi
+        ts = cols[0]
+        blobs = [zlib.compress(_shuffle(a.tobytes(), a.itemsize), self.level) for a in cols]
+        off = f.tell()
+        f.write(CHUNK.pack(CHUNK_MAGIC, len(ts), ts[0], ts[-1], *(len(b) for b in blobs)))
+        for b in blobs:
+            f.write(b)
+        f.flush()
+        # index entry only once its chunk is on disk: a crash never indexes a partial chunk
+        idx.write(INDEX.pack(min(ts), max(ts), off, len(ts)))
+        idx.flush()
+
+    def _fail(self, err: str):
+        self.failed = err
+        msg = f"Quote recorder failed, recording stopped: {err}"
+        if self.log is not None:
+            self.log.error(msg)
+        else:
+            print(msg)
+
+
+class QuoteRecorder:
+    """
+    Appends every quote to the session file of its (local) day. path: strftime template
+    (e.g. ticks/quotes_%Y%m%d.bin). A chunk is cut every chunk_rows quotes or flush_sec seconds.
+    `sink`: a RecorderSink shared with other recorders (EngineHost); by default the recorder
+    starts its own (write errors go to `log`).
+    """
+
+    def __init__(self, path: str, chunk_rows: int = 4096, flush_sec: float = 5.0, level: int = 6,
+                 sink: RecorderSink | None = None, log=None):
+        self.template = path
+        self.chunk_rows = int(chunk_rows)
+        self.flush_sec = float(flush_sec)
+        self.n_quotes = 0
+        self.path: Path | None = None
+        self._cols = [array(c[1]) for c in COLUMNS]
+        self._roll_at = float("-inf")
+        self._last_flush = time.monotonic()
+        self._own_sink = sink is None
+        self.sink = sink if sink is not None else RecorderSink(level, log)
+        self._closed = False
+
+    # ---------------- tap ----------------
+    def attach(self, bus: SharedBus):
+        """Record every quote written to `bus` (runs in the feed's thread)."""
+        bus.subscribe("quote", self.append)
+
+    def append(self, q: Quote):
+        ts = q.ts
+        if ts >= self._roll_at:
+            self._roll(ts)
+        c = self._cols
+        c[0].append(ts)
+        c[1].append(q.last)
+        c[2].append(q.bid)
+        c[3].append(q.ask)
+        c[4].append(q.spread_ticks)
+        self.n_quotes += 1
+        if len(c[0]) >= self.chunk_rows or time.monotonic() - self._last_flush >= self.flush_sec:
+            self.flush()
+
+    def _roll(self, ts: float):
+        self.flush()
+        old = self.path
+        self.path = Path(datetime.fromtimestamp(ts).strftime(self.template))
+        self._roll_at = _next_midnight(ts)
+        if old is not None and old != self.path:
+            self.sink.release(old)
+
+    def flush(self):
+        """Cut the pending quotes into a chunk (written by the writer thread)."""
+        self._last_flush = time.monotonic()
+        if not self._cols[0] or self.path is None:
+            return
+        cols, self._cols = self._cols, [array(c[1]) for c in COLUMNS]
+        self.sink.put(self.path, cols)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        if self._own_sink:
+            self.sink.close()
+        elif self.path is not None:
+            self.sink.release(self.path)
+
+
+def _open_session(path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    new = not path.exists() or path.stat().st_size == 0
+    f = path.open("ab")
+    if new:
+        f.write(HEADER.pack(MAGIC, VERSION, len(COLUMNS), int(time.time() * 1000)))
+    else:
+        _check_header(path)
+    return f, _index_path(path).open("ab")
+
+
+# ---------------- readers ----------------
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def _check_header(path: Path) -> None:
+    with path.open("rb") as f:
+        magic, version, ncols, _ = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or ncols != len(COLUMNS):
+        raise ValueError(f"{path}: not a quote recording")
+    if version != VERSION:
+        raise ValueError(f"{path}: recording version {version}, expected {VERSION}")
+
+
+def is_recording(path: str | Path) -> bool:
+    try:
+        with Path(path).open("rb") as f:
+            return f.read(4) == MAGIC
+    except OSError:
+        return False
+
+
+def _index_dtype():
+    import numpy as np
+    return np.dtype({"names": ["ts_first", "ts_last", "offset", "rows"], "formats": ["<f8", "<f8", "<u8", "<u4"],
+                     "offsets": [0, 8, 16, 24], "itemsize": INDEX.size})
+
+
+def _scan_chunks(mm, size: int) -> list[tuple[float, float, int, int]]:
+    """Rebuild the index from the chunk headers (missing/stale .idx); stops at a truncated chunk."""
+    out = []
+    off = HEADER.size
+    while off + CHUNK.size <= size:
+        magic, n, t_first, t_last, *lens = CHUNK.unpack_from(mm, off)
+        end = off + CHUNK.size + sum(lens)
+        if magic != CHUNK_MAGIC or end > size:
+            break
+        out.append((min(t_first, t_last), max(t_first, t_last), off, n))
+        off = end
+    return out
+
+
+def load_index(path: str | Path):
+    """
+    Chunk index as a structured array: memmap of <file>.idx when its last chunk ends the file,
+    else rebuilt from the chunk headers (crash between chunk and index write, file being written).
+    """
+    import numpy as np
+
+    p = Path(path)
+    _check_header(p)
+    dtype = _index_dtype()
+    ip = _index_path(p)
+    size = p.stat().st_size
+    if ip.exists() and ip.stat().st_size >= INDEX.size:
+        n = ip.stat().st_size // INDEX.size
+        idx = np.memmap(ip, dtype=dtype, mode="r", shape=(n,))
+        last = idx[-1]
+        with p.open("rb") as f:
+            f.seek(int(last["offset"]))
+            head = f.read(CHUNK.size)
+        if len(head) == CHUNK.size:
+            lens = CHUNK.unpack(head)[4:]
+            if head[:4] == CHUNK_MAGIC and int(last["offset"]) + CHUNK.size + sum(lens) == size:
+                return idx
+    with p.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        rows = _scan_chunks(mm, size)
+    return np.array(rows, dtype=dtype)
+
+
+def _decode(mm, off: int) -> list:
+    import numpy as np
+
+    _, n, _, _, *lens = CHUNK.unpack_from(mm, off)
+    pos = off + CHUNK.size
+    out = []
+    view = memoryview(mm)
+    try:
+        for (_, _, dt), ln in zip(COLUMNS, lens):
+            w = np.dtype(dt).itemsize
+            raw = zlib.decompress(view[pos:pos + ln])
+            out.append(np.frombuffer(raw, dtype=np.uint8).reshape(w, n).T.copy().view(dt).reshape(n))
+            pos += ln
+    finally:
+        view.release()
+    return out
+
+
+def iter_chunks(path: str | Path):
+    """Every chunk of a recording in file order, as {column: array} (one chunk in memory at a time)."""
+    p = Path(path)
+    offsets = [int(o) for o in load_index(p)["offset"]]
+    if not offsets:
+        return
+    with p.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for off in offsets:
+            yield dict(zip(NAMES, _decode(mm, off)))
+
+
+def load_window(path: str | Path, t0: float, t1: float) -> dict[str, Any]:
+    """Columns (NumPy arrays) of the quotes with t0 <= ts <= t1; decodes only the chunks that overlap."""
+    import numpy as np
+
+    p = Path(path)
+    idx = load_index(p)
+    empty = {name: np.empty(0, dtype=dt) for name, _, dt in COLUMNS}
+    if len(idx) == 0:
+        return empty
+    # chunks are in time order: first chunk whose end >= t0 .. last whose start <= t1
+    lo = int(np.searchsorted(np.maximum.accumulate(idx["ts_last"]), t0, side="left"))
+    hi = int(np.searchsorted(idx["ts_first"], t1, side="right"))
+    sel = [int(o) for o in idx["offset"][lo:hi]]
+    if not sel:
+        return empty
+    with p.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        parts = [_decode(mm, off) for off in sel]
+    cols = [np.concatenate([pt[i] for pt in parts]) for i in range(len(COLUMNS))]
+    keep = (cols[0] >= t0) & (cols[0] <= t1)
+    return {name: c[keep] for name, c in zip(NAMES, cols)}
+
+
+def load_around(path: str | Path, ts: float, before_sec: float = 300.0, after_sec: float = 300.0) -> dict[str, Any]:
+    """The 10-minute (default) window around a release."""
+    return load_window(path, ts - before_sec, ts + after_sec)
+
+
+def to_quotes(cols: dict[str, Any]) -> list[Quote]:
+    """Window columns -> Quote objects for ReplayFeed / run_replay."""
+    return [
+        Quote(ts=float(t), last=float(l), bid=float(b), ask=float(a), spread_ticks=int(s))
+        for t, l, b, a, s in zip(*(cols[n].tolist() for n in NAMES))
+    ]
+
+
+# ---------------- CLI ----------------
+def main():
+    ap = argparse.ArgumentParser(description="Inspect / export quote recordings")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("info")
+    p.add_argument("path")
+    p = sub.add_parser("export", help="window -> CSV (ts,last,bid,ask,spread_ticks) for replay.py / sweeps")
+    p.add_argument("path")
+    p.add_argument("out")
+    p.add_argument("--at", type=float, required=True, help="release epoch ts")
+    p.add_argument("--before", type=float, default=300.0)
+    p.add_argument("--after", type=float, default=300.0)
+    args = ap.parse_args()
+
+    if args.cmd == "info":
+        idx = load_index(args.path)
+        size = Path(args.path).stat().st_size
+        rows = int(idx["rows"].sum()) if len(idx) else 0
+        print(f"{args.path}: {rows} quotes in {len(idx)} chunks, {size / 1e3:.0f} KB ({size / max(rows, 1):.1f} B/quote)")
+        if len(idx):
+            t0, t1 = float(idx["ts_first"].min()), float(idx["ts_last"].max())
+            print(f"  {datetime.fromtimestamp(t0):%Y-%m-%d %H:%M:%S} .. {datetime.fromtimestamp(t1):%H:%M:%S}")
+    else:
+        import numpy  # noqa: F401  (import outside the timing)
+        from data.replay_feed import save_quotes_csv
+        t0 = time.perf_counter()
+        cols = load_around(args.path, args.at, args.before, args.after)
+        ms = (time.perf_counter() - t0) * 1000
+        save_quotes_csv(args.out, to_quotes(cols))
+        print(f"{len(cols['ts'])} quotes -> {args.out} (window loaded in {ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
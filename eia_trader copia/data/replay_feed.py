@@ -0,0 +1,48 @@
+from __future__ import annotations
+import csv
+from pathlib import Path
+
+from engine.bus import Quote
+
+QUOTE_FIELDS = ("ts", "last", "bid", "ask", "spread_ticks")
+
+
+def load_quotes_csv(path: str | Path) -> list[Quote]:
+    """Recorded quotes, one per row: ts,last,bid,ask,spread_ticks (ts = epoch seconds)."""
+    out: list[Quote] = []
+    with Path(path).open("r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            out.append(Quote(
+                ts=float(row["ts"]),
+                last=float(row["last"]),
+                bid=float(row["bid"]),
+                ask=float(row["ask"]),
+                spread_ticks=int(row["spread_ticks"]),
+            ))
+    out.sort(key=lambda q: q.ts)
+    return out
+
+
+def save_quotes_csv(path: str | Path, quotes: list[Quote]) -> None:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(QUOTE_FIELDS)
+        for q in quotes:
+            w.writerow((repr(q.ts), q.last, q.bid, q.ask, q.spread_ticks))
+
+
+class ReplayFeed:
+    """Same next_quote() interface as FakeMarketFeed, over a recorded stream (None at the end)."""
+
+    def __init__(self, quotes: list[Quote]):
+        self.quotes = quotes
+        self.i = 0
+
+    def next_quote(self) -> Quote | None:
+        if self.i >= len(self.quotes):
+            return None
+        q = self.quotes[self.i]
+        self.i += 1
+        return q
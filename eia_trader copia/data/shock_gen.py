@@ -0,0 +1,312 @@
+from __future__ import annotations
+import argparse
+import os
+import time
+from dataclasses import dataclass, fields
+from decimal import Decimal
+from typing import Any
+
+import numpy as np
+
+from engine.bus import SharedBus, Quote
+from engine.clock import Clock, WALL_CLOCK
+from engine.config import Config
+
+# Synthetic EIA releases for stress tests, generated in one NumPy batch (scenarios x steps).
+#
+# Each scenario: `pre_sec` of quiet random walk, the release at t=0, then `post_sec` of:
+# - jump: ticks ~ jump_ticks_per_z * z (lognormal size noise), part of it in the first second,
+#   the rest as follow-through over follow_sec
+# - volatility regime: random-walk vol x (1 + vol_per_z*|z|*noise), decaying with vol_halflife_sec
+# - spread: widens a few seconds before the release and blows out after it (spread_per_z*|z|)
+# - fake spikes: with p_fake the jump reverses (reversal_frac of it) a few seconds later
+# Prices are kept as int32 ticks from the base price; float columns are built on request.
+
+T0 = 1704295800.0  # 2024-01-03 10:30 New York: scenario e is released at T0 + e days
+
+
+@dataclass(frozen=True, slots=True)
+class ShockParams:
+    dt: float = 0.25
+    pre_sec: float = 60.0
+    post_sec: float = 600.0
+    z_sd: float = 1.5                 # surprise z ~ N(0, z_sd) when not given
+    vol_ticks: float = 0.6            # random walk, ticks per sqrt(second)
+    jump_ticks_per_z: float = 8.0
+    jump_noise: float = 0.4           # lognormal sigma of the jump size
+    jump_fast_frac: tuple[float, float] = (0.2, 0.6)
+    jump_fast_sec: float = 0.5
+    follow_sec: tuple[float, float] = (5.0, 30.0)
+    vol_per_z: float = 1.5
+    vol_halflife_sec: float = 120.0
+    spread_ticks: int = 1
+    spread_per_z: float = 1.5
+    spread_halflife_sec: float = 4.0
+    pre_widen_sec: float = 5.0
+    pre_widen_ticks: float = 1.0
+    p_fake: float = 0.3
+    reversal_after_sec: tuple[float, float] = (2.0, 15.0)
+    reversal_sec: tuple[float, float] = (2.0, 10.0)
+    reversal_frac: tuple[float, float] = (0.6, 1.4)
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any] | None) -> "ShockParams":
+        known = {f.name: f for f in fields(cls)}
+        d = {k: v for k, v in (d or {}).items() if k not in ("enabled", "seed")}
+        unknown = sorted(set(d) - set(known))
+        if unknown:
+            raise ValueError(f"shock: unknown key(s): {', '.join(unknown)}")
+        out = {k: (tuple(float(x) for x in v) if isinstance(v, (list, tuple)) else v) for k, v in d.items()}
+        return cls(**out)
+
+    @property
+    def pre_n(self) -> int:
+        return int(round(self.pre_sec / self.dt))
+
+    @property
+    def steps(self) -> int:
+        return self.pre_n + int(round(self.post_sec / self.dt))
+
+
+@dataclass
+class ShockBatch:
+    """E scenarios x N steps. Row j of scenario e is at release_ts[e] + t_rel[j]."""
+    tick_size: float
+    base_price: float
+    release_ts: np.ndarray     # (E,)
+    t_rel: np.ndarray          # (N,) seconds from the release
+    z: np.ndarray              # (E,) surprise z-score (= the score to replay with)
+    jump_ticks: np.ndarray     # (E,)
+    vol_mult: np.ndarray       # (E,)
+    fake: np.ndarray           # (E,) bool
+    bid_t: np.ndarray          # (E, N) int32 ticks from the base price
+    ask_t: np.ndarray
+    last_t: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.z)
+
+    @property
+    def _dec(self) -> int:
+        return max(0, -Decimal(str(self.tick_size)).normalize().as_tuple().exponent)
+
+    def _px(self, t: np.ndarray) -> np.ndarray:
+        return np.round((round(self.base_price / self.tick_size) + t) * self.tick_size, self._dec)
+
+    def arrays(self) -> dict[str, np.ndarray]:
+        """(E, N) float64 columns ts,last,bid,ask + int spread_ticks (the replay_feed column names)."""
+        return {
+            "ts": self.release_ts[:, None] + self.t_rel[None, :],
+            "last": self._px(self.last_t),
+            "bid": self._px(self.bid_t),
+            "ask": self._px(self.ask_t),
+            "spread_ticks": self.ask_t - self.bid_t,
+        }
+
+    def columns(self, e: int) -> dict[str, np.ndarray]:
+        return {
+            "ts": self.release_ts[e] + self.t_rel,
+            "last": self._px(self.last_t[e]),
+            "bid": self._px(self.bid_t[e]),
+            "ask": self._px(self.ask_t[e]),
+            "spread_ticks": self.ask_t[e] - self.bid_t[e],
+        }
+
+    def quotes(self, e: int) -> list[Quote]:
+        c = self.columns(e)
+        return [Quote(*row) for row in zip(c["ts"].tolist(), c["last"].tolist(), c["bid"].tolist(),
+                                           c["ask"].tolist(), c["spread_ticks"].tolist())]
+
+    def event(self, e: int) -> tuple[list[Quote], float, float]:
+        """(quotes, score, event_at), the event tuple of engine.sweep.run_sweep."""
+        return self.quotes(e), float(self.z[e]), float(self.release_ts[e])
+
+    def flat(self) -> tuple[dict[str, np.ndarray], np.ndarray]:
+        """All scenarios back to back (time-sorted) + offsets (E+1), as EventIndex.gather_ragged."""
+        a = self.arrays()
+        offsets = np.arange(len(self) + 1, dtype=np.int64) * len(self.t_rel)
+        return {k: v.ravel() for k, v in a.items()}, offsets
+
+
+def generate(n: int, params: ShockParams | None = None, z: np.ndarray | float | None = None,
+             seed: int | None = None, tick_size: float = 0.01, base_price: float = 75.0,
+             t0: float = T0) -> ShockBatch:
+    """n scenarios in one vectorized pass. `z`: one surprise per scenario (or a scalar); default ~ N(0, z_sd)."""
+    p = params or ShockParams()
+    rng = np.random.default_rng(seed)
+    N, pre = p.steps, p.pre_n
+    t = (np.arange(N) - pre) * p.dt
+    tp = np.maximum(t, 0.0)
+    post = t >= 0
+
+    z = rng.normal(0.0, p.z_sd, n) if z is None else np.broadcast_to(np.asarray(z, dtype=np.float64), (n,)).copy()
+    az = np.abs(z)
+
+    def u(lo_hi: tuple[float, float]) -> np.ndarray:
+        return rng.uniform(lo_hi[0], lo_hi[1], n)[:, None]
+
+    # jump: fast part (~jump_fast_sec) + linear follow-through
+    jump = np.sign(z) * p.jump_ticks_per_z * az * rng.lognormal(0.0, p.jump_noise, n)
+    fast = u(p.jump_fast_frac)
+    path = jump[:, None] * (fast * (1.0 - np.exp(-tp / p.jump_fast_sec))
+                            + (1.0 - fast) * np.minimum(tp / u(p.follow_sec), 1.0))
+
+    # fake spike: give back reversal_frac of the jump
+    fake = rng.random(n) < p.p_fake
+    rev = np.where(fake, jump, 0.0)[:, None] * u(p.reversal_frac)
+    path -= rev * np.clip((t - u(p.reversal_after_sec)) / u(p.reversal_sec), 0.0, 1.0)
+
+    # volatility regime: random walk anchored at 0 on the release
+    vol_mult = 1.0 + p.vol_per_z * az * rng.lognormal(0.0, 0.5, n)
+    sig = p.vol_ticks * np.sqrt(p.dt) * (1.0 + (vol_mult - 1.0)[:, None] * (np.exp(-tp / p.vol_halflife_sec) * post))
+    walk = np.cumsum(rng.standard_normal((n, N)) * sig, axis=1)
+    walk -= walk[:, pre:pre + 1]
+    mid = walk + path
+
+    # spread: pre-release widening ramp + post-release blow-out, stochastically rounded to ticks
+    widen = p.spread_per_z * az * rng.lognormal(0.0, 0.5, n)
+    pre_ramp = np.clip((t + p.pre_widen_sec) / p.pre_widen_sec, 0.0, 1.0) * (~post) if p.pre_widen_sec > 0 else 0.0
+    spread = p.spread_ticks + p.pre_widen_ticks * pre_ramp + widen[:, None] * (np.exp(-tp / p.spread_halflife_sec) * post)
+    spread = np.maximum(np.floor(spread + rng.random((n, N))), 1).astype(np.int32)
+
+    bid = np.round(mid - spread / 2.0).astype(np.int32)
+    ask = bid + spread
+    # trades print on the ask when the mid ticks up, on the bid otherwise
+    up = np.diff(mid, axis=1, prepend=mid[:, :1]) > 0
+    last = np.where(up, ask, bid)
+
+    return ShockBatch(
+        tick_size=float(tick_size), base_price=float(base_price),
+        release_ts=t0 + 86400.0 * np.arange(n), t_rel=t,
+        z=z, jump_ticks=jump, vol_mult=vol_mult, fake=fake,
+        bid_t=bid, ask_t=ask, last_t=last,
+    )
+
+
+class ShockFeed:
+    """
+    Same next_quote() interface as FakeMarketFeed: generated scenarios played one after the other
+    in clock time (continuous prices across scenarios). With `bus`, the feed also sets score=z +
+    event_active at each release and clears event_active when the scenario ends.
+    """
+
+    def __init__(self, cfg: Config, clock: Clock | None = None, base_price: float = 75.0,
+                 params: ShockParams | None = None, seed: int | None = None, batch: int = 16,
+                 bus: SharedBus | None = None):
+        self.clock = clock or WALL_CLOCK
+        self.params = params or ShockParams()
+        self.tick = cfg.engine.tick_size
+        self.base = float(base_price)
+        self.batch_size = max(1, int(batch))
+        self.bus = bus
+        # price decimals implied by the tick (0.01 -> 2, 0.0001 -> 4)
+        self._dec = max(0, -Decimal(str(self.tick)).normalize().as_tuple().exponent)
+        self._base_t = int(round(self.base / self.tick))
+        self._rng = np.random.default_rng(seed)
+        self._new_batch()
+        self._e = 0
+        self._offset = 0
+        self._start: float | None = None
+        self._released = False
+
+    def _new_batch(self):
+        self.batch = generate(self.batch_size, self.params, seed=int(self._rng.integers(2 ** 63)),
+                              tick_size=self.tick, base_price=self.base)
+        b = self.batch
+        self._rows = (b.last_t.tolist(), b.bid_t.tolist(), b.ask_t.tolist())
+
+    @property
+    def z(self) -> float:
+        return float(self.batch.z[self._e])
+
+    def _next_scenario(self):
+        b = self.batch
+        end = int(b.last_t[self._e, -1])
+        self._e += 1
+        if self._e >= len(b):
+            self._new_batch()
+            self._e = 0
+        self._offset += end - int(self.batch.last_t[self._e, 0])
+        self._released = False
+        if self.bus is not None:
+            self.bus.set_controls({"event_active": False})
+
+    def next_quote(self) -> Quote:
+        now = self.clock.time()
+        if self._start is None:
+            self._start = now
+        p = self.params
+        i = int((now - self._start) / p.dt)
+        while i >= p.steps:
+            self._start += p.steps * p.dt
+            i -= p.steps
+            self._next_scenario()
+        if self.bus is not None and not self._released and i >= p.pre_n:
+            self._released = True
+            self.bus.set_controls({"score": self.z, "event_active": True})
+        last, bid, ask = (r[self._e][i] for r in self._rows)
+        k = self._base_t + self._offset
+        return Quote(ts=now, last=round((k + last) * self.tick, self._dec), bid=round((k + bid) * self.tick, self._dec),
+                     ask=round((k + ask) * self.tick, self._dec), spread_ticks=ask - bid)
+
+
+def shock_feed(cfg: Config, clock: Clock | None = None, base_price: float = 75.0, bus: SharedBus | None = None,
+               seed_offset: int = 0) -> ShockFeed | None:
+    """From the `shock:` config section; None when disabled (the caller keeps FakeMarketFeed)."""
+    sc = cfg.section("shock")
+    if not sc.get("enabled"):
+        return None
+    seed = sc.get("seed")
+    return ShockFeed(cfg, clock=clock, base_price=base_price, params=ShockParams.from_dict(sc),
+                     seed=None if seed is None else int(seed) + seed_offset, bus=bus)
+
+
+# ---------------- CLI ----------------
+def main():
+    from engine.config import load_config
+    from engine.replay import run_replay
+    from engine.sweep import trade_stats
+
+    ap = argparse.ArgumentParser(description="Stress-test the engine on generated EIA release scenarios")
+    ap.add_argument("--config", default="config.yaml")
+    ap.add_argument("--n", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--z", type=float, default=None, help="same surprise for every scenario")
+    ap.add_argument("--export", metavar="CSV", help="write scenario 0 as a tick CSV (replay.py/sweep.yaml) and exit")
+    args = ap.parse_args()
+
+    cfg = load_config(args.config).override({"engine.log_path": os.devnull, "engine.journal_path": None,
+                                             "engine.record_path": None})
+    params = ShockParams.from_dict(cfg.section("shock"))
+    t0 = time.perf_counter()
+    b = generate(args.n, params, z=args.z, seed=args.seed, tick_size=cfg.engine.tick_size)
+    gen_ms = (time.perf_counter() - t0) * 1000
+    if args.export:
+        from data.replay_feed import save_quotes_csv
+        quotes, score, event_at = b.event(0)
+        save_quotes_csv(args.export, quotes)
+        print(f"{len(quotes)} quotes -> {args.export} (score {score:+.2f}, event_at {event_at:.0f}, "
+              f"{'fake' if b.fake[0] else 'real'} spike)")
+        return
+    print(f"{len(b)} scenarios x {len(b.t_rel)} quotes generated in {gen_ms:.0f} ms "
+          f"({int(b.fake.sum())} fake spikes, max spread {int((b.ask_t - b.bid_t).max())}t)")
+
+    pnl = {False: [], True: []}
+    ticks = 0
+    wall = 0.0
+    for e in range(len(b)):
+        quotes, score, event_at = b.event(e)
+        res = run_replay(cfg, quotes, controls={"arm": True, "score": score},
+                         timeline=[(event_at, {"event_active": True})])
+        pnl[bool(b.fake[e])].extend(t.pnl for t in res.trades)
+        ticks += res.n_ticks
+        wall += res.wall_sec
+    for fake, name in ((False, "real"), (True, "fake")):
+        s = trade_stats(pnl[fake])
+        print(f"{name:>5}: trades={s['n_trades']} pnl={s['total_pnl']:+.2f} win%={s['win_rate']:.0f} "
+              f"max_dd={s['max_dd']:.2f}")
+    print(f"replay: {ticks} ticks in {wall:.1f}s ({ticks / wall if wall else 0:,.0f} ticks/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,23 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from threading import Lock
-from typing import Any
+import time
+from dataclasses import dataclass, fields
+from threading import Condition, Lock
+from types import MappingProxyType
+from typing import Any, Callable, Mapping
 
+from engine.metrics import Histogram
 
-@dataclass
+
+DEFAULT_CONTROLS: dict[str, Any] = {
+    "arm": False,
+    "kill": False,
+    "flatten": False,
+    "score": 0.0,
+    "event_active": False,
+}
+
+
+@dataclass(slots=True)
 class Quote:
     ts: float
     last: float
@@ -13,54 +26,223 @@ class Quote:
     spread_ticks: int
 
 
-@dataclass
+@dataclass(slots=True)
 class EngineSnapshot:
-    ts: float
-    state: str
-    position_side: str
-    position_qty: int
-    entry_price: float
-    unrealized_pnl: float
-    realized_pnl: float
-    trades_today: int
-    label: str
-    score: float
-    event_active: bool
-    arm: bool
-    kill: bool
-    flatten: bool
+    """Filled in place by the engine (SharedBus.begin_snapshot); readers get copies."""
+    ts: float = 0.0
+    state: str = "IDLE"
+    position_side: str = "FLAT"
+    position_qty: int = 0
+    entry_price: float = 0.0
+    unrealized_pnl: float = 0.0
+    realized_pnl: float = 0.0
+    trades_today: int = 0
+    label: str = "NEUTRAL"
+    score: float = 0.0
+    event_active: bool = False
+    arm: bool = False
+    kill: bool = False
+    flatten: bool = False
     reject_reason: str = ""
+    # paper fill stats (ticks vs the touch, per fill)
+    avg_slippage_ticks: float = 0.0
+    last_slippage_ticks: float = 0.0
+    commissions: float = 0.0
+    # live scoring: release seen -> score on the bus
+    score_latency_ms: float = 0.0
+    # engine.metrics_in_snapshot: EngineMetrics.to_dict(), refreshed every metrics_every_sec
+    metrics: dict[str, Any] | None = None
+
+    def copy(self) -> "EngineSnapshot":
+        c = EngineSnapshot.__new__(EngineSnapshot)
+        for f in SNAPSHOT_FIELDS:
+            setattr(c, f, getattr(self, f))
+        return c
+
+    def copy_from(self, other: "EngineSnapshot"):
+        for f in SNAPSHOT_FIELDS:
+            setattr(self, f, getattr(other, f))
+
+    def to_dict(self) -> dict[str, Any]:
+        """Shallow (asdict would deep-copy `metrics`)."""
+        return {f: getattr(self, f) for f in SNAPSHOT_FIELDS}
+
+
+SNAPSHOT_FIELDS = tuple(f.name for f in fields(EngineSnapshot))
+
+
+class _Channel:
+    """One bus channel: writers serialize on `lock`; readers use the seqlock `seq` and never lock."""
+
+    __slots__ = ("seq", "value", "lock", "subs", "cond", "waiters")
+
+    def __init__(self, value: Any = None):
+        self.seq = 0          # odd while a write is in progress; version = seq // 2
+        self.value = value
+        self.lock = Lock()
+        self.subs: list[Callable[[Any], None]] = []
+        self.cond = Condition(Lock())
+        self.waiters = 0
 
 
 class SharedBus:
-    """Tiny in-memory shared state between engine and UI."""
+    """
+    In-memory state shared by engine, feed, recorder, scorer and UI: channels quote / controls / snapshot.
+
+    Each channel carries a version that grows by one per write. Writers take a per-channel lock (a quote
+    never waits for a controls write); readers are seqlock reads that never block a writer. Values are
+    swapped, never mutated in place: controls are copied on write into a read-only mapping, so
+    controls_view() hands out the current one without allocating. The snapshot is the exception:
+    one preallocated EngineSnapshot, filled in place between begin_snapshot() and end_snapshot();
+    get_snapshot() returns a copy validated against the seqlock.
+    """
+
+    CHANNELS = ("quote", "controls", "snapshot")
 
     def __init__(self):
-        self._lock = Lock()
-        self._quote: Quote | None = None
-        self._controls: dict[str, Any] = {}
-        self._snapshot: EngineSnapshot | None = None
+        self._ch = {name: _Channel() for name in self.CHANNELS}
+        self._quote = self._ch["quote"]
+        self._controls = self._ch["controls"]
+        self._snapshot = self._ch["snapshot"]
+        self._controls.value = MappingProxyType({})
+        self._snapshot.value = EngineSnapshot()
+        self._listeners: list[Callable[[str], None]] = []
+        # contended writer acquires only (ns): try-acquire first, so an uncontended write costs the same as `with lock`
+        self.lock_wait = Histogram()
+        self._wait_stats = Lock()
 
-    def set_quote(self, quote: Quote):
-        with self._lock:
-            self._quote = quote
+    def _wait(self, lock: Lock):
+        t0 = time.perf_counter_ns()
+        lock.acquire()
+        dt = time.perf_counter_ns() - t0
+        # channels have their own locks: serialize the histogram writes (contended path only)
+        with self._wait_stats:
+            self.lock_wait.record(dt)
 
-    def get_quote(self) -> Quote | None:
-        with self._lock:
-            return self._quote
+    # ---------------- write side ----------------
+    def _begin(self, ch: _Channel):
+        lock = ch.lock
+        if not lock.acquire(False):
+            self._wait(lock)
+        ch.seq += 1  # odd: readers retry
+
+    def _end(self, name: str, ch: _Channel, value: Any):
+        ch.seq += 1
+        ch.lock.release()
+        if ch.waiters:
+            with ch.cond:
+                ch.cond.notify_all()
+        for fn in ch.subs:
+            fn(value)
+        for fn in self._listeners:
+            fn(name)
+
+    def set_quote(self, quote: Quote):
+        ch = self._quote
+        self._begin(ch)
+        ch.value = quote
+        self._end("quote", ch, quote)
 
     def set_controls(self, controls: dict[str, Any]):
-        with self._lock:
-            self._controls.update(controls)
+        """Merge `controls` into the current ones (a new read-only mapping; readers keep the old one)."""
+        ch = self._controls
+        lock = ch.lock
+        if not lock.acquire(False):
+            self._wait(lock)
+        try:
+            merged = MappingProxyType({**ch.value, **controls})
+        except TypeError:
+            lock.release()
+            raise
+        ch.seq += 1
+        ch.value = merged
+        self._end("controls", ch, merged)
 
-    def get_controls(self) -> dict[str, Any]:
-        with self._lock:
-            return dict(self._controls)
+    def begin_snapshot(self) -> EngineSnapshot:
+        """The bus' snapshot, locked for an in-place update; always pair with end_snapshot()."""
+        ch = self._snapshot
+        self._begin(ch)
+        return ch.value
+
+    def end_snapshot(self):
+        ch = self._snapshot
+        self._end("snapshot", ch, ch.value)
 
     def set_snapshot(self, snap: EngineSnapshot):
-        with self._lock:
-            self._snapshot = snap
+        s = self.begin_snapshot()
+        try:
+            s.copy_from(snap)
+        finally:
+            self.end_snapshot()
+
+    # ---------------- read side ----------------
+    @staticmethod
+    def _read(ch: _Channel) -> Any:
+        while True:
+            s = ch.seq
+            v = ch.value
+            if not s & 1 and ch.seq == s:
+                return v
+            time.sleep(0)  # writer between its two increments: let it finish
+
+    def get_quote(self) -> Quote | None:
+        return self._read(self._quote)
+
+    def controls_view(self) -> Mapping[str, Any]:
+        """Current controls, read-only and shared (no copy): valid as-is until the next set_controls."""
+        return self._read(self._controls)
+
+    def get_controls(self) -> dict[str, Any]:
+        """Mutable copy of the current controls."""
+        return self._read(self._controls).copy()
 
     def get_snapshot(self) -> EngineSnapshot | None:
-        with self._lock:
-            return self._snapshot
+        """Copy of the latest snapshot (None before the first one)."""
+        return self.read("snapshot")[1]
+
+    def version(self, channel: str) -> int:
+        """Number of writes to `channel` so far (0 = never written)."""
+        return self._ch[channel].seq >> 1
+
+    def read(self, channel: str) -> tuple[int, Any]:
+        """(version, value), consistent with each other; the snapshot comes back as a copy."""
+        ch = self._ch[channel]
+        copy = ch is self._snapshot
+        while True:
+            s = ch.seq
+            if s & 1:
+                time.sleep(0)
+                continue
+            if copy:
+                v = ch.value.copy() if s else None
+            else:
+                v = ch.value
+            if ch.seq == s:
+                return s >> 1, v
+            time.sleep(0)
+
+    # ---------------- change notification ----------------
+    def wait(self, channel: str, version: int, timeout: float | None = None) -> int:
+        """Block until `channel` is past `version` (or timeout); returns the current version."""
+        ch = self._ch[channel]
+        if ch.seq >> 1 > version:
+            return ch.seq >> 1
+        with ch.cond:
+            ch.waiters += 1
+            try:
+                # writers check `waiters` after bumping seq, so this check can't miss a write
+                ch.cond.wait_for(lambda: ch.seq >> 1 > version, timeout)
+            finally:
+                ch.waiters -= 1
+        return ch.seq >> 1
+
+    def subscribe(self, channel: str, fn: Callable[[Any], None]):
+        """
+        fn(value) after every write to `channel`, from the writer's thread (keep it short).
+        For "snapshot" the value is the live object: read it inside fn, copy it to keep it.
+        """
+        self._ch[channel].subs.append(fn)
+
+    def add_listener(self, fn: Callable[[str], None]):
+        """fn(channel) is called after every set_* ("quote" / "controls" / "snapshot"), from the writer's thread."""
+        self._listeners.append(fn)
@@ -0,0 +1,358 @@
+from __future__ import annotations
+import json
+import os
+import selectors
+import socket
+import threading
+import time
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+# Local control/snapshot channel over a Unix domain socket.
+# Wire format: one JSON object per line.
+#   client -> engine: {"op": "controls", "data": {...}}  |  {"op": "subscribe", "max_hz": 2}
+#   engine -> client: {"op": "controls", "data": {...}}  |  {"op": "snapshot", "data": {...}}
+# Snapshots are deltas per subscriber: the first one is complete, then only the keys that changed
+# since the last one sent to that client (nested dicts diffed by key; keys are never removed).
+# Each subscriber gets at most max_hz of them; a slow or capped reader gets the latest state.
+
+DEFAULT_SOCKET = "ui.sock"
+
+
+def channel_supported() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+def _encode(op: str, data: Any, **extra: Any) -> bytes:
+    if is_dataclass(data):
+        data = asdict(data)
+    return (json.dumps({"op": op, "data": data, **extra}, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _delta(old: dict[str, Any], new: dict[str, Any]) -> dict[str, Any]:
+    out: dict[str, Any] = {}
+    for k, v in new.items():
+        o = old.get(k, _delta)
+        if o is v:
+            continue
+        if isinstance(v, dict) and isinstance(o, dict):
+            d = _delta(o, v)
+            if d:
+                out[k] = d
+        elif o != v:
+            out[k] = v
+    return out
+
+
+def _merge(dst: dict[str, Any], src: dict[str, Any]):
+    for k, v in src.items():
+        if isinstance(v, dict) and isinstance(dst.get(k), dict):
+            _merge(dst[k], v)
+        else:
+            dst[k] = v
+
+
+class _Client:
+    __slots__ = ("sock", "rbuf", "out", "subscribed", "sent", "period", "next_at", "dirty")
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.rbuf = b""
+        self.out = b""
+        self.subscribed = False
+        self.sent: dict[str, Any] | None = None  # last snapshot state this client has
+        self.period = 0.0
+        self.next_at = 0.0
+        self.dirty = False  # a newer snapshot is waiting for the rate cap / the socket
+
+
+class ChannelServer:
+    """Engine side: applies control messages as they arrive and streams snapshots to subscribers."""
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_SOCKET,
+        on_controls: Callable[[dict[str, Any]], None] | None = None,
+        get_controls: Callable[[], dict[str, Any]] | None = None,
+        max_hz: float = 0.0,
+        log: Any = None,
+    ):
+        self.path = str(path)
+        self.on_controls = on_controls
+        self.get_controls = get_controls
+        self.log = log  # Logger-like (.error); a bad message never takes the IO thread down
+        self.max_hz = max_hz  # default cap per subscriber (0 = every publish)
+        self._sel = selectors.DefaultSelector()
+        self._clients: dict[int, _Client] = {}
+        self._latest: dict[str, Any] | None = None
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._listener: socket.socket | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = False
+
+    # ---------------- lifecycle ----------------
+    def start(self) -> "ChannelServer":
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        ls = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        ls.bind(self.path)
+        ls.listen(8)
+        ls.setblocking(False)
+        self._listener = ls
+        self._sel.register(ls, selectors.EVENT_READ, "accept")
+        self._wake_r.setblocking(False)
+        self._sel.register(self._wake_r, selectors.EVENT_READ, "wake")
+        self._thread = threading.Thread(target=self._run, name="ui-channel", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop = True
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        for c in list(self._clients.values()):
+            c.sock.close()
+        self._clients.clear()
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        self._wake_r.close()
+        self._wake_w.close()
+        self._sel.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    # ---------------- engine thread ----------------
+    def publish(self, snap: Any):
+        """Non-blocking: stores the snapshot (as a dict, never mutated afterwards) for the IO thread."""
+        if hasattr(snap, "to_dict"):
+            data = snap.to_dict()
+        elif is_dataclass(snap):
+            data = asdict(snap)
+        else:
+            data = snap
+        with self._lock:
+            self._latest = data
+        self._wake()
+
+    def _wake(self):
+        try:
+            self._wake_w.send(b"\0")
+        except (BlockingIOError, OSError):
+            pass
+
+    # ---------------- IO thread ----------------
+    def _timeout(self) -> float:
+        now = time.monotonic()
+        out = 0.5
+        for c in self._clients.values():
+            if c.dirty and not c.out:
+                out = min(out, max(0.0, c.next_at - now))
+        return out
+
+    def _run(self):
+        while not self._stop:
+            for key, mask in self._sel.select(timeout=self._timeout()):
+                tag = key.data
+                if tag == "accept":
+                    self._accept()
+                elif tag == "wake":
+                    try:
+                        while self._wake_r.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                    self._fan_out()
+                else:
+                    c = self._clients.get(key.fd)
+                    if c is None:
+                        continue
+                    if mask & selectors.EVENT_READ:
+                        self._read(c)
+                    if mask & selectors.EVENT_WRITE and key.fd in self._clients:
+                        self._flush(c)
+            # snapshots held back by a client's max_hz
+            for c in list(self._clients.values()):
+                if c.dirty and not c.out:
+                    self._send_snapshot(c)
+
+    def _accept(self):
+        try:
+            s, _ = self._listener.accept()
+        except (BlockingIOError, OSError):
+            return
+        s.setblocking(False)
+        c = _Client(s)
+        self._clients[s.fileno()] = c
+        self._sel.register(s, selectors.EVENT_READ, "client")
+
+    def _drop(self, c: _Client):
+        fd = c.sock.fileno()
+        self._clients.pop(fd, None)
+        try:
+            self._sel.unregister(c.sock)
+        except (KeyError, ValueError):
+            pass
+        c.sock.close()
+
+    def _read(self, c: _Client):
+        try:
+            data = c.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(c)
+            return
+        c.rbuf += data
+        while b"\n" in c.rbuf:
+            line, c.rbuf = c.rbuf.split(b"\n", 1)
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                continue
+            if not isinstance(msg, dict):
+                continue
+            op = msg.get("op")
+            if op == "controls" and isinstance(msg.get("data"), dict):
+                if self.on_controls is not None:
+                    try:
+                        self.on_controls(msg["data"])
+                    except Exception as e:
+                        if self.log is not None:
+                            self.log.error(f"UI channel: controls rejected: {e!r}")
+            elif op == "subscribe":
+                c.subscribed = True
+                try:
+                    hz = float(msg.get("max_hz", self.max_hz) or 0.0)
+                except (TypeError, ValueError):
+                    hz = self.max_hz
+                c.period = 1.0 / hz if hz > 0 else 0.0
+                c.sent = None
+                if self.get_controls is not None:
+                    self._queue(c, _encode("controls", self.get_controls()))
+                self._send_snapshot(c)
+
+    def _fan_out(self):
+        for c in list(self._clients.values()):
+            if c.subscribed:
+                self._send_snapshot(c)
+
+    def _send_snapshot(self, c: _Client):
+        """Delta vs what the client has; held back (dirty) while its socket drains or max_hz is not due."""
+        with self._lock:
+            latest = self._latest
+        if latest is None:
+            return
+        now = time.monotonic()
+        if c.out or now < c.next_at:
+            c.dirty = True
+            return
+        c.dirty = False
+        delta = latest if c.sent is None else _delta(c.sent, latest)
+        c.sent = latest
+        if not delta:
+            return
+        c.next_at = now + c.period
+        self._queue(c, _encode("snapshot", delta))
+
+    def _queue(self, c: _Client, payload: bytes):
+        c.out += payload
+        self._flush(c)
+
+    def _flush(self, c: _Client):
+        while c.out:
+            try:
+                n = c.sock.send(c.out)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                self._drop(c)
+                return
+            c.out = c.out[n:]
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if c.out else 0)
+        try:
+            self._sel.modify(c.sock, events, "client")
+        except (KeyError, ValueError):
+            pass
+
+
+class ChannelClient:
+    """UI side: push control changes, receive the latest snapshot/controls."""
+
+    def __init__(self, path: str | Path = DEFAULT_SOCKET, timeout: float = 1.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(str(path))
+        self.sock.setblocking(False)
+        self._rbuf = b""
+        self.snapshot: dict[str, Any] | None = None
+        self.controls: dict[str, Any] | None = None
+
+    def send_controls(self, controls: dict[str, Any]):
+        self.sock.setblocking(True)
+        try:
+            self.sock.sendall(_encode("controls", controls))
+        finally:
+            self.sock.setblocking(False)
+
+    def subscribe(self, max_hz: float | None = None):
+        """Start the snapshot stream; `max_hz` caps it for this client (default: the engine's)."""
+        self.sock.setblocking(True)
+        try:
+            extra = {"max_hz": max_hz} if max_hz is not None else {}
+            self.sock.sendall(_encode("subscribe", None, **extra))
+        finally:
+            self.sock.setblocking(False)
+
+    def poll(self, timeout: float = 0.0) -> dict[str, Any] | None:
+        """Drain whatever arrived (waiting up to `timeout` for the first bytes); returns the latest snapshot."""
+        deadline = time.monotonic() + timeout
+        sel = selectors.DefaultSelector()
+        sel.register(self.sock, selectors.EVENT_READ)
+        try:
+            while True:
+                left = max(0.0, deadline - time.monotonic())
+                if not sel.select(timeout=left):
+                    break
+                try:
+                    data = self.sock.recv(65536)
+                except (BlockingIOError, InterruptedError):
+                    continue
+                if not data:
+                    raise ConnectionError("engine closed the channel")
+                self._rbuf += data
+                got = self._parse()
+                if got:
+                    deadline = time.monotonic()  # fresh snapshot: drain the rest without waiting
+        finally:
+            sel.close()
+        return self.snapshot
+
+    def _parse(self) -> bool:
+        got = False
+        while b"\n" in self._rbuf:
+            line, self._rbuf = self._rbuf.split(b"\n", 1)
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                continue
+            if msg.get("op") == "snapshot":
+                data = msg.get("data") or {}
+                if self.snapshot is None:
+                    self.snapshot = data
+                else:
+                    _merge(self.snapshot, data)
+                got = True
+            elif msg.get("op") == "controls":
+                self.controls = msg.get("data")
+        return got
+
+    def close(self):
+        self.sock.close()
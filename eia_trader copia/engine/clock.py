@@ -0,0 +1,40 @@
+from __future__ import annotations
+import time
+from datetime import datetime
+
+
+class Clock:
+    """Wall clock (live path). Engine, broker and feeds read time only through this."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+
+class SimClock(Clock):
+    """Simulated clock for replays: time only moves when the driver sets it."""
+
+    def __init__(self, t0: float = 0.0):
+        self._t = float(t0)
+        self._now: datetime | None = None  # now() for the current _t, built once per step
+
+    def set(self, ts: float):
+        self._t = float(ts)
+        self._now = None
+
+    def advance(self, dt: float):
+        self._t += float(dt)
+        self._now = None
+
+    def time(self) -> float:
+        return self._t
+
+    def now(self) -> datetime:
+        if self._now is None:
+            self._now = datetime.fromtimestamp(self._t)
+        return self._now
+
+
+WALL_CLOCK = Clock()
@@ -1,33 +1,254 @@
 from __future__ import annotations
+import os
 import yaml
+from dataclasses import dataclass, field, fields, asdict
 from pathlib import Path
+from typing import Any
 
+# Typed, frozen config: parsed + validated once by load_config, read as plain attributes in tick().
 
-def load_config(path: str) -> dict:
+
+@dataclass(frozen=True, slots=True)
+class EngineCfg:
+    tick_size: float = 0.01
+    loop_hz: int = 4
+    log_path: str = "logs/engine.log"
+    log_max_mb: float = 10
+    log_backups: int = 5
+    log_rotate_hours: float | None = None
+    price_window: int = 60
+    journal_path: str | None = "logs/journal_%Y%m%d.bin"
+    record_path: str | None = None
+    runtime: str = "async"
+    ui_channel: str = "socket"
+    ui_socket: str = "ui.sock"
+    config_reload_sec: float = 2.0
+    snapshot_hz: float = 10.0
+    metrics: bool = False
+    metrics_every_sec: float = 5.0
+    metrics_path: str | None = None
+    metrics_in_snapshot: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class RiskCfg:
+    base_size: int = 1
+    max_trades_per_day: int = 3
+    max_daily_loss: float = 500
+
+
+@dataclass(frozen=True, slots=True)
+class EventCfg:
+    neutral_z: float = 0.5
+    signif_z: float = 1.0
+    shock_z: float = 2.0
+
+
+@dataclass(frozen=True, slots=True)
+class ExecutionCfg:
+    max_spread_ticks: int = 4
+    confirm_seconds: int = 10
+    impulse_ticks_shock: int = 8
+    impulse_ticks_signif: int = 10
+    velocity_ticks_per_sec: float = 1.5
+    range_build_sec: float = 3
+    range_break_ticks: int = 2
+    retrace_ticks: int = 3
+    persistence_n: int = 3
+    hold_max_min: float = 60
+    cooldown_seconds: int = 120
+    fail_fast_sec: float = 15
+    no_follow_sec: float = 25
+    no_follow_min_pnl: float = 0.05
+    trail_min_ticks: float = 10
+    trail_vol_mult: float = 1.5
+    vol_window: int = 30
+    breakeven_after_ticks: float = 8
+    tighten_after_sec: float = 120
+    trail_min_ticks_tight: float = 6
+
+
+@dataclass(frozen=True, slots=True)
+class FillsCfg:
+    model: str = "touch"  # touch | sim
+    latency_ms: float = 50.0
+    slip_per_spread_tick: float = 0.5
+    depth_per_level: int = 5
+    max_levels: int = 3
+    commission_per_contract: float = 0.0
+    velocity_halflife_sec: float = 1.0
+
+
+_SECTIONS = {"engine": EngineCfg, "risk": RiskCfg, "event": EventCfg, "execution": ExecutionCfg, "fills": FillsCfg}
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    mode: str = "PAPER"
+    symbol: str = "CL"
+    engine: EngineCfg = field(default_factory=EngineCfg)
+    risk: RiskCfg = field(default_factory=RiskCfg)
+    event: EventCfg = field(default_factory=EventCfg)
+    execution: ExecutionCfg = field(default_factory=ExecutionCfg)
+    fills: FillsCfg = field(default_factory=FillsCfg)
+    # sections the engine does not type (read by other components as plain dicts)
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    # derived, precomputed once (prices in price units, times in seconds)
+    range_break_px: float = field(init=False, default=0.0)
+    breakeven_px: float = field(init=False, default=0.0)
+    hold_max_sec: float = field(init=False, default=0.0)
+
+    def __post_init__(self):
+        _validate(self)
+        t = self.engine.tick_size
+        object.__setattr__(self, "range_break_px", self.execution.range_break_ticks * t)
+        object.__setattr__(self, "breakeven_px", self.execution.breakeven_after_ticks * t)
+        object.__setattr__(self, "hold_max_sec", self.execution.hold_max_min * 60.0)
+
+    # ---------------- construction ----------------
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> "Config":
+        d = dict(d or {})
+        kw: dict[str, Any] = {}
+        for name, sec_cls in _SECTIONS.items():
+            kw[name] = _build_section(name, sec_cls, d.pop(name, None) or {})
+        kw["mode"] = str(d.pop("mode", "PAPER"))
+        kw["symbol"] = str(d.pop("symbol", "CL"))
+        kw["extra"] = d
+        return cls(**kw)
+
+    def to_dict(self) -> dict[str, Any]:
+        out: dict[str, Any] = {"mode": self.mode, "symbol": self.symbol}
+        for name in _SECTIONS:
+            out[name] = asdict(getattr(self, name))
+        out.update(self.extra)
+        return out
+
+    def override(self, params: dict[str, Any]) -> "Config":
+        """New config with overrides; plain keys go to `execution:`, dotted keys (`risk.base_size`) anywhere."""
+        d = self.to_dict()
+        for k, v in params.items():
+            section, _, key = k.rpartition(".")
+            d.setdefault(section or "execution", {})[key] = v
+        return Config.from_dict(d)
+
+    def section(self, name: str) -> dict[str, Any]:
+        """Untyped sections (e.g. scoring) as dicts."""
+        return dict(self.extra.get(name) or {})
+
+
+def _coerce(name: str, ann: str, v: Any) -> Any:
+    optional = "None" in ann
+    if v is None:
+        if optional:
+            return None
+        raise ValueError(f"config: {name} must not be empty")
+    base = ann.replace("| None", "").strip()
+    try:
+        if base == "int":
+            if isinstance(v, float) and not v.is_integer():
+                raise ValueError
+            return int(v)
+        if base == "float":
+            return float(v)
+        if base == "str":
+            return str(v)
+        if base == "bool":
+            if not isinstance(v, bool):
+                raise ValueError
+            return v
+    except (TypeError, ValueError):
+        raise ValueError(f"config: {name}={v!r} is not a valid {base}") from None
+    return v
+
+
+def _build_section(section: str, cls, raw: dict[str, Any]):
+    if not isinstance(raw, dict):
+        raise ValueError(f"config: section '{section}' must be a mapping")
+    known = {f.name: f for f in fields(cls)}
+    unknown = sorted(set(raw) - set(known))
+    if unknown:
+        raise ValueError(f"config: unknown key(s) in '{section}': {', '.join(unknown)}")
+    return cls(**{k: _coerce(f"{section}.{k}", str(known[k].type), v) for k, v in raw.items()})
+
+
+def _validate(c: Config):
+    e, r, ev, x, fl = c.engine, c.risk, c.event, c.execution, c.fills
+    errs: list[str] = []
+    if e.tick_size <= 0:
+        errs.append("engine.tick_size must be > 0")
+    if e.loop_hz <= 0:
+        errs.append("engine.loop_hz must be > 0")
+    if e.price_window < 2:
+        errs.append("engine.price_window must be >= 2")
+    if e.snapshot_hz < 0:
+        errs.append("engine.snapshot_hz must be >= 0")
+    if e.metrics_every_sec <= 0:
+        errs.append("engine.metrics_every_sec must be > 0")
+    if e.runtime not in ("async", "poll"):
+        errs.append("engine.runtime must be async|poll")
+    if e.ui_channel not in ("socket", "json"):
+        errs.append("engine.ui_channel must be socket|json")
+    if r.base_size < 1 or r.max_trades_per_day < 0 or r.max_daily_loss < 0:
+        errs.append("risk: base_size >= 1, max_trades_per_day >= 0, max_daily_loss >= 0")
+    if not (0 <= ev.neutral_z <= ev.signif_z <= ev.shock_z):
+        errs.append("event: need 0 <= neutral_z <= signif_z <= shock_z")
+    if x.range_build_sec > x.confirm_seconds:
+        errs.append("execution.range_build_sec must be <= confirm_seconds")
+    if x.persistence_n > e.price_window:
+        errs.append("execution.persistence_n must be <= engine.price_window")
+    if x.vol_window > e.price_window:
+        errs.append("execution.vol_window must be <= engine.price_window")
+    for k in ("max_spread_ticks", "retrace_ticks", "cooldown_seconds", "impulse_ticks_shock", "impulse_ticks_signif"):
+        if getattr(x, k) < 0:
+            errs.append(f"execution.{k} must be >= 0")
+    if fl.model not in ("touch", "sim"):
+        errs.append("fills.model must be touch|sim")
+    if fl.latency_ms < 0 or fl.commission_per_contract < 0 or fl.depth_per_level < 1 or fl.max_levels < 1:
+        errs.append("fills: latency_ms >= 0, commission_per_contract >= 0, depth_per_level >= 1, max_levels >= 1")
+    if errs:
+        raise ValueError("invalid config: " + "; ".join(errs))
+
+
+def load_config(path: str) -> Config:
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(f"Missing config file: {path}")
     with p.open("r", encoding="utf-8") as f:
-        cfg = yaml.safe_load(f)
-    # minimal sanity
-    cfg.setdefault("mode", "PAPER")
-    cfg.setdefault("symbol", "CL")
-    cfg.setdefault("engine", {})
-    cfg["engine"].setdefault("tick_size", 0.01)
-    cfg["engine"].setdefault("loop_hz", 4)
-    cfg["engine"].setdefault("log_path", "logs/engine.log")
-    cfg.setdefault("risk", {})
-    cfg["risk"].setdefault("base_size", 1)
-    cfg["risk"].setdefault("max_trades_per_day", 3)
-    cfg["risk"].setdefault("max_daily_loss", 500)
-    cfg.setdefault("event", {})
-    cfg["event"].setdefault("neutral_z", 0.5)
-    cfg["event"].setdefault("signif_z", 1.0)
-    cfg["event"].setdefault("shock_z", 2.0)
-    cfg.setdefault("execution", {})
-    cfg["execution"].setdefault("max_spread_ticks", 4)
-    cfg["execution"].setdefault("confirm_seconds", 8)
-    cfg["execution"].setdefault("impulse_ticks", 8)
-    cfg["execution"].setdefault("hold_max_min", 60)
-    cfg["execution"].setdefault("cooldown_seconds", 120)
-    return cfg
+        raw = yaml.safe_load(f) or {}
+    return Config.from_dict(raw)
+
+
+class ConfigWatcher:
+    """Hot reload: poll() stats the file and returns a new validated Config when it changed."""
+
+    def __init__(self, path: str, current: Config | None = None):
+        self.path = path
+        self._mtime = self._stat()
+        self.current = current
+        self.last_error: str | None = None
+
+    def _stat(self) -> float | None:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self) -> Config | None:
+        m = self._stat()
+        if m is None or m == self._mtime:
+            return None
+        self._mtime = m
+        try:
+            cfg = load_config(self.path)
+        except (ValueError, OSError, yaml.YAMLError) as e:
+            # keep running on the old config; a half-saved file is retried on the next save
+            self.last_error = str(e)
+            return None
+        self.last_error = None
+        if cfg == self.current:
+            return None
+        self.current = cfg
+        return cfg
+
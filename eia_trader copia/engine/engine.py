@@ -1,27 +1,40 @@
 from __future__ import annotations
-from datetime import datetime, timedelta
 import time
-from collections import deque
-import statistics
+from datetime import datetime, timedelta
 
-from engine.bus import SharedBus, EngineSnapshot
+from engine.bus import SharedBus
+from engine.clock import Clock, WALL_CLOCK
+from engine.config import Config
 from engine.execution import PaperBroker
-from engine.logger import Logger
+from engine.fills import make_fill_model
+from engine.rolling import RollingWindow
+from engine.journal import TickJournal, Gate, STATE_CODE, LABEL_CODE, SIDE_CODE, _next_midnight
+from engine.logger import Logger, TaggedLogger, engine_logger
+from engine.metrics import EngineMetrics
 from engine.strategy import label_from_score
 
 
 class TradingEngine:
-    def __init__(self, cfg: dict, bus: SharedBus):
+    def __init__(self, cfg: Config | dict, bus: SharedBus, clock: Clock | None = None,
+                 log: Logger | TaggedLogger | None = None):
+        if isinstance(cfg, dict):
+            cfg = Config.from_dict(cfg)
         self.cfg = cfg
+        self._pending_cfg: Config | None = None
         self.bus = bus
-        self.log = Logger(cfg["engine"]["log_path"])
+        self.clock = clock or WALL_CLOCK
+        ec = cfg.engine
+        # `log`: a shared logger (EngineHost); otherwise the engine owns one on engine.log_path
+        self._own_log = log is None
+        self.log = log if log is not None else engine_logger(ec)
 
         self.state = "IDLE"
         self.cooldown_until: datetime | None = None
         self.trades_today = 0
-        self.day = datetime.now().date()
+        self.day = self.clock.now().date()
+        self._day_end = _next_midnight(self.clock.time())  # float compare per tick, no datetime
 
-        self.broker = PaperBroker(tick_size=float(cfg["engine"]["tick_size"]))
+        self.broker = PaperBroker(tick_size=ec.tick_size, clock=self.clock, fill_model=make_fill_model(cfg))
 
         # Event ref
         self._event_ref_price: float | None = None
@@ -34,30 +47,85 @@ class TradingEngine:
         self._range_low: float | None = None
         self._range_done: bool = False
 
-        self._last_prices = deque(maxlen=60)
+        # O(1) rolling stats over the last prices (vol, persistence)
+        self._last_prices = RollingWindow(maxlen=ec.price_window)
+        self._last_quote = None
 
-        # Debug
+        # Debug: last decision (text for the UI, gate + inputs for the journal)
         self._reject_reason: str = "IDLE"
+        self._gate: Gate = Gate.NONE
+        self._move_ticks: int = 0
+        self._velocity: float = float("nan")
+        self._vol: float = float("nan")
+        self._score_latency_ms: float = 0.0
+        self._deadline_key: tuple | None = None  # next_deadline() cache
+        self._deadline: datetime | None = None
+
+        jp = ec.journal_path
+        # strftime codes resolve per record from the engine clock: one file per day, like the recorder
+        self.journal = TickJournal(jp) if jp else None
+
+        # engine.metrics: per-gate counts/timings, loop jitter, bus lock wait (off = one branch per tick)
+        self.metrics = EngineMetrics(ec.loop_hz, bus_lock_wait=bus.lock_wait) if ec.metrics else None
+        self._metrics_dict: dict | None = None
 
         self.log.info("Engine initialized")
 
+    def close(self):
+        """Shutdown: drain the journal and the log queue to disk."""
+        if self.metrics is not None:
+            self.export_metrics()
+            self.log.info(self.metrics.summary())
+        if self.journal is not None:
+            self.journal.close()
+        if self._own_log:
+            self.log.close()
+        else:
+            self.log.flush()
+
+    def reload_config(self, cfg: Config):
+        """Hot reload: swap the config reference (atomic). Deferred while in a trade."""
+        if not self.broker.pos.is_flat():
+            self._pending_cfg = cfg
+            self.log.info("Config reload deferred until flat")
+            return
+        self._apply_config(cfg)
+
+    def _apply_config(self, cfg: Config):
+        old = self.cfg
+        self.cfg = cfg
+        self._pending_cfg = None
+        if cfg.fills != old.fills:
+            self.broker.fill_model = make_fill_model(cfg)
+        if cfg.engine != old.engine:
+            self.log.warn("Config reload: engine section changes need a restart (kept old log/window/journal)")
+        self.log.info("Config reloaded")
+
     # ---------------- helpers ----------------
-    def _set_reason(self, s: str):
+    def _set_reason(self, s: str, gate: Gate = Gate.NONE):
         self._reject_reason = s
+        self._gate = gate
 
     def _roll_day_if_needed(self):
-        today = datetime.now().date()
-        if today != self.day:
-            self.day = today
+        t = self.clock.time()
+        if t >= self._day_end:
+            self.day = self.clock.now().date()
+            self._day_end = _next_midnight(t)
             self.trades_today = 0
             self.log.info("New day: trades counter reset")
 
     def _in_cooldown(self) -> bool:
-        return self.cooldown_until is not None and datetime.now() < self.cooldown_until
+        cd = self.cooldown_until
+        if cd is None:
+            return False
+        if self.clock.now() < cd:
+            return True
+        self.cooldown_until = None  # expired: later ticks and next_deadline() skip the clock read
+        return False
 
     def _set_cooldown(self):
-        sec = int(self.cfg["execution"].get("cooldown_seconds", 120))
-        self.cooldown_until = datetime.now() + timedelta(seconds=sec)
+        sec = self.cfg.execution.cooldown_seconds
+        self.cooldown_until = self.clock.now() + timedelta(seconds=sec)
 
     def _reset_event_ref(self):
         self._event_ref_price = None
@@ -69,55 +137,105 @@ class TradingEngine:
         self._range_done = False
 
     def _persistence_ok(self, want_side: str, n: int) -> bool:
-        if n <= 1:
-            return True
-        if len(self._last_prices) < n:
-            return False
-        arr = list(self._last_prices)[-n:]
-        if want_side == "LONG":
-            return all(arr[i] > arr[i - 1] for i in range(1, n))
-        return all(arr[i] < arr[i - 1] for i in range(1, n))
+        return self._last_prices.persistence(want_side, n)
 
     def _vol_ticks(self, tick_size: float) -> float:
         if len(self._last_prices) < 12:
             return 0.0
-        px = list(self._last_prices)[-30:]
-        rets = [px[i] - px[i - 1] for i in range(1, len(px))]
-        try:
-            st = statistics.pstdev(rets)
-        except Exception:
-            st = 0.0
+        st = self._last_prices.vol(self.cfg.execution.vol_window)
         return float(st / tick_size) if tick_size > 0 else 0.0
 
+    def next_deadline(self) -> datetime | None:
+        """Earliest time at which tick() would decide differently without a new quote."""
+        pos = self.broker.pos
+        flat = pos.is_flat()
+        if self.cooldown_until is None and self._event_ref_time is None and flat:
+            return None  # the common case: nothing pending, no clock read
+        now = self.clock.now()
+        # candidates only move with these: reuse the last answer until it is reached
+        key = (self.cooldown_until, self._event_ref_time, None if flat else pos.entry_time, self.cfg)
+        if key == self._deadline_key:
+            dl = self._deadline
+            if dl is None or dl > now:
+                return dl
+        ex = self.cfg.execution
+        cands: list[datetime] = []
+        if self.cooldown_until is not None:
+            cands.append(self.cooldown_until)
+        if not flat and pos.entry_time is not None:
+            for sec in (ex.fail_fast_sec, ex.no_follow_sec, ex.tighten_after_sec, self.cfg.hold_max_sec):
+                cands.append(pos.entry_time + timedelta(seconds=sec))
+        elif self._event_ref_time is not None:
+            cands.append(self._event_ref_time + timedelta(seconds=ex.range_build_sec))
+            cands.append(self._event_ref_time + timedelta(seconds=ex.confirm_seconds))
+        future = [c for c in cands if c > now]
+        self._deadline_key = key
+        self._deadline = min(future) if future else None
+        return self._deadline
+
+    # ---------------- metrics ----------------
+    def export_metrics(self):
+        """Off the hot path (runtime timer): refresh the snapshot copy and write engine.metrics_path."""
+        m = self.metrics
+        if m is None:
+            return
+        ec = self.cfg.engine
+        if ec.metrics_in_snapshot:
+            self._metrics_dict = m.to_dict()
+        if ec.metrics_path:
+            m.write(ec.metrics_path, labels=f'symbol="{self.cfg.symbol}"')
+
     # ---------------- main loop ----------------
     def tick(self):
+        m = self.metrics
+        if m is None:
+            self._tick()
+            return
+        t0 = time.perf_counter_ns()
+        self._tick()
+        if self._last_quote is not None:  # no quote yet: nothing was decided
+            m.on_tick(self._gate, time.perf_counter_ns() - t0)
+
+    def _tick(self):
         self._roll_day_if_needed()
 
         q = self.bus.get_quote()
-        ctl = self.bus.get_controls()
+        ctl = self.bus.controls_view()
         if q is None:
             return
 
-        self._last_prices.append(float(q.last))
+        self._move_ticks = 0
+        self._velocity = float("nan")
+        self._vol = float("nan")
+
+        # timer wake-ups re-run tick() on the same quote: count each price once
+        if q is not self._last_quote:
+            self._last_prices.push(float(q.last))
+            self.broker.on_quote(q)
+            self._last_quote = q
 
         arm = bool(ctl.get("arm", False))
         kill = bool(ctl.get("kill", False))
         flatten = bool(ctl.get("flatten", False))
         score = float(ctl.get("score", 0.0))
         event_active = bool(ctl.get("event_active", False))
+        self._score_latency_ms = float(ctl.get("score_latency_ms", 0.0))
 
-        neutral_z = float(self.cfg["event"]["neutral_z"])
-        signif_z = float(self.cfg["event"]["signif_z"])
-        shock_z = float(self.cfg["event"]["shock_z"])
-        label = label_from_score(score, neutral_z, signif_z, shock_z)
+        if self._pending_cfg is not None and self.broker.pos.is_flat():
+            self._apply_config(self._pending_cfg)
+        cfg = self.cfg
+        ex = cfg.execution
+        ev = cfg.event
+        label = label_from_score(score, ev.neutral_z, ev.signif_z, ev.shock_z)
 
         # KILL
         if kill:
             if not self.broker.pos.is_flat():
                 pnl = self.broker.flatten(q)
                 self.log.warn(f"KILL: flattened. realized_pnl_delta={pnl:.2f}")
+                self.log.flush()
             self.state = "HALT"
-            self._set_reason("KILL -> HALT")
+            self._set_reason("KILL -> HALT", Gate.KILL)
             self._publish_snapshot(q, label, score, event_active, arm, kill, flatten)
             return
 
@@ -127,16 +245,15 @@ class TradingEngine:
             self.log.warn(f"FLATTEN: realized_pnl_delta={pnl:.2f}")
             self._set_cooldown()
             self.bus.set_controls({"flatten": False})
-            self._set_reason("Manual FLATTEN")
+            self._set_reason("Manual FLATTEN", Gate.FLATTEN)
 
         # daily loss
-        max_daily_loss = float(self.cfg["risk"]["max_daily_loss"])
-        if self.broker.realized_pnl <= -max_daily_loss:
+        if self.broker.realized_pnl <= -cfg.risk.max_daily_loss:
             if not self.broker.pos.is_flat():
                 pnl = self.broker.flatten(q)
                 self.log.warn(f"MAX_DAILY_LOSS: flattened. delta={pnl:.2f}")
             self.state = "HALT"
-            self._set_reason("Max daily loss -> HALT")
+            self._set_reason("Max daily loss -> HALT", Gate.MAX_DAILY_LOSS)
             self._publish_snapshot(q, label, score, event_active, arm, kill, False)
             return
 
@@ -144,26 +261,26 @@ class TradingEngine:
         if not arm:
             self.state = "IDLE"
             self._reset_event_ref()
-            self._set_reason("ARM is OFF")
+            self._set_reason("ARM is OFF", Gate.ARM_OFF)
             self._publish_snapshot(q, label, score, event_active, arm, kill, False)
             return
 
         # cooldown
         if self._in_cooldown():
             self.state = "COOLDOWN"
-            self._set_reason("Cooldown active")
+            self._set_reason("Cooldown active", Gate.COOLDOWN)
             self._publish_snapshot(q, label, score, event_active, arm, kill, False)
             return
 
         # spread gate
-        max_spread = int(self.cfg["execution"].get("max_spread_ticks", 4))
+        max_spread = ex.max_spread_ticks
         if q.spread_ticks > max_spread and self.broker.pos.is_flat():
             self.state = "ARMED"
-            self._set_reason(f"Spread too wide ({q.spread_ticks}t > {max_spread}t)")
+            self._set_reason(f"Spread too wide ({q.spread_ticks}t > {max_spread}t)", Gate.SPREAD)
             self._publish_snapshot(q, label, score, event_active, arm, kill, False)
             return
 
-        tick_size = float(self.cfg["engine"]["tick_size"])
+        tick_size = cfg.engine.tick_size
 
         # =========================
         # FLAT -> ENTRY
@@ -173,51 +290,47 @@ class TradingEngine:
 
             if not event_active:
                 self._reset_event_ref()
-                self._set_reason("Waiting EVENT_ACTIVE")
+                self._set_reason("Waiting EVENT_ACTIVE", Gate.NO_EVENT)
                 self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                 return
 
             if self._event_ref_price is None:
                 self._event_ref_price = float(q.last)
-                self._event_ref_time = datetime.now()
+                self._event_ref_time = self.clock.now()
                 self._event_peak_ticks = 0
                 self._event_trough_ticks = 0
                 self._range_high = float(q.last)
                 self._range_low = float(q.last)
                 self._range_done = False
-                self._set_reason("Event started: ref set, building range")
+                self._set_reason("Event started: ref set, building range", Gate.EVENT_START)
                 self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                 return
 
             # max trades/day
-            if self.trades_today >= int(self.cfg["risk"]["max_trades_per_day"]):
+            if self.trades_today >= cfg.risk.max_trades_per_day:
                 self.state = "HALT"
-                self._set_reason("Max trades/day -> HALT")
+                self._set_reason("Max trades/day -> HALT", Gate.MAX_TRADES)
                 self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                 return
 
             # only signif/shock
             if label == "NEUTRAL":
-                self._set_reason("Label NEUTRAL -> no trade")
+                self._set_reason("Label NEUTRAL -> no trade", Gate.NEUTRAL)
                 self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                 return
 
             # params
-            confirm_sec = int(self.cfg["execution"].get("confirm_seconds", 10))
-            impulse_shock = int(self.cfg["execution"].get("impulse_ticks_shock", 8))
-            impulse_signif = int(self.cfg["execution"].get("impulse_ticks_signif", 10))
-            velocity_thr = float(self.cfg["execution"].get("velocity_ticks_per_sec", 1.5))
-
-            range_build_sec = float(self.cfg["execution"].get("range_build_sec", 3))
-            range_break_ticks = int(self.cfg["execution"].get("range_break_ticks", 2))
-
-            retrace_ticks = int(self.cfg["execution"].get("retrace_ticks", 3))
-            persistence_n = int(self.cfg["execution"].get("persistence_n", 3))
+            confirm_sec = ex.confirm_seconds
+            velocity_thr = ex.velocity_ticks_per_sec
+            range_build_sec = ex.range_build_sec
+            retrace_ticks = ex.retrace_ticks
+            persistence_n = ex.persistence_n
 
-            elapsed = (datetime.now() - (self._event_ref_time or datetime.now())).total_seconds()
+            now = self.clock.now()
+            elapsed = (now - (self._event_ref_time or now)).total_seconds()
 
             if elapsed > confirm_sec:
-                self._set_reason(f"Expired confirm window ({elapsed:.1f}s > {confirm_sec}s) -> cooldown")
+                self._set_reason(f"Expired confirm window ({elapsed:.1f}s > {confirm_sec}s) -> cooldown", Gate.CONFIRM_EXPIRED)
                 self._set_cooldown()
                 self._reset_event_ref()
                 self._publish_snapshot(q, label, score, event_active, arm, kill, False)
@@ -230,14 +343,14 @@ class TradingEngine:
 
                 if elapsed >= range_build_sec:
                     self._range_done = True
-                    self._set_reason("Range built -> waiting breakout")
+                    self._set_reason("Range built -> waiting breakout", Gate.RANGE_BUILT)
                 else:
-                    self._set_reason(f"Building range ({elapsed:.1f}/{range_build_sec:.1f}s)")
+                    self._set_reason(f"Building range ({elapsed:.1f}/{range_build_sec:.1f}s)", Gate.RANGE_BUILD)
                 self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                 return
 
             want_side = "LONG" if score > 0 else "SHORT"
-            impulse_ticks = impulse_shock if label == "SHOCK" else impulse_signif
+            impulse_ticks = ex.impulse_ticks_shock if label == "SHOCK" else ex.impulse_ticks_signif
 
             move = float(q.last) - float(self._event_ref_price)
             move_ticks = int(round(move / tick_size))
@@ -246,39 +359,41 @@ class TradingEngine:
             self._event_trough_ticks = min(self._event_trough_ticks, move_ticks)
 
             velocity = abs(move_ticks) / max(elapsed, 0.001)
+            self._move_ticks = move_ticks
+            self._velocity = velocity
 
             # (1) impulse
             move_ok = (want_side == "LONG" and move_ticks >= impulse_ticks) or \
                       (want_side == "SHORT" and move_ticks <= -impulse_ticks)
             if not move_ok:
-                self._set_reason(f"Reject: impulse {move_ticks}t need {impulse_ticks}t")
+                self._set_reason(f"Reject: impulse {move_ticks}t need {impulse_ticks}t", Gate.IMPULSE)
                 self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                 return
 
             # (2) velocity
             if velocity < velocity_thr:
-                self._set_reason(f"Reject: velocity {velocity:.2f}t/s < {velocity_thr:.2f}")
+                self._set_reason(f"Reject: velocity {velocity:.2f}t/s < {velocity_thr:.2f}", Gate.VELOCITY)
                 self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                 return
 
             # (3) persistence
             if not self._persistence_ok(want_side, persistence_n):
-                self._set_reason(f"Reject: persistence < {persistence_n} ticks")
+                self._set_reason(f"Reject: persistence < {persistence_n} ticks", Gate.PERSISTENCE)
                 self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                 return
 
             # (4) breakout
-            rb = range_break_ticks * tick_size
+            rb = cfg.range_break_px
             if want_side == "LONG":
                 need = (float(self._range_high) + rb) if self._range_high is not None else float(q.last)
                 if float(q.last) < need:
-                    self._set_reason(f"Reject: no breakout LONG (last {q.last:.2f} < {need:.2f})")
+                    self._set_reason(f"Reject: no breakout LONG (last {q.last:.2f} < {need:.2f})", Gate.BREAKOUT)
                     self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                     return
             else:
                 need = (float(self._range_low) - rb) if self._range_low is not None else float(q.last)
                 if float(q.last) > need:
-                    self._set_reason(f"Reject: no breakout SHORT (last {q.last:.2f} > {need:.2f})")
+                    self._set_reason(f"Reject: no breakout SHORT (last {q.last:.2f} > {need:.2f})", Gate.BREAKOUT)
                     self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                     return
 
@@ -289,18 +404,18 @@ class TradingEngine:
                 retr = move_ticks - self._event_trough_ticks
 
             if retr > retrace_ticks:
-                self._set_reason(f"Reject: retrace {retr}t > {retrace_ticks}t -> cooldown")
+                self._set_reason(f"Reject: retrace {retr}t > {retrace_ticks}t -> cooldown", Gate.RETRACE)
                 self._set_cooldown()
                 self._reset_event_ref()
                 self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                 return
 
             # ENTER
-            qty = max(1, int(self.cfg["risk"]["base_size"]))
+            qty = max(1, cfg.risk.base_size)
             fill = self.broker.enter(want_side, qty, q)
             self.trades_today += 1
             self.state = "IN_TRADE"
-            self._set_reason(f"ENTER {want_side} @ {fill:.2f}")
+            self._set_reason(f"ENTER {want_side} @ {fill:.2f}", Gate.ENTER)
             self.log.info(self._reject_reason)
 
             self._reset_event_ref()
@@ -312,24 +427,11 @@ class TradingEngine:
         # =========================
         self.state = "IN_TRADE"
         pos = self.broker.pos
-        now = datetime.now()
+        now = self.clock.now()
 
         unreal = self.broker.mark_unrealized(q)
         time_in_trade = (now - pos.entry_time).total_seconds() if pos.entry_time else 0.0
 
-        fail_fast_sec = float(self.cfg["execution"].get("fail_fast_sec", 15))
-        no_follow_sec = float(self.cfg["execution"].get("no_follow_sec", 25))
-        no_follow_min_pnl = float(self.cfg["execution"].get("no_follow_min_pnl", 0.05))
-
-        trail_min_ticks = float(self.cfg["execution"].get("trail_min_ticks", 10))
-        trail_vol_mult = float(self.cfg["execution"].get("trail_vol_mult", 1.5))
-        breakeven_after_ticks = float(self.cfg["execution"].get("breakeven_after_ticks", 8))
-
-        tighten_after_sec = float(self.cfg["execution"].get("tighten_after_sec", 120))
-        trail_min_ticks_tight = float(self.cfg["execution"].get("trail_min_ticks_tight", 6))
-
-        hold_max_min = float(self.cfg["execution"].get("hold_max_min", 60))
-
         # update best price
         if pos.side == "LONG":
             pos.best_price = max(pos.best_price, q.bid)
@@ -337,8 +439,8 @@ class TradingEngine:
             pos.best_price = min(pos.best_price, q.ask)
 
         # fail fast
-        if time_in_trade >= fail_fast_sec and unreal < 0:
-            self._set_reason("EXIT: fail-fast")
+        if time_in_trade >= ex.fail_fast_sec and unreal < 0:
+            self._set_reason("EXIT: fail-fast", Gate.EXIT_FAIL_FAST)
             pnl = self.broker.exit(q)
             self.log.info(f"{self._reject_reason} pnl_delta={pnl:.2f}")
             self._set_cooldown()
@@ -346,8 +448,8 @@ class TradingEngine:
             return
 
         # no follow through
-        if time_in_trade >= no_follow_sec and unreal < no_follow_min_pnl:
-            self._set_reason("EXIT: no follow-through")
+        if time_in_trade >= ex.no_follow_sec and unreal < ex.no_follow_min_pnl:
+            self._set_reason("EXIT: no follow-through", Gate.EXIT_NO_FOLLOW)
             pnl = self.broker.exit(q)
             self.log.info(f"{self._reject_reason} pnl_delta={pnl:.2f}")
             self._set_cooldown()
@@ -356,9 +458,10 @@ class TradingEngine:
 
         # dynamic trailing
         vol_ticks = self._vol_ticks(tick_size)
-        dyn_trail_ticks = max(trail_min_ticks, trail_vol_mult * vol_ticks)
-        if time_in_trade >= tighten_after_sec:
-            dyn_trail_ticks = max(trail_min_ticks_tight, dyn_trail_ticks * 0.8)
+        self._vol = vol_ticks
+        dyn_trail_ticks = max(ex.trail_min_ticks, ex.trail_vol_mult * vol_ticks)
+        if time_in_trade >= ex.tighten_after_sec:
+            dyn_trail_ticks = max(ex.trail_min_ticks_tight, dyn_trail_ticks * 0.8)
         trail_price = dyn_trail_ticks * tick_size
 
         # breakeven
@@ -366,17 +469,17 @@ class TradingEngine:
         be_price = pos.entry_price
 
         if pos.side == "LONG":
-            if (pos.best_price - pos.entry_price) >= (breakeven_after_ticks * tick_size):
+            if (pos.best_price - pos.entry_price) >= cfg.breakeven_px:
                 be_ok = True
             if q.bid < pos.best_price - trail_price:
-                self._set_reason("EXIT: trailing long")
+                self._set_reason("EXIT: trailing long", Gate.EXIT_TRAIL)
                 pnl = self.broker.exit(q)
                 self.log.info(f"{self._reject_reason} pnl_delta={pnl:.2f}")
                 self._set_cooldown()
                 self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                 return
             if be_ok and q.bid <= be_price:
-                self._set_reason("EXIT: breakeven long")
+                self._set_reason("EXIT: breakeven long", Gate.EXIT_BREAKEVEN)
                 pnl = self.broker.exit(q)
                 self.log.info(f"{self._reject_reason} pnl_delta={pnl:.2f}")
                 self._set_cooldown()
@@ -384,17 +487,17 @@ class TradingEngine:
                 return
 
         elif pos.side == "SHORT":
-            if (pos.entry_price - pos.best_price) >= (breakeven_after_ticks * tick_size):
+            if (pos.entry_price - pos.best_price) >= cfg.breakeven_px:
                 be_ok = True
             if q.ask > pos.best_price + trail_price:
-                self._set_reason("EXIT: trailing short")
+                self._set_reason("EXIT: trailing short", Gate.EXIT_TRAIL)
                 pnl = self.broker.exit(q)
                 self.log.info(f"{self._reject_reason} pnl_delta={pnl:.2f}")
                 self._set_cooldown()
                 self._publish_snapshot(q, label, score, event_active, arm, kill, False)
                 return
             if be_ok and q.ask >= be_price:
-                self._set_reason("EXIT: breakeven short")
+                self._set_reason("EXIT: breakeven short", Gate.EXIT_BREAKEVEN)
                 pnl = self.broker.exit(q)
                 self.log.info(f"{self._reject_reason} pnl_delta={pnl:.2f}")
                 self._set_cooldown()
@@ -402,35 +505,55 @@ class TradingEngine:
                 return
 
         # time exit
-        if time_in_trade >= hold_max_min * 60:
-            self._set_reason("EXIT: time")
+        if time_in_trade >= cfg.hold_max_sec:
+            self._set_reason("EXIT: time", Gate.EXIT_TIME)
             pnl = self.broker.exit(q)
             self.log.info(f"{self._reject_reason} pnl_delta={pnl:.2f}")
             self._set_cooldown()
             self._publish_snapshot(q, label, score, event_active, arm, kill, False)
             return
 
-        self._set_reason("IN_TRADE managing")
-        self._publish_snapshot(q, label, score, event_active, arm, kill, False)
+        self._set_reason("IN_TRADE managing", Gate.MANAGING)
+        self._publish_snapshot(q, label, score, event_active, arm, kill, False, unreal)
 
     # ---------------- snapshot ----------------
-    def _publish_snapshot(self, q, label, score, event_active, arm, kill, flatten):
-        unreal = self.broker.mark_unrealized(q)
-        snap = EngineSnapshot(
-            ts=time.time(),
-            state=self.state,
-            position_side=self.broker.pos.side,
-            position_qty=self.broker.pos.qty,
-            entry_price=self.broker.pos.entry_price,
-            unrealized_pnl=unreal,
-            realized_pnl=self.broker.realized_pnl,
-            trades_today=self.trades_today,
-            label=label,
-            score=score,
-            event_active=event_active,
-            arm=arm,
-            kill=kill,
-            flatten=flatten,
-            reject_reason=self._reject_reason,
+    def _publish_snapshot(self, q, label, score, event_active, arm, kill, flatten, unreal=None):
+        """Fill the bus' snapshot in place (no allocation); `unreal` when tick() already marked the position."""
+        broker = self.broker
+        pos = broker.pos
+        if unreal is None:
+            unreal = broker.mark_unrealized(q)
+        s = self.bus.begin_snapshot()
+        try:
+            s.ts = self.clock.time()
+            s.state = self.state
+            s.position_side = pos.side
+            s.position_qty = pos.qty
+            s.entry_price = pos.entry_price
+            s.unrealized_pnl = unreal
+            s.realized_pnl = broker.realized_pnl
+            s.trades_today = self.trades_today
+            s.label = label
+            s.score = score
+            s.event_active = event_active
+            s.arm = arm
+            s.kill = kill
+            s.flatten = flatten
+            s.reject_reason = self._reject_reason
+            s.avg_slippage_ticks = broker.avg_slippage_ticks
+            s.last_slippage_ticks = broker.last_slippage_ticks
+            s.commissions = broker.commissions
+            s.score_latency_ms = self._score_latency_ms
+            s.metrics = self._metrics_dict
+        finally:
+            # a failed fill must not leave the channel odd: readers would spin on it
+            self.bus.end_snapshot()
+        if self.journal is not None:
+            self._journal_tick(q, label)
+
+    def _journal_tick(self, q, label):
+        self.journal.append(
+            self.clock.time(), q.last, q.bid, q.ask, q.spread_ticks, self._move_ticks,
+            self._velocity, self._vol, STATE_CODE.get(self.state, 0), LABEL_CODE.get(label, 0),
+            int(self._gate), SIDE_CODE.get(self.broker.pos.side, 0),
         )
-        self.bus.set_snapshot(snap)
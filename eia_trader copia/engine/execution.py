@@ -4,10 +4,13 @@ from datetime import datetime
 from typing import Optional
 
 from engine.bus import Quote
+from engine.clock import Clock, WALL_CLOCK
+from engine.fills import TouchFill
 
 
-@dataclass
+@dataclass(slots=True)
 class Position:
+    """One per broker, updated in place on enter/exit."""
     side: str = "FLAT"          # LONG/SHORT/FLAT
     qty: int = 0
     entry_price: float = 0.0
@@ -17,14 +20,62 @@ class Position:
     def is_flat(self) -> bool:
         return self.side == "FLAT" or self.qty == 0
 
+    def open(self, side: str, qty: int, price: float, when: Optional[datetime]):
+        self.side = side
+        self.qty = qty
+        self.entry_price = price
+        self.entry_time = when
+        self.best_price = price
+
+    def reset(self):
+        self.open("FLAT", 0, 0.0, None)
+
+
+@dataclass
+class Trade:
+    side: str
+    qty: int
+    entry_price: float
+    exit_price: float
+    entry_time: Optional[datetime]
+    exit_time: datetime
+    pnl: float                  # net of commissions
+    commission: float = 0.0
+    slippage_ticks: float = 0.0  # entry + exit, vs the touch
+
 
 class PaperBroker:
-    """Very simple paper fills: buys at ask, sells at bid."""
+    """Paper fills through a pluggable fill model (default TouchFill: buys at ask, sells at bid)."""
 
-    def __init__(self, tick_size: float):
+    def __init__(self, tick_size: float, clock: Clock | None = None, fill_model=None):
         self.tick_size = tick_size
+        self.clock = clock or WALL_CLOCK
+        self.fill_model = fill_model or TouchFill(tick_size)
         self.pos = Position()
         self.realized_pnl = 0.0
+        self.trades: list[Trade] = []
+        # fill stats (per fill, both sides)
+        self.commissions = 0.0
+        self.n_fills = 0
+        self.last_slippage_ticks = 0.0
+        self._slip_sum = 0.0
+        self._entry_commission = 0.0
+        self._entry_slip = 0.0
+
+    @property
+    def avg_slippage_ticks(self) -> float:
+        return self._slip_sum / self.n_fills if self.n_fills else 0.0
+
+    def on_quote(self, q: Quote):
+        """Feed every new quote to the fill model (velocity estimate for latency)."""
+        self.fill_model.observe(q)
+
+    def _book(self, res):
+        self.n_fills += 1
+        self.last_slippage_ticks = res.slippage_ticks
+        self._slip_sum += res.slippage_ticks
+        self.commissions += res.commission
+        self.realized_pnl -= res.commission
 
     def mark_unrealized(self, q: Quote) -> float:
         if self.pos.is_flat():
@@ -38,21 +89,36 @@ class PaperBroker:
     def enter(self, side: str, qty: int, q: Quote) -> float:
         if not self.pos.is_flat():
             raise RuntimeError("Already in position")
-        fill = q.ask if side == "LONG" else q.bid
-        self.pos = Position(side=side, qty=qty, entry_price=fill, entry_time=datetime.now(), best_price=fill)
+        res = self.fill_model.fill(side == "LONG", qty, q)
+        self._book(res)
+        self._entry_commission = res.commission
+        self._entry_slip = res.slippage_ticks
+        fill = res.price
+        # partial fills: the position is what actually got filled
+        self.pos.open(side, res.qty, fill, self.clock.now())
         return fill
 
     def exit(self, q: Quote) -> float:
         if self.pos.is_flat():
             return 0.0
-        fill = q.bid if self.pos.side == "LONG" else q.ask
-        # realize
+        # exits sweep the book: always flat afterwards
+        res = self.fill_model.fill(self.pos.side == "SHORT", self.pos.qty, q, sweep=True)
+        self._book(res)
+        fill = res.price
+        # realize (commissions were already taken from realized_pnl in _book)
         if self.pos.side == "LONG":
-            pnl = (fill - self.pos.entry_price) * self.pos.qty
+            gross = (fill - self.pos.entry_price) * self.pos.qty
         else:
-            pnl = (self.pos.entry_price - fill) * self.pos.qty
-        self.realized_pnl += pnl
-        self.pos = Position()
+            gross = (self.pos.entry_price - fill) * self.pos.qty
+        self.realized_pnl += gross
+        commission = self._entry_commission + res.commission
+        pnl = gross - commission
+        self.trades.append(Trade(
+            side=self.pos.side, qty=self.pos.qty, entry_price=self.pos.entry_price, exit_price=fill,
+            entry_time=self.pos.entry_time, exit_time=self.clock.now(), pnl=pnl,
+            commission=commission, slippage_ticks=self._entry_slip + res.slippage_ticks,
+        ))
+        self.pos.reset()
         return pnl
 
     def flatten(self, q: Quote) -> float:
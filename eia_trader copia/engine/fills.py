@@ -0,0 +1,114 @@
+from __future__ import annotations
+import math
+from dataclasses import dataclass
+
+from engine.bus import Quote
+
+
+@dataclass
+class FillResult:
+    price: float            # average fill price
+    qty: int                # filled quantity (<= requested on entries)
+    commission: float
+    slippage_ticks: float   # vs the touch (ask for buys, bid for sells), positive = worse
+
+
+class TouchFill:
+    """Original PaperBroker behaviour: full size at the touch, no latency, no costs."""
+
+    def __init__(self, tick_size: float):
+        self.tick_size = tick_size
+
+    def observe(self, q: Quote):
+        pass
+
+    def fill(self, buy: bool, qty: int, q: Quote, sweep: bool = False) -> FillResult:
+        return FillResult(price=q.ask if buy else q.bid, qty=qty, commission=0.0, slippage_ticks=0.0)
+
+
+class SimFill:
+    """
+    Cheap paper-fill model for fast tapes (O(levels) per order, O(1) per quote):
+
+    - latency: the touch drifts by mid velocity (EWMA, ticks/s) x latency before the order lands
+    - spread: extra slippage of `slip_per_spread_tick` ticks for every tick of spread above 1
+    - depth: a flat book of `depth_per_level` lots per tick level; entries are marketable limits
+      that stop after `max_levels` (partial fill), exits sweep until done
+    - commission per contract per side
+    """
+
+    def __init__(
+        self,
+        tick_size: float,
+        latency_ms: float = 50.0,
+        slip_per_spread_tick: float = 0.5,
+        depth_per_level: int = 5,
+        max_levels: int = 3,
+        commission_per_contract: float = 0.0,
+        velocity_halflife_sec: float = 1.0,
+    ):
+        self.tick_size = tick_size
+        self.latency_sec = latency_ms / 1000.0
+        self.slip_per_spread_tick = slip_per_spread_tick
+        self.depth_per_level = max(1, int(depth_per_level))
+        self.max_levels = max(1, int(max_levels))
+        self.commission = commission_per_contract
+        self.halflife = max(velocity_halflife_sec, 1e-6)
+        self.velocity = 0.0  # ticks/s, signed
+        self._mid: float | None = None
+        self._ts = 0.0
+
+    def observe(self, q: Quote):
+        mid = 0.5 * (q.bid + q.ask)
+        if self._mid is not None:
+            dt = q.ts - self._ts
+            if dt > 0:
+                v = (mid - self._mid) / self.tick_size / dt
+                a = 1.0 - math.exp(-dt * math.log(2) / self.halflife)
+                self.velocity += a * (v - self.velocity)
+        self._mid = mid
+        self._ts = q.ts
+
+    def fill(self, buy: bool, qty: int, q: Quote, sweep: bool = False) -> FillResult:
+        t = self.tick_size
+        touch = q.ask if buy else q.bid
+        sign = 1.0 if buy else -1.0
+
+        # where the touch is when the order arrives + spread-dependent slippage (ticks, + = worse)
+        drift = sign * self.velocity * self.latency_sec
+        spread_slip = self.slip_per_spread_tick * max(0, q.spread_ticks - 1)
+        start = drift + spread_slip
+
+        # walk the flat book level by level
+        levels = math.ceil(qty / self.depth_per_level)
+        if not sweep:
+            levels = min(levels, self.max_levels)
+        filled = min(qty, levels * self.depth_per_level)
+        full = filled // self.depth_per_level
+        rest = filled - full * self.depth_per_level
+        # sum over full levels of (start + k) * depth, k = 0..full-1, plus the partial level
+        cost_ticks = self.depth_per_level * (full * start + full * (full - 1) / 2.0) + rest * (start + full)
+        avg_ticks = cost_ticks / filled if filled else 0.0
+
+        return FillResult(
+            price=touch + sign * avg_ticks * t,
+            qty=filled,
+            commission=self.commission * filled,
+            slippage_ticks=avg_ticks,
+        )
+
+
+def make_fill_model(cfg) -> TouchFill | SimFill:
+    f = cfg.fills
+    t = cfg.engine.tick_size
+    if f.model == "sim":
+        return SimFill(
+            t,
+            latency_ms=f.latency_ms,
+            slip_per_spread_tick=f.slip_per_spread_tick,
+            depth_per_level=f.depth_per_level,
+            max_levels=f.max_levels,
+            commission_per_contract=f.commission_per_contract,
+            velocity_halflife_sec=f.velocity_halflife_sec,
+        )
+    return TouchFill(t)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+import asyncio
+import threading
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+
+from engine.bus import SharedBus, Quote, EngineSnapshot, DEFAULT_CONTROLS
+from engine.clock import Clock, WALL_CLOCK
+from engine.config import Config
+from engine.engine import TradingEngine
+from engine.logger import Logger, engine_logger
+from engine.runtime import AsyncEngineRuntime
+from data.recorder import QuoteRecorder, RecorderSink
+
+
+def _per_symbol_path(path: str | None, symbol: str) -> str | None:
+    if not path:
+        return path
+    p = Path(path)
+    return str(p.with_name(f"{p.stem}_{symbol}{p.suffix}"))
+
+
+def symbol_config(base: Config, symbol: str, overrides: dict[str, Any] | None) -> Config:
+    """Base config + `symbols: {SYM: {section: {key: value}}}` overrides; files get a per-symbol name."""
+    params: dict[str, Any] = {
+        "engine.log_path": _per_symbol_path(base.engine.log_path, symbol),
+        "engine.journal_path": _per_symbol_path(base.engine.journal_path, symbol),
+        "engine.metrics_path": _per_symbol_path(base.engine.metrics_path, symbol),
+        "engine.record_path": _per_symbol_path(base.engine.record_path, symbol),
+    }
+    for section, kv in (overrides or {}).items():
+        if section == "feed":
+            continue
+        if not isinstance(kv, dict):
+            raise ValueError(f"symbols.{symbol}.{section} must be a mapping")
+        for k, v in kv.items():
+            params[f"{section}.{k}"] = v
+    d = base.override(params).to_dict()
+    d["symbol"] = symbol
+    return Config.from_dict(d)
+
+
+class MarketDispatcher:
+    """One market-data entry point for every engine: routes (symbol, quote) to that engine's bus."""
+
+    def __init__(self):
+        self._buses: dict[str, SharedBus] = {}
+
+    def register(self, symbol: str, bus: SharedBus):
+        self._buses[symbol] = bus
+
+    def dispatch(self, symbol: str, quote: Quote) -> bool:
+        bus = self._buses.get(symbol)
+        if bus is None:
+            return False
+        bus.set_quote(quote)
+        return True
+
+
+class RiskAggregator:
+    """
+    Combined max_daily_loss across engines (realized + unrealized).
+    Kept incrementally from each engine's snapshot, O(1) per tick; a breach KILLs every engine.
+    """
+
+    def __init__(self, max_daily_loss: float, log: Logger | None = None):
+        self.max_daily_loss = float(max_daily_loss)
+        self.log = log
+        self.total_pnl = 0.0
+        self.halted = False
+        self._pnl: dict[str, float] = {}
+        self._buses: dict[str, SharedBus] = {}
+        self._lock = threading.Lock()
+
+    def register(self, symbol: str, bus: SharedBus):
+        self._buses[symbol] = bus
+        self._pnl[symbol] = 0.0
+        bus.subscribe("snapshot", partial(self._on_snapshot, symbol))
+
+    def _on_snapshot(self, symbol: str, snap: EngineSnapshot):
+        pnl = snap.realized_pnl + snap.unrealized_pnl
+        with self._lock:
+            self.total_pnl += pnl - self._pnl[symbol]
+            self._pnl[symbol] = pnl
+            breach = not self.halted and self.total_pnl <= -self.max_daily_loss
+            if breach:
+                self.halted = True
+        if breach:
+            if self.log is not None:
+                self.log.warn(f"COMBINED MAX_DAILY_LOSS: total={self.total_pnl:.2f} -> KILL all")
+            for b in self._buses.values():
+                b.set_controls({"kill": True})
+
+    def reset(self):
+        with self._lock:
+            self.halted = False
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            return {"total_pnl": self.total_pnl, "max_daily_loss": self.max_daily_loss,
+                    "halted": self.halted, "by_symbol": dict(self._pnl)}
+
+
+class EngineHost:
+    """
+    N TradingEngines keyed by symbol in one process and one asyncio loop (no thread per engine).
+    Each engine keeps its own bus/broker/journal; they share the dispatcher, the risk aggregator,
+    one log file (lines tagged [SYM]) and one recorder writer thread.
+    """
+
+    def __init__(
+        self,
+        cfg: Config,
+        symbols: dict[str, dict[str, Any] | None] | None = None,
+        clock: Clock | None = None,
+        combined_max_daily_loss: float | None = None,
+    ):
+        self.cfg = cfg
+        self.clock = clock or WALL_CLOCK
+        symbols = symbols if symbols else {cfg.symbol: None}
+        self.log: Logger = engine_logger(cfg.engine, _per_symbol_path(cfg.engine.log_path, "host"))
+        self.dispatcher = MarketDispatcher()
+        self.risk = RiskAggregator(
+            combined_max_daily_loss if combined_max_daily_loss is not None else cfg.risk.max_daily_loss,
+            log=self.log,
+        )
+        self.buses: dict[str, SharedBus] = {}
+        self.engines: dict[str, TradingEngine] = {}
+        self.recorders: dict[str, QuoteRecorder] = {}
+        self.record_sink: RecorderSink | None = None
+        self.feed_params: dict[str, dict[str, Any]] = {}
+        for sym, ov in symbols.items():
+            scfg = symbol_config(cfg, sym, ov)
+            bus = SharedBus()
+            bus.set_controls(dict(DEFAULT_CONTROLS))
+            self.buses[sym] = bus
+            self.engines[sym] = TradingEngine(scfg, bus, clock=self.clock, log=self.log.tagged(sym))
+            if scfg.engine.record_path:
+                if self.record_sink is None:
+                    self.record_sink = RecorderSink(log=self.log)
+                self.recorders[sym] = QuoteRecorder(scfg.engine.record_path, sink=self.record_sink)
+                self.recorders[sym].attach(bus)
+            self.dispatcher.register(sym, bus)
+            self.risk.register(sym, bus)
+            self.feed_params[sym] = dict((ov or {}).get("feed") or {})
+        self.runtimes: dict[str, AsyncEngineRuntime] = {}
+
+    @classmethod
+    def from_config(cls, cfg: Config, clock: Clock | None = None) -> "EngineHost":
+        host = cfg.section("host")
+        return cls(cfg, cfg.section("symbols"), clock=clock, combined_max_daily_loss=host.get("max_daily_loss"))
+
+    # ---------------- controls / snapshots ----------------
+    def set_controls(self, controls: dict[str, Any]):
+        """{"symbol": "RB", ...} targets one engine; without "symbol" it goes to all of them."""
+        d = dict(controls)
+        sym = d.pop("symbol", None)
+        targets = [self.buses[sym]] if sym in self.buses else ([] if sym else list(self.buses.values()))
+        for b in targets:
+            b.set_controls(d)
+
+    def get_controls(self) -> dict[str, Any]:
+        return {sym: b.get_controls() for sym, b in self.buses.items()}
+
+    def snapshot(self) -> dict[str, Any]:
+        out: dict[str, Any] = {"risk": self.risk.summary(), "symbols": {}}
+        for sym, b in self.buses.items():
+            s = b.get_snapshot()
+            if s is not None:
+                out["symbols"][sym] = s.to_dict()
+        return out
+
+    # ---------------- run ----------------
+    async def run(self, on_snapshot: Callable[[dict[str, Any]], None] | None = None, publish_hz: float = 4.0):
+        self.runtimes = {sym: AsyncEngineRuntime(e, self.buses[sym]) for sym, e in self.engines.items()}
+        tasks = [asyncio.create_task(rt.run()) for rt in self.runtimes.values()]
+        if on_snapshot is not None:
+            async def publish():
+                while True:
+                    on_snapshot(self.snapshot())
+                    await asyncio.sleep(1.0 / publish_hz)
+            tasks.append(asyncio.create_task(publish()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    def stop(self):
+        for rt in self.runtimes.values():
+            rt.stop()
+
+    def close(self):
+        for r in self.recorders.values():
+            r.close()
+        if self.record_sink is not None:
+            self.record_sink.close()
+        for e in self.engines.values():
+            e.close()
+        self.log.close()
+
+
+async def pump_feeds(feeds: dict[str, Any], dispatcher: MarketDispatcher, hz: float):
+    """One task polls every pull-style feed and hands quotes to the dispatcher."""
+    dt = 1.0 / max(hz, 1e-9)
+    while True:
+        for sym, feed in feeds.items():
+            q = feed.next_quote()
+            if q is not None:
+                dispatcher.dispatch(sym, q)
+        await asyncio.sleep(dt)
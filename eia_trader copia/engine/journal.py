@@ -0,0 +1,163 @@
+from __future__ import annotations
+import mmap
+import struct
+import time
+from datetime import datetime, timedelta
+from enum import IntEnum
+from pathlib import Path
+from typing import Iterator
+
+# Append-only tick decision journal: one fixed-width record per TradingEngine.tick().
+# File = 16-byte header + N records, little-endian, so it can be np.memmap'ed directly.
+
+MAGIC = b"EIAJ"
+VERSION = 1
+HEADER = struct.Struct("<4sHHQ")  # magic, version, record size, t0 (epoch ms of the first record, engine clock)
+RECORD = struct.Struct("<ddddiiffBBBB")
+FIELDS = (
+    "ts", "last", "bid", "ask", "spread_ticks", "move_ticks",
+    "velocity", "vol_ticks", "state", "label", "gate", "side",
+)
+
+STATES = ("IDLE", "ARMED", "IN_TRADE", "COOLDOWN", "HALT")
+LABELS = ("NEUTRAL", "SIGNIF", "SHOCK")
+SIDES = ("FLAT", "LONG", "SHORT")
+STATE_CODE = {s: i for i, s in enumerate(STATES)}
+LABEL_CODE = {s: i for i, s in enumerate(LABELS)}
+SIDE_CODE = {s: i for i, s in enumerate(SIDES)}
+
+
+class Gate(IntEnum):
+    """Which branch of tick() decided this tick (the structured twin of reject_reason)."""
+    NONE = 0
+    KILL = 1
+    FLATTEN = 2
+    MAX_DAILY_LOSS = 3
+    ARM_OFF = 4
+    COOLDOWN = 5
+    SPREAD = 6
+    NO_EVENT = 7
+    EVENT_START = 8
+    MAX_TRADES = 9
+    NEUTRAL = 10
+    CONFIRM_EXPIRED = 11
+    RANGE_BUILD = 12
+    RANGE_BUILT = 13
+    IMPULSE = 14
+    VELOCITY = 15
+    PERSISTENCE = 16
+    BREAKOUT = 17
+    RETRACE = 18
+    ENTER = 19
+    MANAGING = 20
+    EXIT_FAIL_FAST = 21
+    EXIT_NO_FOLLOW = 22
+    EXIT_TRAIL = 23
+    EXIT_BREAKEVEN = 24
+    EXIT_TIME = 25
+
+
+def _next_midnight(ts: float) -> float:
+    d = datetime.fromtimestamp(ts).date() + timedelta(days=1)
+    return datetime(d.year, d.month, d.day).timestamp()
+
+
+class TickJournal:
+    """
+    Buffered writer: records are packed into a preallocated buffer and hit the disk in blocks.
+    path: strftime template (e.g. logs/journal_%Y%m%d.bin) resolved from each record's ts, so the
+    file rolls at the (local) day boundary of the engine clock, simulated or not.
+    """
+
+    def __init__(self, path: str | Path, buffer_records: int = 4096, flush_sec: float = 1.0):
+        self.template = str(path)
+        self.path: Path | None = None
+        self._f = None
+        self._roll_at = float("-inf")
+        self._buf = bytearray(RECORD.size * buffer_records)
+        self._cap = buffer_records
+        self._n = 0
+        self._flush_sec = flush_sec
+        self._last_flush = time.monotonic()
+
+    def _roll(self, ts: float):
+        self._roll_at = _next_midnight(ts)
+        path = Path(datetime.fromtimestamp(ts).strftime(self.template))
+        if path == self.path:
+            return
+        if self._f is not None:
+            self.flush()
+            self._f.close()
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        new = not path.exists() or path.stat().st_size == 0
+        self._f = path.open("ab")
+        if new:
+            self._f.write(HEADER.pack(MAGIC, VERSION, RECORD.size, int(ts * 1000)))
+        else:
+            _check_header(path)
+
+    def append(self, ts, last, bid, ask, spread_ticks, move_ticks, velocity, vol_ticks, state, label, gate, side):
+        if ts >= self._roll_at:
+            self._roll(ts)
+        RECORD.pack_into(
+            self._buf, self._n * RECORD.size,
+            ts, last, bid, ask, spread_ticks, move_ticks, velocity, vol_ticks, state, label, gate, side,
+        )
+        self._n += 1
+        if self._n >= self._cap or time.monotonic() - self._last_flush >= self._flush_sec:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if self._f is None:
+            return
+        if self._n:
+            self._f.write(memoryview(self._buf)[: self._n * RECORD.size])
+            self._n = 0
+        self._f.flush()
+
+    def close(self):
+        if self._f is None or self._f.closed:
+            return
+        self.flush()
+        self._f.close()
+
+
+# ---------------- readers ----------------
+def _check_header(path: Path) -> None:
+    with path.open("rb") as f:
+        magic, version, rsize, _ = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or rsize != RECORD.size:
+        raise ValueError(f"{path}: not a tick journal (or incompatible record size {rsize})")
+    if version != VERSION:
+        raise ValueError(f"{path}: journal version {version}, expected {VERSION}")
+
+
+def iter_records(path: str | Path) -> Iterator[dict]:
+    """Pure-python reader (mmap + struct), one dict per record with decoded enums."""
+    p = Path(path)
+    _check_header(p)
+    with p.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        end = HEADER.size + (len(mm) - HEADER.size) // RECORD.size * RECORD.size
+        for vals in RECORD.iter_unpack(mm[HEADER.size:end]):
+            d = dict(zip(FIELDS, vals))
+            d["state"] = STATES[d["state"]]
+            d["label"] = LABELS[d["label"]]
+            d["gate"] = Gate(d["gate"]).name
+            d["side"] = SIDES[d["side"]]
+            yield d
+
+
+def load_journal(path: str | Path):
+    """Zero-copy np.memmap view with a structured dtype (needs numpy)."""
+    import numpy as np
+
+    p = Path(path)
+    _check_header(p)
+    dtype = np.dtype({
+        "names": list(FIELDS),
+        "formats": ["<f8", "<f8", "<f8", "<f8", "<i4", "<i4", "<f4", "<f4", "u1", "u1", "u1", "u1"],
+    })
+    n = (p.stat().st_size - HEADER.size) // dtype.itemsize
+    return np.memmap(p, dtype=dtype, mode="r", offset=HEADER.size, shape=(n,))
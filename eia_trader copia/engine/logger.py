@@ -1,19 +1,178 @@
 from __future__ import annotations
+import atexit
+import os
+import queue
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 
+_FLUSH = object()
+_STOP = object()
+
 
 class Logger:
-    def __init__(self, path: str):
+    """
+    Non-blocking file logger: info/warn/error only enqueue (ts, level, msg).
+    A background thread formats, writes in batches and rotates the file by size and/or age.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        rotate_sec: float | None = None,
+        flush_interval: float = 0.5,
+    ):
         self.path = Path(path)
         self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.backup_count = int(backup_count)
+        self.rotate_sec = rotate_sec
+        self.flush_interval = flush_interval
+
+        self._q: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self._f = None
+        self._opened_at = 0.0
 
+    # ---------------- producer side (hot path) ----------------
     def _write(self, level: str, msg: str):
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        line = f"{ts}\t{level}\t{msg}\n"
-        with self.path.open("a", encoding="utf-8") as f:
-            f.write(line)
+        if self._closed:
+            return
+        if self._thread is None:
+            self._start()
+        self._q.put((time.time(), level, msg))
 
     def info(self, msg: str): self._write("INFO", msg)
     def warn(self, msg: str): self._write("WARN", msg)
     def error(self, msg: str): self._write("ERROR", msg)
+
+    def tagged(self, tag: str) -> "TaggedLogger":
+        """Same file and writer thread, every line prefixed with [tag] (one engine of a host)."""
+        return TaggedLogger(self, tag)
+
+    def flush(self, timeout: float = 2.0):
+        """Block until everything logged so far is on disk (used on KILL/shutdown)."""
+        if self._thread is None or self._closed:
+            return
+        done = threading.Event()
+        self._q.put((_FLUSH, done))
+        done.wait(timeout)
+
+    def close(self, timeout: float = 2.0):
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._q.put((_STOP, None))
+            self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    # ---------------- writer thread ----------------
+    def _start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name=f"log:{self.path.name}", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        try:
+            while True:
+                try:
+                    item = self._q.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                lines: list[str] = []
+                waiters: list[threading.Event] = []
+                stop = False
+                while True:
+                    ts, x = item[0], item[1]
+                    if ts is _FLUSH:
+                        waiters.append(x)
+                    elif ts is _STOP:
+                        stop = True
+                    else:
+                        stamp = datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+                        lines.append(f"{stamp}\t{x}\t{item[2]}\n")
+                    try:
+                        item = self._q.get_nowait()
+                    except queue.Empty:
+                        break
+                if lines:
+                    self._emit("".join(lines))
+                for w in waiters:
+                    w.set()
+                if stop:
+                    return
+        finally:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+    def _emit(self, data: str):
+        if self._f is None:
+            self._open()
+        if self._f.tell() > 0 and self._should_rotate(len(data)):
+            self._rotate()
+        self._f.write(data)
+        self._f.flush()
+
+    def _open(self):
+        self._f = self.path.open("a", encoding="utf-8")
+        self._opened_at = time.time()
+
+    def _should_rotate(self, incoming: int) -> bool:
+        if not self.path.is_file():  # e.g. os.devnull
+            return False
+        if self.max_bytes > 0 and self._f.tell() + incoming > self.max_bytes:
+            return True
+        return self.rotate_sec is not None and time.time() - self._opened_at >= self.rotate_sec
+
+    def _rotate(self):
+        self._f.close()
+        self._f = None
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._open()
+
+
+class TaggedLogger:
+    """View of a shared Logger: prefixes the messages; close() leaves the shared file open."""
+
+    __slots__ = ("base", "prefix")
+
+    def __init__(self, base: Logger, tag: str):
+        self.base = base
+        self.prefix = f"[{tag}] "
+
+    def info(self, msg: str): self.base._write("INFO", self.prefix + msg)
+    def warn(self, msg: str): self.base._write("WARN", self.prefix + msg)
+    def error(self, msg: str): self.base._write("ERROR", self.prefix + msg)
+
+    def flush(self, timeout: float = 2.0):
+        self.base.flush(timeout)
+
+    def close(self, timeout: float = 2.0):
+        pass  # owned by whoever created the base Logger
+
+
+def engine_logger(ec, path: str | None = None) -> Logger:
+    """Logger with the `engine:` section's rotation settings (log_path unless `path`)."""
+    return Logger(
+        path or ec.log_path,
+        max_bytes=int(ec.log_max_mb * 1024 * 1024),
+        backup_count=ec.log_backups,
+        rotate_sec=ec.log_rotate_hours * 3600 if ec.log_rotate_hours else None,
+    )
@@ -0,0 +1,199 @@
+from __future__ import annotations
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+from engine.journal import Gate
+
+# In-process engine metrics: plain int counters and log2 histograms of nanoseconds.
+# Recording is a few list increments (bucket = ns.bit_length(), no float math, no allocation),
+# so it stays well under 1us per tick; percentiles/exports are computed only when read.
+
+BUCKETS = 40  # 2^39 ns ~ 9 min: anything slower lands in the last bucket
+REJECT_GATES = (Gate.IMPULSE, Gate.VELOCITY, Gate.PERSISTENCE, Gate.BREAKOUT, Gate.RETRACE)
+
+
+class Histogram:
+    """Counts per power-of-two bucket: bucket b holds values in [2^(b-1), 2^b) ns."""
+
+    __slots__ = ("counts", "n", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.n = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, ns: int):
+        self.counts[min(ns.bit_length(), BUCKETS - 1)] += 1
+        self.n += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, p: float) -> float:
+        """p-th percentile (ns), linear inside its bucket (as Prometheus' histogram_quantile)."""
+        if self.n == 0:
+            return 0.0
+        rank = p / 100.0 * self.n
+        seen = 0
+        for b, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                lo = (1 << (b - 1)) if b else 0
+                hi = min(1 << b, self.max) if b < BUCKETS - 1 else self.max
+                return float(lo + (max(hi, lo) - lo) * (rank - seen) / c)
+            seen += c
+        return float(self.max)
+
+    def summary_us(self) -> dict[str, float]:
+        if self.n == 0:
+            return {"n": 0}
+        return {
+            "n": self.n,
+            "mean": self.total / self.n / 1000.0,
+            "p50": self.percentile(50) / 1000.0,
+            "p99": self.percentile(99) / 1000.0,
+            "max": self.max / 1000.0,
+        }
+
+
+class EngineMetrics:
+    """
+    Counters + histograms for one TradingEngine:
+    - ticks decided by each Gate and the time tick() took, per gate
+    - loop jitter: observed loop period vs 1/loop_hz
+    - SharedBus lock wait (SharedBus.lock_wait: contended writer acquires only; reads never lock)
+
+    Per-gate buckets live in one flat list (gate * BUCKETS + bucket) so on_tick() is two
+    increments and a compare; per-gate counts and the all-ticks histogram are summed on read.
+    """
+
+    def __init__(self, loop_hz: float, bus_lock_wait: Histogram | None = None):
+        n = len(Gate)
+        self._buckets = [0] * (n * BUCKETS)
+        self._ns = [0] * n
+        self.max_ns = 0
+        self.period_ns = int(1e9 / loop_hz) if loop_hz > 0 else 0
+        self.jitter_hist = Histogram()
+        self.late = 0
+        self._last_loop = 0
+        self.bus_lock_wait = bus_lock_wait
+        self.started = time.time()
+
+    # ---------------- hot path ----------------
+    def on_tick(self, gate: int, ns: int):
+        b = ns.bit_length()
+        self._buckets[gate * BUCKETS + (b if b < BUCKETS else BUCKETS - 1)] += 1
+        self._ns[gate] += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def on_loop(self, now_ns: int | None = None):
+        """Call once per loop iteration (poll loop / feed pump) to measure jitter vs loop_hz."""
+        now = now_ns if now_ns is not None else time.perf_counter_ns()
+        last, self._last_loop = self._last_loop, now
+        if last == 0 or self.period_ns == 0:
+            return
+        dev = (now - last) - self.period_ns
+        if dev > 0:
+            self.late += 1
+        self.jitter_hist.record(dev if dev >= 0 else -dev)
+
+    # ---------------- read side ----------------
+    def gate_hist(self, gate: int) -> Histogram:
+        h = Histogram()
+        h.counts = self._buckets[gate * BUCKETS:(gate + 1) * BUCKETS]
+        h.n = sum(h.counts)
+        h.total = self._ns[gate]
+        top = max((b for b, c in enumerate(h.counts) if c), default=0)
+        h.max = min(1 << top, self.max_ns)  # per-gate max known only to its bucket
+        return h
+
+    def tick_hist(self) -> Histogram:
+        h = Histogram()
+        for g in range(len(Gate)):
+            row = self._buckets[g * BUCKETS:(g + 1) * BUCKETS]
+            h.counts = [a + b for a, b in zip(h.counts, row)]
+        h.n = sum(h.counts)
+        h.total = sum(self._ns)
+        h.max = self.max_ns
+        return h
+
+    def gate_count(self, gate: int) -> int:
+        return sum(self._buckets[gate * BUCKETS:(gate + 1) * BUCKETS])
+
+    def rejects(self) -> dict[str, int]:
+        return {g.name.lower(): self.gate_count(g) for g in REJECT_GATES}
+
+    def to_dict(self) -> dict[str, Any]:
+        th = self.tick_hist()
+        gates = {g: self.gate_hist(g) for g in Gate}
+        out: dict[str, Any] = {
+            "uptime_sec": round(time.time() - self.started, 1),
+            "ticks": th.n,
+            "tick_us": th.summary_us(),
+            "rejects": self.rejects(),
+            "gates": {g.name: h.summary_us() for g, h in gates.items() if h.n},
+            "loop_jitter_us": {**self.jitter_hist.summary_us(), "late": self.late, "period_ms": self.period_ns / 1e6},
+        }
+        if self.bus_lock_wait is not None:
+            out["bus_lock_wait_us"] = self.bus_lock_wait.summary_us()
+        return out
+
+    def summary(self) -> str:
+        t = self.tick_hist().summary_us()
+        if not t["n"]:
+            return "metrics: no ticks"
+        rej = " ".join(f"{k}={v}" for k, v in self.rejects().items())
+        j = self.jitter_hist.summary_us()
+        s = f"metrics ticks={t['n']} tick_us p50={t['p50']:.1f} p99={t['p99']:.1f} max={t['max']:.1f} rejects: {rej}"
+        if j["n"]:
+            s += f" jitter_ms p99={j['p99'] / 1000:.2f} late={self.late}"
+        w = self.bus_lock_wait
+        if w is not None and w.n:
+            s += f" bus_lock_waits={w.n} max_us={w.max / 1000:.1f}"
+        return s
+
+    def to_prometheus(self, prefix: str = "eia_engine", labels: str = "") -> str:
+        """Prometheus text exposition (for a node_exporter textfile collector or any local scraper)."""
+        lines: list[str] = []
+        lab = labels + "," if labels else ""
+
+        def hist(name: str, h: Histogram, extra: str = ""):
+            cum = 0
+            for b, c in enumerate(h.counts):
+                cum += c
+                if c or b == BUCKETS - 1:
+                    le = "+Inf" if b == BUCKETS - 1 else f"{(1 << b) / 1e9:.9g}"
+                    lines.append(f'{prefix}_{name}_seconds_bucket{{{lab}{extra}le="{le}"}} {cum}')
+            sel = "{" + (lab + extra).rstrip(",") + "}" if (lab or extra) else ""
+            lines.append(f"{prefix}_{name}_seconds_sum{sel} {h.total / 1e9:.9g}")
+            lines.append(f"{prefix}_{name}_seconds_count{sel} {h.n}")
+
+        gates = {g: self.gate_hist(g) for g in Gate}
+        lines.append(f"# TYPE {prefix}_gate_ticks_total counter")
+        for g, h in gates.items():
+            lines.append(f'{prefix}_gate_ticks_total{{{lab}gate="{g.name.lower()}"}} {h.n}')
+        lines.append(f"# TYPE {prefix}_tick_seconds histogram")
+        hist("tick", self.tick_hist())
+        lines.append(f"# TYPE {prefix}_gate_seconds histogram")
+        for g, h in gates.items():
+            if h.n:
+                hist("gate", h, f'gate="{g.name.lower()}",')
+        lines.append(f"# TYPE {prefix}_loop_jitter_seconds histogram")
+        hist("loop_jitter", self.jitter_hist)
+        lines.append(f"# TYPE {prefix}_loop_late_total counter")
+        lines.append(f"{prefix}_loop_late_total{('{' + labels + '}') if labels else ''} {self.late}")
+        if self.bus_lock_wait is not None:
+            lines.append(f"# TYPE {prefix}_bus_lock_wait_seconds histogram")
+            hist("bus_lock_wait", self.bus_lock_wait)
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str | Path, labels: str = ""):
+        """Atomic write of the Prometheus text file (a scraper never sees half a file)."""
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(p.name + ".tmp")
+        tmp.write_text(self.to_prometheus(labels=labels), encoding="utf-8")
+        os.replace(tmp, p)
@@ -0,0 +1,304 @@
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+# Model registry: one directory with a manifest and one artifact per model version.
+#
+# <root>/manifest.json               -> name -> versions: features, training window, metrics, sha256
+# <root>/<name>/v<N>/model.joblib    -> sklearn model, uncompressed (joblib.load(mmap_mode="r"))
+# <root>/<name>/v<N>/kernel/         -> compiled TreeKernel as .npy files (np.load(mmap_mode="r"))
+#
+# The engine opens only the manifest at startup. lazy() returns a LazyModel that knows its
+# feature list from the manifest; the artifact is read on first get(), after checking its
+# sha256 and that it was trained on exactly the manifest's features.
+
+FORMAT = 1
+MANIFEST = "manifest.json"
+FORMATS = ("joblib", "kernel")
+
+
+def sha256_path(path: str | Path) -> str:
+    """sha256 of a file, or of every file in a directory (relative names included, sorted)."""
+    p = Path(path)
+    h = hashlib.sha256()
+    files = sorted(f for f in p.rglob("*") if f.is_file()) if p.is_dir() else [p]
+    for f in files:
+        if p.is_dir():
+            h.update(f.relative_to(p).as_posix().encode() + b"\0")
+        with open(f, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def model_hash(model: Any) -> str:
+    """
+    sha256 of a fitted model's content: type, attributes and arrays (dtype, shape, bytes), walked
+    in a fixed order. Unlike the pickle bytes it is the same for the same model in any process.
+    """
+    import numpy as np
+
+    h = hashlib.sha256()
+    seen: set[int] = set()
+
+    def walk(o):
+        if isinstance(o, np.ndarray):
+            if o.dtype.names:
+                # field by field: the padding bytes of a structured array are not initialized
+                h.update(f"R{o.shape}".encode())
+                for f in o.dtype.names:
+                    walk(f)
+                    walk(o[f])
+            elif o.dtype.hasobject:
+                h.update(b"O" + repr(o.shape).encode())
+                for x in o.ravel():
+                    walk(x)
+            else:
+                h.update(f"A{o.dtype.str}{o.shape}".encode())
+                h.update(np.ascontiguousarray(o).tobytes())
+        elif o is None or isinstance(o, (bool, int, float, str, bytes, np.generic)):
+            h.update(f"{type(o).__name__}:{o!r}".encode())
+        elif isinstance(o, (list, tuple)):
+            h.update(f"{type(o).__name__}[{len(o)}".encode())
+            for x in o:
+                walk(x)
+        elif isinstance(o, dict):
+            h.update(f"dict[{len(o)}".encode())
+            for k in sorted(o, key=str):
+                walk(k)
+                walk(o[k])
+        else:
+            if id(o) in seen:
+                h.update(b"<ref>")
+                return
+            seen.add(id(o))
+            h.update(f"{type(o).__module__}.{type(o).__qualname__}".encode())
+            if hasattr(o, "__dict__"):
+                state = vars(o)
+            elif hasattr(o, "__getstate__"):
+                state = o.__getstate__()
+            else:
+                state = o.__reduce__()[1:]
+            walk(state)
+
+    walk(model)
+    return h.hexdigest()
+
+
+def _size(p: Path) -> int:
+    return sum(f.stat().st_size for f in p.rglob("*") if f.is_file()) if p.is_dir() else p.stat().st_size
+
+
+def model_features(m) -> list[str] | None:
+    names = getattr(m, "feature_names_in_", None)
+    return None if names is None else [str(c) for c in names]
+
+
+def _load_artifact(path: Path, fmt: str):
+    if fmt == "kernel":
+        from engine.tree_kernel import TreeKernel
+        return TreeKernel.load(path, mmap=True)
+    import joblib
+    return joblib.load(path, mmap_mode="r")
+
+
+class LazyModel:
+    """Stand-in for a registry model: feature_names_in_ from the manifest, artifact loaded on get()."""
+
+    def __init__(self, registry: "ModelRegistry", name: str, version: int, entry: dict[str, Any]):
+        self.registry = registry
+        self.name = name
+        self.version = version
+        self.entry = entry
+        self.feature_names_in_ = list(entry["features"])
+        self.n_features_in_ = len(self.feature_names_in_)
+        self.load_ms = 0.0
+        self._model: Any = None
+        self._lock = threading.Lock()
+
+    @property
+    def ref(self) -> str:
+        return f"{self.name}@v{self.version}"
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def get(self):
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                t0 = time.perf_counter()
+                self._model = self.registry.load(self.name, self.version)
+                self.load_ms = (time.perf_counter() - t0) * 1000.0
+        return self._model
+
+
+class ModelRegistry:
+    def __init__(self, root: str | Path = "models"):
+        self.root = Path(root)
+        self._path = self.root / MANIFEST
+        self._manifest = self._load()
+
+    # ---------------- manifest ----------------
+    def _load(self) -> dict[str, Any]:
+        if not self._path.exists():
+            return {"format": FORMAT, "models": {}}
+        m = json.loads(self._path.read_text(encoding="utf-8"))
+        if m.get("format") != FORMAT:
+            raise ValueError(f"registry: manifest format {m.get('format')} (expected {FORMAT})")
+        return m
+
+    def _save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self._path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._manifest, indent=1), encoding="utf-8")
+        os.replace(tmp, self._path)
+
+    def names(self) -> list[str]:
+        return sorted(self._manifest["models"])
+
+    def versions(self, name: str) -> list[int]:
+        return sorted(int(v) for v in self._model_entry(name)["versions"])
+
+    def _model_entry(self, name: str) -> dict[str, Any]:
+        try:
+            return self._manifest["models"][name]
+        except KeyError:
+            raise KeyError(f"registry: unknown model '{name}' (have: {', '.join(self.names()) or 'none'})") from None
+
+    def resolve(self, ref: str) -> tuple[str, int, dict[str, Any]]:
+        """'rf' (latest) or 'rf@v2' / 'rf@2' -> (name, version, entry)."""
+        name, _, ver = ref.partition("@")
+        m = self._model_entry(name)
+        v = int(ver.lstrip("v")) if ver else int(m["latest"])
+        if str(v) not in m["versions"]:
+            raise KeyError(f"registry: {name} has no version {v} (have: {self.versions(name)})")
+        return name, v, m["versions"][str(v)]
+
+    def entry(self, ref: str) -> dict[str, Any]:
+        return self.resolve(ref)[2]
+
+    def _dir(self, name: str, version: int) -> Path:
+        return self.root / name / f"v{version}"
+
+    def artifact(self, name: str, version: int) -> Path:
+        e = self._model_entry(name)["versions"][str(version)]
+        return self._dir(name, version) / e["file"]
+
+    # ---------------- add ----------------
+    def add(
+        self,
+        name: str,
+        model: Any,
+        features: list[str] | None = None,
+        fmt: str = "joblib",
+        train_start: str | None = None,
+        train_end: str | None = None,
+        metrics: dict[str, float] | None = None,
+        source: str = "",
+        note: str = "",
+    ) -> int:
+        """New version of `name` (or the existing one if the same model was already added in this format)."""
+        if fmt not in FORMATS:
+            raise ValueError(f"registry: format {fmt!r} (expected one of {FORMATS})")
+        own = model_features(model)
+        if features is None:
+            features = own
+        if not features:
+            raise ValueError(f"registry: {name} has no feature_names_in_; pass `features`")
+        features = [str(c) for c in features]
+        if own is not None and own != features:
+            raise ValueError(f"registry: {name} was fitted on {own}, not the given features")
+        n = getattr(model, "n_features_in_", len(features))
+        if n != len(features):
+            raise ValueError(f"registry: {name} expects {n} features, {len(features)} given")
+
+        model_type = type(model).__name__
+        content = model_hash(model)
+        m = self._manifest["models"].setdefault(name, {"latest": 0, "versions": {}})
+        for v, e in m["versions"].items():
+            if e.get("content_sha256") == content and e["format"] == fmt and e["features"] == features:
+                return int(v)
+
+        if fmt == "kernel" and model_type != "TreeKernel":
+            from engine.tree_kernel import compile_model
+            model = compile_model(model, features)
+
+        version = max([int(v) for v in m["versions"]] + [0]) + 1
+        d = self._dir(name, version)
+        if d.exists():
+            shutil.rmtree(d)  # leftover of an interrupted add
+        d.mkdir(parents=True)
+        if fmt == "kernel":
+            file = "kernel"
+            model.save(d / file)
+        else:
+            import joblib
+            file = "model.joblib"
+            joblib.dump(model, d / file)  # uncompressed: arrays can be memory-mapped on load
+        checksum = sha256_path(d / file)
+
+        m["versions"][str(version)] = {
+            "file": file,
+            "format": fmt,
+            "sha256": checksum,
+            "content_sha256": content,
+            "bytes": _size(d / file),
+            "features": features,
+            "model_type": model_type,
+            "train_start": train_start,
+            "train_end": train_end,
+            "metrics": dict(metrics or {}),
+            "source": source,
+            "note": note,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        m["latest"] = version
+        self._save()
+        return version
+
+    # ---------------- load ----------------
+    def verify(self, name: str, version: int) -> str | None:
+        """None if the artifact matches its manifest checksum, else the reason."""
+        e = self._model_entry(name)["versions"][str(version)]
+        p = self.artifact(name, version)
+        if not p.exists():
+            return f"missing artifact {p}"
+        got = sha256_path(p)
+        if got != e["sha256"]:
+            return f"checksum mismatch ({got[:12]} != {e['sha256'][:12]})"
+        return None
+
+    def load(self, name: str, version: int | None = None):
+        """Verified artifact (checksum + fitted feature list == manifest)."""
+        if version is None:
+            name, version, _ = self.resolve(name)
+        e = self._model_entry(name)["versions"][str(version)]
+        err = self.verify(name, version)
+        if err is not None:
+            raise ValueError(f"registry: {name}@v{version}: {err}")
+        m = _load_artifact(self.artifact(name, version), e["format"])
+        own = model_features(m)
+        if own is not None and own != e["features"]:
+            raise ValueError(f"registry: {name}@v{version} artifact was fitted on a different feature set")
+        return m
+
+    def lazy(self, ref: str, available: list[str] | None = None) -> LazyModel:
+        """
+        LazyModel for `ref`. `available`: the features the release parser produces; a model
+        that needs anything else is rejected here, before its artifact is ever read.
+        """
+        name, version, e = self.resolve(ref)
+        if available is not None:
+            missing = [c for c in e["features"] if c not in set(available)]
+            if missing:
+                raise ValueError(f"registry: {name}@v{version} needs features not in feature_set: {', '.join(missing)}")
+        return LazyModel(self, name, version, e)
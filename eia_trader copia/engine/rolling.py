@@ -0,0 +1,155 @@
+from __future__ import annotations
+import math
+from collections import deque
+
+
+class RollingMinMax:
+    """Sliding-window high/low with monotonic deques: amortized O(1) per push."""
+
+    def __init__(self, window: int):
+        self.window = int(window)
+        self._i = 0
+        self._hi: deque[tuple[int, float]] = deque()
+        self._lo: deque[tuple[int, float]] = deque()
+
+    def push(self, x: float):
+        i = self._i
+        self._i += 1
+        while self._hi and self._hi[-1][1] <= x:
+            self._hi.pop()
+        self._hi.append((i, x))
+        while self._lo and self._lo[-1][1] >= x:
+            self._lo.pop()
+        self._lo.append((i, x))
+        cut = i - self.window
+        if self._hi[0][0] <= cut:
+            self._hi.popleft()
+        if self._lo[0][0] <= cut:
+            self._lo.popleft()
+
+    @property
+    def high(self) -> float | None:
+        return self._hi[0][1] if self._hi else None
+
+    @property
+    def low(self) -> float | None:
+        return self._lo[0][1] if self._lo else None
+
+
+class RollingWindow:
+    """
+    Price ring buffer with O(1) statistics per quote.
+
+    - vol(w): population std of the last w-1 price changes, for any w <= maxlen
+      (ring of prefix sums of diff and diff^2; rebased once per wrap to bound float drift)
+    - up_run / down_run: consecutive strict up/down moves ending at the last price
+    - range_high/low(w): high/low of the last w prices; windows in `ranges` are tracked from
+      the start, any other w <= maxlen gets its own tracker on first use (seeded from the ring)
+    """
+
+    def __init__(self, maxlen: int = 60, ranges: tuple[int, ...] = ()):
+        self.maxlen = max(2, int(maxlen))
+        self.n = 0          # prices currently in the window (<= maxlen)
+        self.total = 0      # prices ever pushed
+        self.up_run = 0
+        self.down_run = 0
+        self._px = [0.0] * self.maxlen
+        # prefix sums of diffs, indexed like _px: _s[k] = sum of diffs up to price k
+        self._s = [0.0] * self.maxlen
+        self._ss = [0.0] * self.maxlen
+        self._last = 0.0
+        self._mm = {int(w): RollingMinMax(w) for w in ranges}
+
+    def __len__(self) -> int:
+        return self.n
+
+    def push(self, x: float):
+        k = self.total % self.maxlen
+        if self.total == 0:
+            s = ss = 0.0
+        else:
+            d = x - self._last
+            prev = (k - 1) % self.maxlen
+            s = self._s[prev] + d
+            ss = self._ss[prev] + d * d
+            if d > 0:
+                self.up_run += 1
+                self.down_run = 0
+            elif d < 0:
+                self.down_run += 1
+                self.up_run = 0
+            else:
+                self.up_run = self.down_run = 0
+        self._px[k] = x
+        self._s[k] = s
+        self._ss[k] = ss
+        self._last = x
+        self.total += 1
+        if self.n < self.maxlen:
+            self.n += 1
+        if k == self.maxlen - 1:
+            self._rebase()
+        for mm in self._mm.values():
+            mm.push(x)
+
+    def _rebase(self):
+        # once per wrap: restart prefix sums from the oldest price (O(maxlen) / maxlen pushes)
+        base_s, base_ss = self._s[0], self._ss[0]
+        for i in range(self.maxlen):
+            self._s[i] -= base_s
+            self._ss[i] -= base_ss
+
+    @property
+    def last(self) -> float:
+        return self._last
+
+    def tail(self, k: int) -> list[float]:
+        """Last k prices, oldest first (O(k); for debugging/UI, not the hot path)."""
+        k = min(k, self.n)
+        end = self.total
+        return [self._px[i % self.maxlen] for i in range(end - k, end)]
+
+    def vol(self, w: int) -> float:
+        """pstdev of the price changes inside the last min(w, n) prices."""
+        m = min(int(w), self.n) - 1
+        if m < 1:
+            return 0.0
+        j = (self.total - 1) % self.maxlen
+        i = (self.total - 1 - m) % self.maxlen
+        s = self._s[j] - self._s[i]
+        ss = self._ss[j] - self._ss[i]
+        mean = s / m
+        var = ss / m - mean * mean
+        # cancellation noise when all changes are equal: that is zero vol
+        if var <= 1e-12 * (ss / m):
+            return 0.0
+        return math.sqrt(var)
+
+    def persistence(self, side: str, n: int) -> bool:
+        """Last n prices strictly increasing (LONG) / decreasing (SHORT)."""
+        if n <= 1:
+            return True
+        if self.n < n:
+            return False
+        return (self.up_run if side == "LONG" else self.down_run) >= n - 1
+
+    def range_high(self, w: int) -> float | None:
+        return self._minmax(w).high
+
+    def range_low(self, w: int) -> float | None:
+        return self._minmax(w).low
+
+    def _minmax(self, w: int) -> RollingMinMax:
+        mm = self._mm.get(w)
+        if mm is not None:
+            return mm
+        w = int(w)
+        if not 1 <= w <= self.maxlen:
+            raise ValueError(
+                f"range window {w}: must be 1..{self.maxlen} (maxlen) or one of ranges={sorted(self._mm)}"
+            )
+        mm = RollingMinMax(w)
+        for x in self.tail(w):
+            mm.push(x)
+        self._mm[w] = mm
+        return mm
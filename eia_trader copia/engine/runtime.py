@@ -0,0 +1,169 @@
+from __future__ import annotations
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable
+
+from engine.bus import SharedBus, EngineSnapshot
+from engine.engine import TradingEngine
+
+
+class LatencyStats:
+    """Rolling tick-to-decision latency samples (seconds)."""
+
+    def __init__(self, maxlen: int = 10_000):
+        self.samples: deque[float] = deque(maxlen=maxlen)
+        self.count = 0
+
+    def add(self, dt: float):
+        self.samples.append(dt)
+        self.count += 1
+
+    def percentiles(self, ps: tuple[float, ...] = (50, 90, 99)) -> dict[str, float]:
+        """Milliseconds; nearest-rank on the current window."""
+        if not self.samples:
+            return {}
+        xs = sorted(self.samples)
+        out = {f"p{int(p)}": xs[min(len(xs) - 1, int(round(p / 100.0 * (len(xs) - 1))))] * 1000.0 for p in ps}
+        out["max"] = xs[-1] * 1000.0
+        return out
+
+    def summary(self) -> str:
+        pc = self.percentiles()
+        if not pc:
+            return "latency: no samples"
+        return "latency ms " + " ".join(f"{k}={v:.3f}" for k, v in pc.items()) + f" n={self.count}"
+
+
+class SnapshotThrottle:
+    """Hands out the bus snapshot only when its version moved, at most `hz` times per second (0 = no cap)."""
+
+    def __init__(self, bus: SharedBus, hz: float):
+        self.bus = bus
+        self.hz = hz
+        self._seen = 0
+        self._next = 0.0
+
+    def poll(self, now: float | None = None) -> EngineSnapshot | None:
+        v = self.bus.version("snapshot")
+        if v == self._seen:
+            return None
+        now = time.monotonic() if now is None else now
+        if now < self._next:
+            return None
+        self._seen = v
+        self._next = now + (1.0 / self.hz if self.hz > 0 else 0.0)
+        return self.bus.get_snapshot()
+
+    def due_in(self, now: float) -> float | None:
+        """Seconds until a held-back snapshot may go out (None: nothing held back)."""
+        if self.bus.version("snapshot") == self._seen:
+            return None
+        return max(0.0, self._next - now)
+
+
+class AsyncEngineRuntime:
+    """
+    Event-driven loop: a quote or control change on the bus wakes the engine immediately.
+    A timer armed on engine.next_deadline() still fires time-based exits/expiries with no new quote.
+    """
+
+    def __init__(
+        self,
+        engine: TradingEngine,
+        bus: SharedBus,
+        on_snapshot: Callable[[Any], None] | None = None,
+        idle_sec: float = 1.0,
+        report_every_sec: float = 60.0,
+    ):
+        self.engine = engine
+        self.bus = bus
+        self.on_snapshot = on_snapshot
+        self.snapshots = SnapshotThrottle(bus, engine.cfg.engine.snapshot_hz)
+        self.idle_sec = idle_sec
+        self.report_every_sec = report_every_sec
+        self.latency = LatencyStats()
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wake: asyncio.Event | None = None
+        self._quote_arrived: float | None = None
+        self._stop = False
+        bus.add_listener(self._on_bus)
+
+    # called from whichever thread wrote to the bus
+    def _on_bus(self, channel: str):
+        if channel == "snapshot" or self._loop is None:
+            return
+        if channel == "quote" and self._quote_arrived is None:
+            self._quote_arrived = time.perf_counter()
+        try:
+            self._loop.call_soon_threadsafe(self._wake.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def stop(self):
+        self._stop = True
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _timeout(self) -> float:
+        out = self.idle_sec
+        if self.on_snapshot is not None:
+            # a snapshot held back by snapshot_hz still goes out without a new quote
+            due = self.snapshots.due_in(time.monotonic())
+            if due is not None:
+                out = min(out, due)
+        dl = self.engine.next_deadline()
+        if dl is None:
+            return out
+        # +1ms: exits compare with >=/>, wake just after the boundary
+        return max(0.0, min(out, (dl - self.engine.clock.now()).total_seconds() + 0.001))
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        next_report = time.monotonic() + self.report_every_sec
+        metrics = self.engine.metrics
+        next_metrics = time.monotonic()
+
+        while not self._stop:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self._timeout())
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._stop:
+                break
+
+            arrived, self._quote_arrived = self._quote_arrived, None
+            self.engine.tick()
+            if arrived is not None:
+                self.latency.add(time.perf_counter() - arrived)
+
+            if self.on_snapshot is not None:
+                self.snapshots.hz = self.engine.cfg.engine.snapshot_hz  # follows config reloads
+                snap = self.snapshots.poll()
+                if snap is not None:
+                    self.on_snapshot(snap)
+
+            if metrics is not None and time.monotonic() >= next_metrics:
+                self.engine.export_metrics()
+                next_metrics = time.monotonic() + self.engine.cfg.engine.metrics_every_sec
+
+            if time.monotonic() >= next_report:
+                self.engine.log.info(self.latency.summary())
+                if metrics is not None:
+                    self.engine.log.info(metrics.summary())
+                next_report = time.monotonic() + self.report_every_sec
+
+
+async def pump_feed(feed, bus: SharedBus, hz: float, metrics=None):
+    """Drive a pull-style feed (FakeMarketFeed) onto the bus; a push feed would call bus.set_quote itself."""
+    dt = 1.0 / max(hz, 1e-9)
+    while True:
+        if metrics is not None:
+            metrics.on_loop()  # the feed is what runs at loop_hz in async mode
+        q = feed.next_quote()
+        if q is not None:
+            bus.set_quote(q)
+        await asyncio.sleep(dt)
@@ -0,0 +1,313 @@
+from __future__ import annotations
+import json
+import math
+import os
+import threading
+import time
+import warnings
+from dataclasses import dataclass
+from typing import Any
+
+from engine.bus import SharedBus
+from engine.logger import Logger
+from engine.registry import LazyModel, ModelRegistry
+
+# Live scoring: trained models (train_v30 RF/GB/LR, V38 RF) loaded once, warmed up, and fed
+# one parsed EIA release at a time. Needs numpy + joblib + scikit-learn (imported lazily).
+# With `scoring.registry` the models come from engine/registry.py: startup reads only the
+# manifest and the artifacts are loaded (and checksummed) by a background prefetch.
+
+
+@dataclass
+class ScoreResult:
+    prob: float                 # ensemble P(up)
+    z: float                    # (prob - prob_mean) / prob_std -> controls["score"]
+    probs: dict[str, float]     # per model
+    latency_ms: float           # release seen -> score ready
+
+
+class EnsembleScorer:
+    """Average predict_proba of N fitted models; per-model feature order from feature_names_in_."""
+
+    def __init__(
+        self,
+        models: dict[str, Any],
+        prob_mean: float = 0.5,
+        prob_std: float = 0.1,
+        features: list[str] | None = None,
+    ):
+        import numpy as np
+
+        if not models:
+            raise ValueError("scoring: no models")
+        self.models = models
+        self.prob_mean = float(prob_mean)
+        self.prob_std = float(prob_std) if prob_std else 1.0
+        self._cols: dict[str, list[str]] = {}
+        self._x: dict[str, Any] = {}
+        for name, m in models.items():
+            cols = list(getattr(m, "feature_names_in_", None) if hasattr(m, "feature_names_in_") else (features or []))
+            if len(cols) != getattr(m, "n_features_in_", len(cols)):
+                raise ValueError(f"scoring: model '{name}' has no feature names; pass `features`")
+            self._cols[name] = cols
+            # preallocated 1-row input, filled in place per release
+            self._x[name] = np.zeros((1, len(cols)), dtype=np.float64)
+            if not isinstance(m, LazyModel):
+                _single_thread(m)
+        # forests: predict_proba validates input and dispatches through joblib for every call
+        # (~20ms on 300 trees for one row); walking tree_.predict directly gives the same numbers
+        self._forest = {name: _is_forest(m) for name, m in models.items()}
+        self._ready: dict[str, Any] = {}  # name -> loaded model (LazyModel resolved on first use)
+        self._x32 = {name: np.zeros_like(x, dtype=np.float32) for name, x in self._x.items()}
+        self.features = sorted({c for cols in self._cols.values() for c in cols})
+
+    @classmethod
+    def load(
+        cls,
+        paths: dict[str, str],
+        registry: str | None = None,
+        feature_set: list[str] | None = None,
+        **kw,
+    ) -> "EnsembleScorer":
+        """
+        .pkl -> joblib (sklearn); .npz -> compiled TreeKernel (compile_trees.py, no sklearn needed).
+        With `registry`, values are registry refs ("rf", "rf@v2") and models load lazily.
+        """
+        models: dict[str, Any] = {}
+        if registry:
+            reg = ModelRegistry(registry)
+            for name, ref in paths.items():
+                models[name] = reg.lazy(ref, available=feature_set)
+            return cls(models, **kw)
+        for name, p in paths.items():
+            if not os.path.exists(p):
+                raise FileNotFoundError(f"scoring: model file not found: {p}")
+            if p.endswith(".npz"):
+                from engine.tree_kernel import TreeKernel
+                models[name] = TreeKernel.load(p)
+            else:
+                import joblib
+                models[name] = joblib.load(p)
+        scorer = cls(models, **kw)
+        if feature_set is not None:
+            for name, cols in scorer._cols.items():
+                missing = [c for c in cols if c not in set(feature_set)]
+                if missing:
+                    raise ValueError(f"scoring: model '{name}' needs features not in feature_set: {', '.join(missing)}")
+        return scorer
+
+    def warmup(self, n: int = 3):
+        """First predict allocates/caches inside sklearn: pay it at startup, not at the release."""
+        for _ in range(n):
+            self.predict({})
+
+    def _model(self, name: str):
+        m = self._ready.get(name)
+        if m is None:
+            m = self.models[name]
+            if isinstance(m, LazyModel):
+                m = m.get()
+                _single_thread(m)
+                self._forest[name] = _is_forest(m)
+            self._ready[name] = m
+        return m
+
+    def prefetch(self, n: int = 3):
+        """Load lazy models and warm them up on private buffers (safe next to predict())."""
+        import numpy as np
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            for name in self.models:
+                m = self._model(name)
+                x = np.zeros_like(self._x[name])
+                for _ in range(n):
+                    if self._forest[name]:
+                        _forest_proba(m, x.astype(np.float32))
+                    elif hasattr(m, "predict_proba"):
+                        m.predict_proba(x)
+                    else:
+                        m.predict(x)
+
+    def loading(self) -> list[str]:
+        """Lazy models whose artifact is not loaded yet."""
+        return [n for n, m in self.models.items() if isinstance(m, LazyModel) and not m.loaded]
+
+    def missing(self, features: dict[str, float]) -> tuple[str, ...]:
+        """Columns of any model that the release lacks or has as NaN/inf."""
+        out = set()
+        for c in self.features:
+            v = features.get(c)
+            if v is None or not math.isfinite(v):
+                out.add(c)
+        return tuple(sorted(out))
+
+    def predict(self, features: dict[str, float]) -> tuple[float, dict[str, float], tuple[str, ...]]:
+        """Missing/NaN columns are scored as 0 and returned: callers that publish check missing() first."""
+        probs: dict[str, float] = {}
+        missing: list[str] = []
+        with warnings.catch_warnings():
+            # ndarray input on models fitted with DataFrames: same order, skip the name check warning
+            warnings.simplefilter("ignore", UserWarning)
+            for name in self.models:
+                m = self._model(name)
+                x = self._x[name]
+                row = x[0]
+                for i, c in enumerate(self._cols[name]):
+                    v = features.get(c)
+                    if v is None or not math.isfinite(v):
+                        v = 0.0
+                        missing.append(c)
+                    row[i] = v
+                if self._forest[name]:
+                    x32 = self._x32[name]
+                    x32[0] = row
+                    probs[name] = _forest_proba(m, x32)
+                elif hasattr(m, "predict_proba"):
+                    probs[name] = float(m.predict_proba(x)[0, 1])
+                else:
+                    probs[name] = float(m.predict(x)[0])
+        prob = sum(probs.values()) / len(probs)
+        return prob, probs, tuple(sorted(set(missing)))
+
+    def z(self, prob: float) -> float:
+        return (prob - self.prob_mean) / self.prob_std
+
+
+def _single_thread(m):
+    # single-row predicts: thread pool start-up costs more than the trees
+    if hasattr(m, "n_jobs"):
+        m.n_jobs = 1
+
+
+def _is_forest(m) -> bool:
+    est = getattr(m, "estimators_", None)
+    return (
+        type(m).__name__ in ("RandomForestClassifier", "ExtraTreesClassifier")
+        and isinstance(est, list)
+        and all(hasattr(e, "tree_") for e in est)
+        and getattr(m, "n_outputs_", 1) == 1
+    )
+
+
+def _forest_proba(m, x32) -> float:
+    """P(class 1) for one float32 row, same as predict_proba (mean of normalized leaf values)."""
+    acc = 0.0
+    for e in m.estimators_:
+        v = e.tree_.predict(x32)[0]
+        acc += v[1] / v.sum()
+    return float(acc / len(m.estimators_))
+
+
+class ReleaseWatcher:
+    """
+    Polls a JSON file written by the release parser (features_incremental.py update --out, or
+    any {"features": {...}} / flat {feature: value} dict). poll() returns the features once per write.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime = self._stat()
+        self.seen_at = 0.0  # perf_counter() when the last release was detected
+        self.last_error: str | None = None
+
+    def _stat(self) -> int | None:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def poll(self) -> dict[str, float] | None:
+        m = self._stat()
+        if m is None or m == self._mtime:
+            return None
+        self.seen_at = time.perf_counter()
+        self._mtime = m
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                text = f.read().strip()
+            # JSON-lines (features_incremental --out): the last line is the new release
+            d = json.loads(text.splitlines()[-1]) if text else {}
+        except (OSError, ValueError) as e:
+            self.last_error = str(e)
+            return None
+        self.last_error = None
+        d = d.get("features", d)
+        return {k: v for k, v in d.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+
+
+class LiveScorer:
+    """Release features -> ensemble prob -> z -> bus controls (score, event_active, latency)."""
+
+    def __init__(self, scorer: EnsembleScorer, bus: SharedBus, log: Logger | None = None):
+        self.scorer = scorer
+        self.bus = bus
+        self.log = log
+        self.last: ScoreResult | None = None
+
+    def on_release(self, features: dict[str, float], t0: float | None = None) -> ScoreResult | None:
+        """None (nothing published) when the release lacks a column some model needs."""
+        t0 = time.perf_counter() if t0 is None else t0
+        missing = self.scorer.missing(features)
+        if missing:
+            if self.log is not None:
+                self.log.error(f"SCORE not published: release missing/NaN features: {', '.join(missing)}")
+            return None
+        prob, probs, _ = self.scorer.predict(features)
+        z = self.scorer.z(prob)
+        latency_ms = (time.perf_counter() - t0) * 1000.0
+        self.bus.set_controls({
+            "score": z,
+            "event_active": True,
+            "score_prob": prob,
+            "score_latency_ms": latency_ms,
+        })
+        res = ScoreResult(prob=prob, z=z, probs=probs, latency_ms=latency_ms)
+        self.last = res
+        if self.log is not None:
+            self.log.info(f"SCORE z={z:+.2f} prob={prob:.3f} latency={latency_ms:.2f}ms")
+        return res
+
+
+def start_scoring(sc: dict[str, Any], bus: SharedBus, log: Logger | None = None) -> tuple[LiveScorer, ReleaseWatcher] | None:
+    """From the `scoring:` config section; None when disabled."""
+    if not sc.get("enabled"):
+        return None
+    scorer = EnsembleScorer.load(
+        dict(sc.get("models") or {}),
+        registry=sc.get("registry") or None,
+        feature_set=sc.get("feature_set"),
+        prob_mean=sc.get("prob_mean", 0.5),
+        prob_std=sc.get("prob_std", 0.1),
+        features=sc.get("features"),
+    )
+    if scorer.loading():
+        # registry: don't block startup on the artifacts; a release before this finishes
+        # waits for the model it needs
+        def _prefetch():
+            try:
+                scorer.prefetch()
+            except Exception as e:
+                if log is not None:
+                    log.error(f"Scoring: model load failed: {e}")
+                return
+            if log is not None:
+                refs = ", ".join(f"{m.ref} {m.load_ms:.0f}ms" for m in scorer.models.values() if isinstance(m, LazyModel))
+                log.info(f"Scoring: models loaded ({refs})")
+
+        threading.Thread(target=_prefetch, name="scoring-prefetch", daemon=True).start()
+    else:
+        scorer.warmup()
+    if log is not None:
+        log.info(f"Scoring ready: models={list(scorer.models)} features={len(scorer.features)}")
+    return LiveScorer(scorer, bus, log), ReleaseWatcher(sc.get("release_path", "release.json"))
+
+
+def poll_release(live: LiveScorer, watcher: ReleaseWatcher) -> ScoreResult | None:
+    feats = watcher.poll()
+    if feats is None:
+        if watcher.last_error and live.log is not None:
+            live.log.error(f"Release file rejected: {watcher.last_error}")
+            watcher.last_error = None
+        return None
+    return live.on_release(feats, t0=watcher.seen_at)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+import itertools
+import math
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Any
+
+from engine.bus import Quote
+from engine.config import Config
+from engine.logger import Logger
+from engine.replay import run_replay
+
+# column order inside the shared block (float64 each)
+_COLS = ("ts", "last", "bid", "ask", "spread_ticks")
+
+
+@dataclass
+class SweepEvent:
+    """One recorded release: a slice of the shared tick block + the score to replay it with."""
+    start: int
+    stop: int
+    score: float
+    event_at: float
+
+
+class SharedTicks:
+    """All event ticks packed once into a SharedMemory block, column-major float64."""
+
+    def __init__(self, quotes: list[Quote]):
+        self.n = len(quotes)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(8, 8 * len(_COLS) * self.n))
+        buf = self.shm.buf.cast("d")
+        for c, name in enumerate(_COLS):
+            col = array("d", (float(getattr(q, name)) for q in quotes))
+            buf[c * self.n:(c + 1) * self.n] = col
+        buf.release()
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+# ---------------- worker side ----------------
+_W_SHM: shared_memory.SharedMemory | None = None
+_W_COLS: tuple[memoryview, ...] = ()
+_W_EVENTS: list[SweepEvent] = []
+_W_CFG: Config | None = None
+_W_LOG: Logger | None = None
+
+
+def _worker_init(shm_name: str, n: int, events: list[SweepEvent], base_cfg: Config):
+    global _W_SHM, _W_COLS, _W_EVENTS, _W_CFG, _W_LOG
+    # attached for the life of the worker: combos read the columns in place
+    _W_SHM = shared_memory.SharedMemory(name=shm_name)
+    buf = _W_SHM.buf.cast("d")
+    _W_COLS = tuple(buf[c * n:(c + 1) * n] for c in range(len(_COLS)))
+    _W_EVENTS = events
+    _W_CFG = base_cfg
+    # one logger (one writer thread) per worker, shared by every replay it runs
+    _W_LOG = Logger(base_cfg.engine.log_path)
+
+
+def _event_quotes(ev: SweepEvent):
+    """Quotes of one event slice, built one at a time from the shared columns."""
+    ts, last, bid, ask, spr = _W_COLS
+    for i in range(ev.start, ev.stop):
+        yield Quote(ts[i], last[i], bid[i], ask[i], int(spr[i]))
+
+
+def _run_combo(params: dict[str, Any]) -> dict[str, Any]:
+    cfg = _W_CFG.override(params)
+    pnls: list[float] = []
+    for ev in _W_EVENTS:
+        res = run_replay(
+            cfg,
+            _event_quotes(ev),
+            controls={"arm": True, "score": ev.score},
+            timeline=[(ev.event_at, {"event_active": True})],
+            log=_W_LOG,
+        )
+        pnls.extend(t.pnl for t in res.trades)
+    return {**params, **trade_stats(pnls)}
+
+
+def trade_stats(pnls: list[float]) -> dict[str, float]:
+    n = len(pnls)
+    total = sum(pnls)
+    eq = peak = 0.0
+    max_dd = 0.0
+    for p in pnls:
+        eq += p
+        peak = max(peak, eq)
+        max_dd = min(max_dd, eq - peak)
+    wins = sum(1 for p in pnls if p > 0)
+    sharpe = 0.0
+    if n > 1:
+        mu = total / n
+        sd = math.sqrt(sum((p - mu) ** 2 for p in pnls) / (n - 1))
+        sharpe = mu / sd * math.sqrt(n) if sd > 0 else 0.0
+    return {
+        "n_trades": n,
+        "total_pnl": total,
+        "max_dd": max_dd,
+        "win_rate": 100.0 * wins / n if n else 0.0,
+        "sharpe": sharpe,
+    }
+
+
+# ---------------- driver ----------------
+def expand_grid(grid: dict[str, list[Any]]) -> list[dict[str, Any]]:
+    keys = list(grid)
+    return [dict(zip(keys, vals)) for vals in itertools.product(*(grid[k] for k in keys))]
+
+
+def run_sweep(
+    cfg: Config,
+    events: list[tuple[list[Quote], float, float | None]],
+    grid: dict[str, list[Any]],
+    workers: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Replay every grid combination over the same events on all cores.
+
+    `events` = [(quotes, score, event_at)]. Ticks are packed once into shared memory;
+    each worker attaches at start-up and replays the event slices straight from it.
+    Rows come back ranked by total_pnl (best first).
+    """
+    quotes: list[Quote] = []
+    evs: list[SweepEvent] = []
+    for qs, score, event_at in events:
+        if not qs:
+            continue
+        start = len(quotes)
+        quotes.extend(qs)
+        evs.append(SweepEvent(start, len(quotes), float(score), float(event_at if event_at is not None else qs[0].ts)))
+
+    # nothing of the live engine's files, as in replay.py
+    base = cfg.override({
+        "engine.log_path": os.devnull,
+        "engine.journal_path": None,
+        "engine.metrics_path": None,
+        "engine.record_path": None,
+    })
+
+    # drop combinations the config validator rejects (e.g. range_build_sec > confirm_seconds)
+    combos = []
+    for params in expand_grid(grid):
+        try:
+            base.override(params)
+        except ValueError:
+            continue
+        combos.append(params)
+    if not combos:
+        return []
+    workers = workers or os.cpu_count() or 1
+    ticks = SharedTicks(quotes)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_worker_init,
+            initargs=(ticks.name, ticks.n, evs, base),
+        ) as ex:
+            chunk = max(1, len(combos) // (workers * 8))
+            rows = list(ex.map(_run_combo, combos, chunksize=chunk))
+    finally:
+        ticks.close()
+
+    rows.sort(key=lambda r: (r["total_pnl"], r["sharpe"]), reverse=True)
+    return rows
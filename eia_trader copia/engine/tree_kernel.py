@@ -0,0 +1,272 @@
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+# Flat inference kernel for the trained EIA models (RandomForest / GradientBoosting / LogisticRegression).
+#
+# Trees are packed into one node table (feature, threshold, child, value), each tree renumbered
+# breadth-first so the two children of a node are adjacent: next = child[node] - (x <= threshold).
+# Leaves point to themselves (they test a constant 0 column against +inf), so a batch walks every
+# tree for exactly max_depth steps: 4 gathers + 1 compare per step, no per-node branching.
+#
+# Comparison follows sklearn (X cast to float32, `x <= threshold` with a float64 threshold):
+# thresholds are stored as the largest float32 <= the float64 value, which gives the same result
+# entirely in float32. NaN follows the node's missing_go_to_left (sklearn >= 1.3; right before),
+# on a separate path that only runs when the batch has NaNs.
+# Compiled models are plain .npz files or .npy directories (no pickle, no sklearn needed to score).
+
+KINDS = ("forest", "gb", "linear")
+
+
+class TreeKernel:
+    """Compiled model with the sklearn-style surface the scorer needs (predict_proba, feature_names_in_)."""
+
+    def __init__(
+        self,
+        kind: str,
+        feature_names: list[str],
+        feature: np.ndarray | None = None,
+        threshold: np.ndarray | None = None,
+        child: np.ndarray | None = None,
+        value: np.ndarray | None = None,
+        roots: np.ndarray | None = None,
+        nan_left: np.ndarray | None = None,
+        depth: int = 0,
+        base: float = 0.0,
+        coef: np.ndarray | None = None,
+    ):
+        if kind not in KINDS:
+            raise ValueError(f"tree_kernel: unknown kind {kind!r}")
+        self.kind = kind
+        self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.n_features_in_ = len(feature_names)
+        # index arrays as intp once here, so the hot loop does not convert per step
+        self.feature = None if feature is None else np.asarray(feature, dtype=np.intp)
+        self.threshold = threshold
+        self.child = None if child is None else np.asarray(child, dtype=np.intp)
+        self.value = value
+        self.roots = None if roots is None else np.asarray(roots, dtype=np.intp)
+        self.nan_left = None if nan_left is None else np.asarray(nan_left, dtype=bool)
+        self.depth = int(depth)
+        self.base = float(base)
+        self.coef = coef
+
+    @property
+    def n_trees(self) -> int:
+        return 0 if self.roots is None else len(self.roots)
+
+    # ---------------- inference ----------------
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """(n_rows, n_trees) leaf index of every row in every tree."""
+        n, nf = X.shape
+        # float32 copy + a trailing 0 column that every leaf tests (always "left" = stay)
+        Xp = np.zeros((n, nf + 1), dtype=np.float32)
+        Xp[:, :nf] = X
+        flat = Xp.ravel()
+        row_off = (np.arange(n, dtype=np.intp) * (nf + 1))[:, None]
+        nodes = np.broadcast_to(self.roots, (n, self.n_trees)).copy()
+        if self.nan_left is not None and np.isnan(flat).any():
+            for _ in range(self.depth):
+                x = flat[row_off + self.feature[nodes]]
+                go_left = np.where(np.isnan(x), self.nan_left[nodes], x <= self.threshold[nodes])
+                nodes = self.child[nodes]
+                nodes -= go_left
+            return nodes
+        for _ in range(self.depth):
+            go_left = flat[row_off + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self.child[nodes]
+            nodes -= go_left
+        return nodes
+
+    def predict_proba1(self, X: np.ndarray) -> np.ndarray:
+        """P(class 1) per row."""
+        X = np.atleast_2d(X)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"tree_kernel: X has {X.shape[1]} features, model expects {self.n_features_in_}")
+        if self.kind == "linear":
+            raw = np.asarray(X, dtype=np.float64) @ self.coef + self.base
+            return _sigmoid(raw)
+        leaf_vals = self.value[self.leaves(X)]
+        if self.kind == "forest":
+            return leaf_vals.mean(axis=1)
+        return _sigmoid(self.base + leaf_vals.sum(axis=1))
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        p1 = self.predict_proba1(X)
+        return np.column_stack([1.0 - p1, p1])
+
+    # ---------------- io ----------------
+    ARRAYS = ("feature", "threshold", "child", "value", "roots", "nan_left", "coef")
+
+    def save(self, path: str | Path, **meta: Any):
+        """`x.npz` -> one file; any other path -> directory of .npy (memory-mappable, see load)."""
+        header = {
+            "kind": self.kind,
+            "feature_names": [str(c) for c in self.feature_names_in_],
+            "depth": self.depth,
+            "base": self.base,
+        }
+        arrays = {k: getattr(self, k) for k in self.ARRAYS if getattr(self, k) is not None}
+        if str(path).endswith(".npz"):
+            z: dict[str, Any] = {
+                "kind": np.array(self.kind),
+                "feature_names": np.array(header["feature_names"]),
+                "depth": np.array(self.depth),
+                "base": np.array(self.base),
+                **arrays,
+            }
+            for k, v in meta.items():
+                z[f"meta_{k}"] = np.array(str(v))
+            np.savez(path, **z)
+            return
+        d = Path(path)
+        d.mkdir(parents=True, exist_ok=True)
+        for k, v in arrays.items():
+            np.save(d / f"{k}.npy", np.ascontiguousarray(v))
+        header["meta"] = {k: str(v) for k, v in meta.items()}
+        (d / "kernel.json").write_text(json.dumps(header, indent=1), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path, mmap: bool = False) -> "TreeKernel":
+        """.npz, or a directory from save(); mmap=True maps the directory's arrays read-only."""
+        p = Path(path)
+        if p.is_dir():
+            header = json.loads((p / "kernel.json").read_text(encoding="utf-8"))
+            arrays = {
+                k: np.load(p / f"{k}.npy", mmap_mode="r" if mmap else None)
+                for k in cls.ARRAYS
+                if (p / f"{k}.npy").exists()
+            }
+            return cls(
+                kind=header["kind"],
+                feature_names=header["feature_names"],
+                depth=header["depth"],
+                base=header["base"],
+                **arrays,
+            )
+        with np.load(p, allow_pickle=False) as z:
+            get = lambda k: z[k] if k in z.files else None
+            return cls(
+                kind=str(z["kind"]),
+                feature_names=[str(c) for c in z["feature_names"]],
+                feature=get("feature"),
+                threshold=get("threshold"),
+                child=get("child"),
+                value=get("value"),
+                roots=get("roots"),
+                nan_left=get("nan_left"),
+                depth=int(z["depth"]),
+                base=float(z["base"]),
+                coef=get("coef"),
+            )
+
+
+def _sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+# ---------------- export from sklearn ----------------
+def _float32_floor(t: np.ndarray) -> np.ndarray:
+    """Largest float32 <= t: for float32 x, x <= t  <=>  x <= _float32_floor(t)."""
+    t32 = t.astype(np.float32)
+    up = t32.astype(np.float64) > t
+    t32[up] = np.nextafter(t32[up], np.float32(-np.inf))
+    return t32
+
+
+def _pack(trees: list[Any], leaf_value, n_features: int) -> dict[str, Any]:
+    """Concatenate sklearn Tree objects into one breadth-first node table with global indices."""
+    feats, thrs, childs, vals, nan_left, roots = [], [], [], [], [], []
+    off = 0
+    depth = 0
+    for t in trees:
+        cl, cr = t.children_left, t.children_right
+        # BFS order: children of a node get consecutive ids (left, right)
+        order = [0]
+        for nd in order:
+            if cl[nd] != -1:
+                order.extend((cl[nd], cr[nd]))
+        order = np.asarray(order)
+        new_id = np.empty(t.node_count, dtype=np.int64)
+        new_id[order] = np.arange(len(order)) + off
+        leaf = cl[order] == -1
+        # internal: next = (id of left + 1) - go_left; leaf: itself (+1, and go_left is always 1)
+        child = new_id[np.where(leaf, order, cl[order])] + 1
+        feats.append(np.where(leaf, n_features, t.feature[order]).astype(np.int32))
+        thrs.append(np.where(leaf, np.inf, t.threshold[order]))
+        childs.append(child.astype(np.int64))
+        vals.append(leaf_value(t)[order].astype(np.float64))
+        mgl = getattr(t, "missing_go_to_left", None)
+        nan_left.append(leaf | (mgl[order].astype(bool) if mgl is not None else False))
+        roots.append(off)
+        depth = max(depth, int(t.max_depth))
+        off += len(order)
+    return {
+        "feature": np.concatenate(feats),
+        "threshold": _float32_floor(np.concatenate(thrs)),
+        "child": np.concatenate(childs),
+        "value": np.concatenate(vals),
+        "roots": np.asarray(roots, dtype=np.int64),
+        "nan_left": np.concatenate(nan_left),
+        "depth": depth,
+    }
+
+
+def _feature_names(m, features: list[str] | None) -> list[str]:
+    if hasattr(m, "feature_names_in_"):
+        return [str(c) for c in m.feature_names_in_]
+    if features is None or len(features) != m.n_features_in_:
+        raise ValueError("tree_kernel: model has no feature_names_in_; pass `features`")
+    return list(features)
+
+
+def compile_model(m, features: list[str] | None = None) -> TreeKernel:
+    """Fitted binary RandomForest/ExtraTrees, GradientBoosting or LogisticRegression -> TreeKernel."""
+    name = type(m).__name__
+    names = _feature_names(m, features)
+    if len(getattr(m, "classes_", ())) != 2:
+        raise ValueError(f"tree_kernel: only binary classifiers are supported ({name})")
+
+    if name in ("RandomForestClassifier", "ExtraTreesClassifier"):
+        # leaf value = class-1 fraction, as predict_proba normalizes each tree's leaf
+        def p1(t):
+            v = t.value[:, 0, :]
+            return v[:, 1] / v.sum(axis=1)
+        return TreeKernel("forest", names, **_pack([e.tree_ for e in m.estimators_], p1, len(names)))
+
+    if name == "GradientBoostingClassifier":
+        if m.init_ == "zero":
+            base = 0.0
+        elif hasattr(m.init_, "class_prior_"):
+            # sklearn clips the prior with float32 eps before the log-odds
+            eps = np.finfo(np.float32).eps
+            p = float(np.clip(m.init_.class_prior_[1], eps, 1 - eps))
+            base = float(np.log(p / (1 - p)))
+        else:
+            raise ValueError("tree_kernel: GradientBoosting with a custom init estimator is not supported")
+        lr = m.learning_rate
+        packed = _pack([e.tree_ for e in m.estimators_[:, 0]], lambda t: t.value[:, 0, 0] * lr, len(names))
+        return TreeKernel("gb", names, base=base, **packed)
+
+    if name == "LogisticRegression":
+        return TreeKernel("linear", names, coef=np.asarray(m.coef_[0], dtype=np.float64), base=float(m.intercept_[0]))
+
+    raise ValueError(f"tree_kernel: unsupported model type {name}")
+
+
+def sample_inputs(k: TreeKernel, n: int, seed: int = 0) -> np.ndarray:
+    """Random rows spanning each feature's split thresholds (for checks and benchmarks)."""
+    rng = np.random.default_rng(seed)
+    lo = np.full(k.n_features_in_, -1.0)
+    hi = np.full(k.n_features_in_, 1.0)
+    if k.feature is not None:
+        split = k.feature < k.n_features_in_
+        for f in range(k.n_features_in_):
+            t = k.threshold[split & (k.feature == f)]
+            if t.size:
+                pad = 0.1 * (t.max() - t.min()) + 1e-3
+                lo[f], hi[f] = t.min() - pad, t.max() + pad
+    return rng.uniform(lo, hi, size=(n, k.n_features_in_))
@@ -3,10 +3,28 @@ import json
 from pathlib import Path
 from dataclasses import asdict
 
+from engine.bus import SharedBus
+from engine.channel import ChannelServer, channel_supported
+
 STATE_FILE = Path("ui_state.json")
 SNAP_FILE = Path("ui_snapshot.json")
 
 
+def start_channel(bus: SharedBus, path: str | Path, log=None) -> ChannelServer | None:
+    """Socket bridge: controls land on the bus as they arrive. None -> use the json files."""
+    return start_channel_for(bus.set_controls, bus.get_controls, path, log)
+
+
+def start_channel_for(on_controls, get_controls, path: str | Path, log=None) -> ChannelServer | None:
+    if not channel_supported():
+        return None
+    try:
+        return ChannelServer(path, on_controls=on_controls, get_controls=get_controls, log=log).start()
+    except OSError:
+        return None
+
+
+# ---------------- json file fallback ----------------
 def read_controls(default: dict) -> dict:
     if not STATE_FILE.exists():
         return default
@@ -22,6 +40,7 @@ def read_controls(default: dict) -> dict:
 
 def write_snapshot(snap) -> None:
     try:
-        SNAP_FILE.write_text(json.dumps(asdict(snap), indent=2), encoding="utf-8")
+        d = snap.to_dict() if hasattr(snap, "to_dict") else asdict(snap)
+        SNAP_FILE.write_text(json.dumps(d, separators=(",", ":")), encoding="utf-8")
     except Exception:
         pass
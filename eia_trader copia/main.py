@@ -1,52 +1,169 @@
 from __future__ import annotations
+import asyncio
 import time
 from pathlib import Path
 
-from engine.config import load_config
+from engine.config import load_config, ConfigWatcher
 from engine.engine import TradingEngine
-from engine.bus import SharedBus
-from engine.ui_bridge import read_controls, write_snapshot
+from engine.bus import SharedBus, DEFAULT_CONTROLS
+from engine.runtime import AsyncEngineRuntime, SnapshotThrottle, pump_feed
+from engine.scoring import start_scoring, poll_release
+from engine.ui_bridge import read_controls, write_snapshot, start_channel
 from data.fake_market import FakeMarketFeed
+from data.shock_gen import shock_feed
+from data.recorder import QuoteRecorder
+
+
+def apply_reload(engine, watcher):
+    new = watcher.poll()
+    if new is not None:
+        engine.reload_config(new)
+        print("config.yaml reloaded")
+    elif watcher.last_error:
+        engine.log.error(f"Config reload rejected: {watcher.last_error}")
+        watcher.last_error = None
+
+
+def file_controls(default_controls, seen, scoring):
+    """ui_state.json -> controls; with live scoring, score/event_active only when edited in the file."""
+    ctl = read_controls(default_controls)
+    if scoring is not None:
+        for k in ("score", "event_active"):
+            v = ctl.get(k)
+            if k in seen and seen[k] == v:
+                ctl.pop(k, None)
+            seen[k] = v
+    return ctl
+
+
+def run_poll(engine, bus, market, channel, watcher, default_controls, loop_dt, scoring=None):
+    """Legacy fixed-rate loop: controls -> quote -> tick -> snapshot -> sleep."""
+    next_reload = time.monotonic()
+    next_metrics = time.monotonic()
+    seen = {}
+    snapshots = SnapshotThrottle(bus, engine.cfg.engine.snapshot_hz)
+    while True:
+        if engine.metrics is not None:
+            engine.metrics.on_loop()
+            if time.monotonic() >= next_metrics:
+                engine.export_metrics()
+                next_metrics = time.monotonic() + engine.cfg.engine.metrics_every_sec
+
+        if time.monotonic() >= next_reload:
+            apply_reload(engine, watcher)
+            next_reload = time.monotonic() + engine.cfg.engine.config_reload_sec
+
+        # socket bridge pushes controls into the bus by itself; files are the fallback
+        if channel is None:
+            bus.set_controls(file_controls(default_controls, seen, scoring))
+
+        if scoring is not None:
+            poll_release(*scoring)
+
+        quote = market.next_quote()
+        bus.set_quote(quote)
+        engine.tick()
+
+        # snapshot for dashboard (only when it changed, at most engine.snapshot_hz)
+        snapshots.hz = engine.cfg.engine.snapshot_hz
+        snap = snapshots.poll()
+        if snap is not None:
+            if channel is not None:
+                channel.publish(snap)
+            else:
+                write_snapshot(snap)
+
+        time.sleep(loop_dt)
+
+
+async def run_async(engine, bus, market, channel, watcher, default_controls, loop_dt, scoring=None):
+    """Event-driven: every quote/control change wakes the engine at once; timers handle time exits."""
+    runtime = AsyncEngineRuntime(
+        engine,
+        bus,
+        on_snapshot=channel.publish if channel is not None else write_snapshot,
+    )
+
+    async def poll_state_file():
+        seen = {}
+        while True:
+            bus.set_controls(file_controls(default_controls, seen, scoring))
+            await asyncio.sleep(loop_dt)
+
+    async def watch_config():
+        while True:
+            apply_reload(engine, watcher)
+            await asyncio.sleep(engine.cfg.engine.config_reload_sec)
+
+    async def watch_releases(poll_sec):
+        while True:
+            poll_release(*scoring)
+            await asyncio.sleep(poll_sec)
+
+    tasks = [
+        asyncio.create_task(pump_feed(market, bus, 1.0 / loop_dt, metrics=engine.metrics)),
+        asyncio.create_task(watch_config()),
+    ]
+    if channel is None:
+        tasks.append(asyncio.create_task(poll_state_file()))
+    if scoring is not None:
+        tasks.append(asyncio.create_task(watch_releases(float(engine.cfg.section("scoring").get("poll_sec", 0.01)))))
+    try:
+        await runtime.run()
+    finally:
+        for t in tasks:
+            t.cancel()
+        print(runtime.latency.summary())
 
 
 def main():
     cfg = load_config("config.yaml")
+    watcher = ConfigWatcher("config.yaml", current=cfg)
     Path("logs").mkdir(exist_ok=True)
 
     bus = SharedBus()
-    market = FakeMarketFeed(cfg)
+    # shock.enabled: generated releases; the feed sets score/event_active unless live scoring does
+    market = shock_feed(cfg, bus=None if cfg.section("scoring").get("enabled") else bus) or FakeMarketFeed(cfg)
     engine = TradingEngine(cfg, bus)
 
-    default_controls = {
-        "arm": False,
-        "kill": False,
-        "flatten": False,
-        "score": 0.0,
-        "event_active": False,
-    }
+    default_controls = dict(DEFAULT_CONTROLS)
     bus.set_controls(default_controls)
 
-    loop_dt = 1.0 / max(1, int(cfg["engine"]["loop_hz"]))
+    recorder = None
+    if cfg.engine.record_path:
+        recorder = QuoteRecorder(cfg.engine.record_path, log=engine.log)
+        recorder.attach(bus)
+        print(f"Recording quotes: {cfg.engine.record_path}")
 
-    print("Engine running. Open dashboard in another terminal: streamlit run ui/dashboard.py")
-    print("Stop with Ctrl+C")
-    try:
-        while True:
-            # pull UI controls from file (starter bridge)
-            bus.set_controls(read_controls(default_controls))
+    loop_dt = 1.0 / cfg.engine.loop_hz
 
-            quote = market.next_quote()
-            bus.set_quote(quote)
-            engine.tick()
+    scoring = start_scoring(cfg.section("scoring"), bus, engine.log)
+    if scoring is not None:
+        print(f"Live scoring: watching {scoring[1].path}")
 
-            # write snapshot for dashboard
-            snap = bus.get_snapshot()
-            if snap is not None:
-                write_snapshot(snap)
+    channel = None
+    if cfg.engine.ui_channel == "socket":
+        channel = start_channel(bus, cfg.engine.ui_socket, engine.log)
+    if channel is None:
+        print("UI bridge: json files (ui_state.json / ui_snapshot.json)")
+    else:
+        print(f"UI bridge: socket {cfg.engine.ui_socket}")
 
-            time.sleep(loop_dt)
+    print("Engine running. Open dashboard in another terminal: streamlit run ui/dashboard.py")
+    print("Stop with Ctrl+C")
+    try:
+        if cfg.engine.runtime == "poll":
+            run_poll(engine, bus, market, channel, watcher, default_controls, loop_dt, scoring)
+        else:
+            asyncio.run(run_async(engine, bus, market, channel, watcher, default_controls, loop_dt, scoring))
     except KeyboardInterrupt:
         print("\nStopping...")
+    finally:
+        if channel is not None:
+            channel.close()
+        if recorder is not None:
+            recorder.close()
+        engine.close()
 
 
 if __name__ == "__main__":
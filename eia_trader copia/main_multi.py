@@ -0,0 +1,50 @@
+from __future__ import annotations
+import asyncio
+from pathlib import Path
+
+from engine.config import load_config
+from engine.host import EngineHost, pump_feeds
+from engine.ui_bridge import start_channel_for
+from data.fake_market import FakeMarketFeed
+from data.shock_gen import shock_feed
+
+
+async def run(host: EngineHost, feeds: dict, hz: float, channel):
+    pump = asyncio.create_task(pump_feeds(feeds, host.dispatcher, hz))
+    try:
+        await host.run(on_snapshot=channel.publish if channel is not None else None, publish_hz=hz)
+    finally:
+        pump.cancel()
+
+
+def main():
+    cfg = load_config("config.yaml")
+    Path("logs").mkdir(exist_ok=True)
+
+    host = EngineHost.from_config(cfg)
+    feeds = {}
+    for i, (sym, e) in enumerate(host.engines.items()):
+        base = float(host.feed_params[sym].get("base_price", 75.0))
+        feeds[sym] = (shock_feed(e.cfg, clock=host.clock, base_price=base, bus=host.buses[sym], seed_offset=i)
+                      or FakeMarketFeed(e.cfg, base_price=base))
+
+    channel = None
+    if cfg.engine.ui_channel == "socket":
+        channel = start_channel_for(host.set_controls, host.get_controls, cfg.engine.ui_socket, host.log)
+
+    print(f"Host running {len(host.engines)} engines: {', '.join(host.engines)}")
+    print('Controls: {"symbol": "RB", ...} targets one engine, without "symbol" all of them')
+    print("Stop with Ctrl+C")
+    try:
+        asyncio.run(run(host, feeds, float(cfg.engine.loop_hz), channel))
+    except KeyboardInterrupt:
+        print("\nStopping...")
+    finally:
+        if channel is not None:
+            channel.close()
+        print(host.risk.summary())
+        host.close()
+
+
+if __name__ == "__main__":
+    main()
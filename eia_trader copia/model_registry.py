@@ -0,0 +1,107 @@
+from __future__ import annotations
+import argparse
+import json
+import time
+from pathlib import Path
+
+from engine.registry import ModelRegistry
+
+
+def _metrics(items: list[str]) -> dict[str, float]:
+    out = {}
+    for it in items:
+        k, _, v = it.partition("=")
+        out[k] = float(v)
+    return out
+
+
+def cmd_add(reg: ModelRegistry, args):
+    import joblib
+
+    src = Path(args.path)
+    if src.suffix == ".npz" or src.is_dir():
+        from engine.tree_kernel import TreeKernel
+        model = TreeKernel.load(src)
+    else:
+        model = joblib.load(src)
+
+    # train_v30.py writes <model>.json next to the .pkl: features, training window, metrics
+    side = src.with_suffix(".json")
+    meta = json.loads(side.read_text(encoding="utf-8")) if side.exists() else {}
+    features = args.features.split(",") if args.features else meta.get("features")
+    metrics = {**meta.get("metrics", {}), **_metrics(args.metric)}
+    v = reg.add(
+        args.name,
+        model,
+        features=features,
+        fmt=args.format,
+        train_start=args.train_start or meta.get("train_start"),
+        train_end=args.train_end or meta.get("train_end"),
+        metrics=metrics,
+        source=str(src),
+        note=args.note or meta.get("dataset", ""),
+    )
+    e = reg.entry(f"{args.name}@v{v}")
+    print(f"{src} -> {args.name}@v{v}  {e['format']} {e['bytes'] / 1e3:.0f} KB  features={len(e['features'])}  sha256={e['sha256'][:12]}")
+
+
+def cmd_list(reg: ModelRegistry, args):
+    for name in reg.names():
+        latest = reg.resolve(name)[1]
+        for v in reg.versions(name):
+            e = reg.entry(f"{name}@v{v}")
+            window = f"{e['train_start'] or '?'}..{e['train_end'] or '?'}"
+            metrics = " ".join(f"{k}={val:.3f}" for k, val in e["metrics"].items())
+            mark = "*" if v == latest else " "
+            ref = f"{name}@v{v}"
+            print(f"{mark} {ref:<14} {e['model_type']:<28} {e['format']:<6} {e['bytes'] / 1e3:8.0f} KB  "
+                  f"features={len(e['features']):<3} train={window}  {metrics}")
+
+
+def cmd_verify(reg: ModelRegistry, args):
+    bad = 0
+    names = [args.name] if args.name else reg.names()
+    for name in names:
+        for v in reg.versions(name):
+            t0 = time.perf_counter()
+            try:
+                reg.load(name, v)
+                status = "OK"
+            except Exception as e:
+                status = f"FAIL {e}"
+                bad += 1
+            print(f"{name}@v{v}: {status} ({(time.perf_counter() - t0) * 1000:.1f} ms)")
+    if bad:
+        raise SystemExit(1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Model registry for live scoring (manifest + checksummed artifacts)")
+    ap.add_argument("--root", default="models")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("add", help="register a .pkl (joblib) / .npz kernel as a new version")
+    p.add_argument("name")
+    p.add_argument("path")
+    p.add_argument("--format", choices=["joblib", "kernel"], default="joblib",
+                   help="kernel = compile to a memory-mapped TreeKernel")
+    p.add_argument("--features", help="comma-separated, for models fitted without feature names")
+    p.add_argument("--train-start")
+    p.add_argument("--train-end")
+    p.add_argument("--metric", action="append", default=[], help="name=value (repeatable)")
+    p.add_argument("--note")
+
+    sub.add_parser("list")
+    p = sub.add_parser("verify", help="checksum + feature check + load of every version")
+    p.add_argument("name", nargs="?")
+
+    args = ap.parse_args()
+    reg = ModelRegistry(args.root)
+    try:
+        {"add": cmd_add, "list": cmd_list, "verify": cmd_verify}[args.cmd](reg, args)
+    except (KeyError, ValueError) as e:
+        raise SystemExit(f"error: {e.args[0] if e.args else e}")
+
+
+if __name__ == "__main__":
+    main()
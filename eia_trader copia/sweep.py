@@ -0,0 +1,52 @@
+from __future__ import annotations
+import argparse
+import csv
+import time
+from pathlib import Path
+
+import yaml
+
+from engine.config import load_config
+from engine.sweep import run_sweep, expand_grid
+from data.replay_feed import load_quotes_csv
+from data.shock_gen import ShockParams, generate
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Parallel parameter sweep of the execution config over recorded events")
+    ap.add_argument("spec", help="sweep yaml (events + grid), see sweep.yaml")
+    ap.add_argument("--config", default="config.yaml")
+    ap.add_argument("--out", default="sweep_results.csv")
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+
+    cfg = load_config(args.config)
+    spec = yaml.safe_load(Path(args.spec).read_text(encoding="utf-8"))
+    grid = spec["grid"]
+
+    events = []
+    for ev in spec.get("events") or []:
+        events.append((load_quotes_csv(ev["ticks"]), float(ev["score"]), ev.get("event_at")))
+    if spec.get("shock"):
+        sh = dict(spec["shock"])
+        n, seed = int(sh.pop("n", 100)), sh.pop("seed", None)
+        b = generate(n, ShockParams.from_dict({**cfg.section("shock"), **sh}), seed=seed, tick_size=cfg.engine.tick_size)
+        events.extend(b.event(e) for e in range(len(b)))
+
+    n = len(expand_grid(grid))
+    print(f"Sweep: {n} combinations x {len(events)} events")
+    t0 = time.perf_counter()
+    rows = run_sweep(cfg, events, grid, workers=args.workers)
+    print(f"Done in {time.perf_counter() - t0:.1f}s")
+
+    if rows:
+        with open(args.out, "w", encoding="utf-8", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=list(rows[0]))
+            w.writeheader()
+            w.writerows(rows)
+        print(f"Results -> {args.out}")
+        print(rows[0])
+
+
+if __name__ == "__main__":
+    main()
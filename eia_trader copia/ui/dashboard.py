@@ -1,20 +1,37 @@
 from __future__ import annotations
+import sys
 import time
 import json
 from pathlib import Path
 
 import streamlit as st
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from engine.channel import ChannelClient, DEFAULT_SOCKET, channel_supported  # noqa: E402
+
 STATE_FILE = Path("ui_state.json")
+DEFAULT_STATE = {"arm": False, "kill": False, "flatten": False, "score": 0.0, "event_active": False}
+
+
+@st.cache_resource
+def get_channel() -> ChannelClient | None:
+    if not channel_supported() or not Path(DEFAULT_SOCKET).exists():
+        return None
+    try:
+        c = ChannelClient(DEFAULT_SOCKET)
+        c.subscribe()
+        return c
+    except OSError:
+        return None
 
 
 def read_state() -> dict:
     if not STATE_FILE.exists():
-        return {"arm": False, "kill": False, "flatten": False, "score": 0.0, "event_active": False}
+        return dict(DEFAULT_STATE)
     try:
         return json.loads(STATE_FILE.read_text(encoding="utf-8"))
     except Exception:
-        return {"arm": False, "kill": False, "flatten": False, "score": 0.0, "event_active": False}
+        return dict(DEFAULT_STATE)
 
 
 def write_state(d: dict):
@@ -34,11 +51,37 @@ def read_snapshot() -> dict | None:
 st.set_page_config(page_title="EIA Reaction Trader", layout="wide")
 st.title("EIA Reaction Trader — Dashboard (starter)")
 
+chan = get_channel()
+if chan is not None:
+    try:
+        chan.poll(timeout=0.2)
+    except (ConnectionError, OSError):
+        get_channel.clear()
+        chan = None
+
+# main_multi.py (EngineHost) publishes {"risk": {...}, "symbols": {SYM: snapshot}} and keeps
+# controls per symbol: pick one engine and render it like the single-engine snapshot
+snap = chan.snapshot if chan is not None else read_snapshot()
+risk = None
+symbol = None
+if snap is not None and "symbols" in snap:
+    risk = snap.get("risk")
+    symbols = sorted(snap["symbols"])
+    if symbols:
+        symbol = st.sidebar.selectbox("Symbol", symbols)
+    snap = snap["symbols"].get(symbol) if symbol else None
+
 left, right = st.columns([1, 2], gap="large")
 
 with left:
     st.subheader("Controls")
-    s = read_state()
+    if chan is not None:
+        s = dict(DEFAULT_STATE)
+        ctl = chan.controls or {}
+        s.update((ctl.get(symbol) or {}) if symbol else ctl)
+    else:
+        s = read_state()
+    before = dict(s)
 
     arm = st.toggle("ARM", value=bool(s.get("arm", False)))
     event_active = st.toggle("EVENT ACTIVE", value=bool(s.get("event_active", False)))
@@ -63,13 +106,29 @@ with left:
     s["event_active"] = event_active
     s["score"] = float(score)
 
-    write_state(s)
-
-    st.caption("Starter: shared state via ui_state.json. Next: local API/websockets.")
+    if chan is not None:
+        # push only what changed; the engine applies it as soon as it arrives
+        changed = {k: v for k, v in s.items() if before.get(k) != v}
+        if changed:
+            if symbol:
+                chan.send_controls({**changed, "symbol": symbol})
+                chan.controls = {**(chan.controls or {}), symbol: {**s, "flatten": False}}
+            else:
+                chan.send_controls(changed)
+                chan.controls = {**s, "flatten": False}
+        st.caption(f"Live channel: {DEFAULT_SOCKET}")
+    else:
+        write_state(s)
+        st.caption("Fallback: shared state via ui_state.json (engine socket not found).")
 
 with right:
-    st.subheader("Live Snapshot")
-    snap = read_snapshot()
+    st.subheader(f"Live Snapshot — {symbol}" if symbol else "Live Snapshot")
+    if risk is not None:
+        cR1, cR2, cR3 = st.columns(3)
+        cR1.metric("Combined PnL", f'{float(risk.get("total_pnl", 0.0)):.2f}')
+        cR2.metric("Combined max loss", f'{float(risk.get("max_daily_loss", 0.0)):.2f}')
+        cR3.metric("Host", "HALTED" if risk.get("halted") else "OK")
+        st.divider()
     if snap is None:
         st.info("No snapshot yet. Start the engine: `python main.py`")
     else:
@@ -87,6 +146,11 @@ with right:
         cC.metric("Unreal. PnL", f'{float(snap.get("unrealized_pnl",0.0)):.2f}')
         cD.metric("Realized PnL", f'{float(snap.get("realized_pnl",0.0)):.2f}')
 
+        cE, cF, cG = st.columns(3)
+        cE.metric("Avg slippage (t)", f'{float(snap.get("avg_slippage_ticks",0.0)):.2f}')
+        cF.metric("Last slippage (t)", f'{float(snap.get("last_slippage_ticks",0.0)):.2f}')
+        cG.metric("Commissions", f'{float(snap.get("commissions",0.0)):.2f}')
+
         st.divider()
         st.json(snap)
 
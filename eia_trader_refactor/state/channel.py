@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+# The socket channel is not duplicated here: this loads eia_trader copia/engine/channel.py
+# (stdlib only) under its own module name, so a local `engine` package can never shadow it.
+
+CHANNEL_SRC = Path(__file__).resolve().parents[2] / "eia_trader copia" / "engine" / "channel.py"
+
+
+def _load():
+    mod = sys.modules.get("eia_channel")
+    if mod is not None:
+        return mod
+    if not CHANNEL_SRC.exists():
+        return None
+    spec = importlib.util.spec_from_file_location("eia_channel", CHANNEL_SRC)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules["eia_channel"] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+_channel = _load()
+ChannelServer = _channel.ChannelServer if _channel is not None else None
+ChannelClient = _channel.ChannelClient if _channel is not None else None
+
+
+def channel_supported() -> bool:
+    """False when the engine tree is missing or the platform has no unix sockets (json files then)."""
+    return _channel is not None and _channel.channel_supported()
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
 import json
+import threading
 from dataclasses import asdict
 from pathlib import Path
-from typing import Any, TypeVar
+from typing import Any, Callable, TypeVar
+
+from state.channel import ChannelServer, channel_supported
 
 T = TypeVar("T")
 
 
 class JsonStateStore:
-    """Small helper to persist UI controls + engine snapshot to json files."""
+    """
+    Small helper to persist UI controls + engine snapshot to json files.
+
+    With `open_channel()` the same read_controls/write_snapshot interface runs over a local
+    unix socket instead: controls are pushed in as the UI changes them (no file IO on the
+    engine loop) and snapshots are streamed to subscribers. The json files stay as fallback.
+    """
 
     def __init__(self, state_file: str | Path = "state/ui_state.json", snapshot_file: str | Path = "state/ui_snapshot.json"):
         self.state_file = Path(state_file)
@@ -17,7 +26,52 @@ class JsonStateStore:
         self.state_file.parent.mkdir(parents=True, exist_ok=True)
         self.snapshot_file.parent.mkdir(parents=True, exist_ok=True)
 
+        self.channel: ChannelServer | None = None
+        self.mirror_files = False
+        self._pushed: dict[str, Any] = {}
+        self._pushed_lock = threading.Lock()
+        self._on_controls: Callable[[dict[str, Any]], None] | None = None
+
+    # ---------------- channel ----------------
+    def open_channel(
+        self,
+        path: str | Path = "state/ui.sock",
+        on_controls: Callable[[dict[str, Any]], None] | None = None,
+        mirror_files: bool = False,
+    ) -> bool:
+        """Start the socket bridge. Returns False (json files stay in use) when unavailable."""
+        if not channel_supported():
+            return False
+        self._on_controls = on_controls
+        self.mirror_files = mirror_files
+        try:
+            self.channel = ChannelServer(path, on_controls=self._push, get_controls=self._pushed_copy).start()
+        except OSError:
+            self.channel = None
+            return False
+        return True
+
+    def close(self) -> None:
+        if self.channel is not None:
+            self.channel.close()
+            self.channel = None
+
+    def _push(self, d: dict[str, Any]) -> None:
+        with self._pushed_lock:
+            self._pushed.update(d)
+        if self._on_controls is not None:
+            self._on_controls(d)
+
+    def _pushed_copy(self) -> dict[str, Any]:
+        with self._pushed_lock:
+            return dict(self._pushed)
+
+    # ---------------- interface ----------------
     def read_controls(self, defaults: dict[str, Any]) -> dict[str, Any]:
+        if self.channel is not None:
+            out = dict(defaults)
+            out.update(self._pushed_copy())
+            return out
         if not self.state_file.exists():
             return dict(defaults)
         try:
@@ -30,6 +84,10 @@ class JsonStateStore:
             return dict(defaults)
 
     def write_snapshot(self, snap: Any) -> None:
+        if self.channel is not None:
+            self.channel.publish(snap)
+            if not self.mirror_files:
+                return
         try:
             payload = asdict(snap) if hasattr(snap, "__dataclass_fields__") else snap
             self.snapshot_file.write_text(json.dumps(payload, indent=2), encoding="utf-8")
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable
 
 from state.store import JsonStateStore
 
@@ -8,6 +9,14 @@ from state.store import JsonStateStore
 _store = JsonStateStore()
 
 
+def open_channel(path: str | Path = "state/ui.sock", on_controls: Callable[[dict[str, Any]], None] | None = None) -> bool:
+    return _store.open_channel(path, on_controls=on_controls)
+
+
+def close_channel() -> None:
+    _store.close()
+
+
 def read_controls(default: dict[str, Any]) -> dict[str, Any]:
     return _store.read_controls(default)
 